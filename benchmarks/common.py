@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def makeCorpus(rootDir: Path, fileCount: int, fileSize: int = 1024, filesPerDir: int = 1000):
+    """Writes fileCount files of fileSize bytes under rootDir, spread over
+    sub-folders of filesPerDir files each. Every file has distinct contents."""
+    for i in range(fileCount):
+        folder = Path(rootDir, f"dir{i // filesPerDir:05d}")
+        folder.mkdir(parents=True, exist_ok=True)
+        header = f"{i}\n".encode('utf-8')
+        Path(folder, f"file{i:07d}.bin").write_bytes(
+            header + b'x' * max(fileSize - len(header), 0))
+
+@contextmanager
+def timed(results: dict, name: str):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+def printRate(name: str, count: int, seconds: float, unit: str = "rows"):
+    rate = count / seconds if seconds else float('inf')
+    print(f"{name:<30} {count:>10} {unit} {seconds:>9.3f} s {rate:>12.0f} {unit}/s")
@@ -0,0 +1,42 @@
+"""Compares the Go and Python hashing engines, and the serial hashFile loop,
+on the same corpus.
+
+Run from the repository root:
+    python -m benchmarks.hashEngines [fileCount] [fileSize] [workers]
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.goInterface import goHashFiles
+from duplicateAndDeletedFileTracker.hashEngine import goEngineAvailable
+from duplicateAndDeletedFileTracker.main import hashFile
+from duplicateAndDeletedFileTracker.pyHash import pyHashFiles
+
+from benchmarks.common import makeCorpus, printRate, timed
+
+
+def main(fileCount: int, fileSize: int, workers: int):
+    results = {}
+    with tempfile.TemporaryDirectory() as rootDir:
+        makeCorpus(Path(rootDir), fileCount, fileSize)
+        paths = [str(path) for path in sorted(Path(rootDir).rglob('*.bin'))]
+
+        with timed(results, "serial hashFile"):
+            expected = [hashFile(path) for path in paths]
+        with timed(results, f"pyHashFiles ({workers or 'default'} workers)"):
+            assert pyHashFiles(paths, workers) == expected
+        if goEngineAvailable():
+            with timed(results, f"goHashFiles ({workers or 'default'} workers)"):
+                assert goHashFiles(paths, workers) == expected
+        else:
+            print("_hash.so could not be loaded, skipping goHashFiles")
+
+    megabytes = fileCount * fileSize / 1e6
+    for name, seconds in results.items():
+        printRate(name, round(megabytes), seconds, "MB")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [2000, 1024 * 1024, 0]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,69 @@
+"""Measures how much reading files in disk order speeds up cold cache
+hashing, and how closely the throttle holds hashing to its limit.
+
+A corpus is written and synced to disk, then hashed in a shuffled order,
+standing in for the order the database returns files in, and in inode and
+extent order. Before each run every file is dropped from the page cache with
+posix_fadvise, so each is read from disk without needing root to drop the
+whole cache. The gain is largest on spinning disks and on corpora much larger
+than the disk's own cache; on an SSD the orders should come out about even.
+
+Run from the repository root:
+    python -m benchmarks.ioOrder [fileCount] [fileSize] [workers] [engine]
+"""
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.hashEngine import hashFiles
+from duplicateAndDeletedFileTracker.hashOptions import HashOptions
+
+from benchmarks.common import makeCorpus, printRate, timed
+
+
+def dropFromCache(paths):
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+def main(fileCount: int, fileSize: int, workers: int, engine: str):
+    results = {}
+    with tempfile.TemporaryDirectory() as rootDir:
+        makeCorpus(Path(rootDir), fileCount, fileSize)
+        os.sync()
+        paths = [str(path) for path in Path(rootDir).rglob('*.bin')]
+        random.Random(0).shuffle(paths)
+
+        expected = None
+        for order in ('none', 'inode', 'extent'):
+            dropFromCache(paths)
+            name = "shuffled" if order == 'none' else f"{order} order"
+            with timed(results, f"{name} ({engine}, {workers} workers)"):
+                hashes = hashFiles(paths, HashOptions(workers, engine=engine, order=order))
+            assert expected is None or hashes == expected
+            expected = hashes
+
+        # Throttled to a quarter of the best rate, on a sample of the corpus
+        # taking about two seconds at that rate
+        limit = int(fileCount * fileSize / min(results.values()) / 4)
+        sample = paths[:max(1, min(fileCount, 2 * limit // max(fileSize, 1)))]
+        dropFromCache(sample)
+        throttled = f"throttled to {limit / 1e6:.1f} MB/s"
+        with timed(results, throttled):
+            hashFiles(sample, HashOptions(
+                workers, engine=engine, order='inode', bytesPerSecond=limit))
+
+    for name, seconds in results.items():
+        megabytes = (len(sample) if name == throttled else fileCount) * fileSize / 1e6
+        printRate(name, round(megabytes), seconds, "MB")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    defaults = [20000, 256 * 1024, 2, 'auto']
+    args = args + defaults[len(args):]
+    main(int(args[0]), int(args[1]), int(args[2]), args[3])
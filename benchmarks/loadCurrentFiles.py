@@ -0,0 +1,43 @@
+"""Compares the COPY and per-row INSERT paths of loadCurrentFiles.
+
+Run from the repository root against the test database:
+    python -m benchmarks.loadCurrentFiles [fileCount]
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker import queries
+from duplicateAndDeletedFileTracker.main import (copyCurrentFiles,
+                                                 currentFileRows,
+                                                 insertCurrentFiles,
+                                                 openConnection)
+from duplicateAndDeletedFileTracker.schema import migrate
+from tests.test_config import config
+
+from benchmarks.common import makeCorpus, printRate, timed
+
+
+def main(fileCount: int):
+    with tempfile.TemporaryDirectory() as rootDir:
+        makeCorpus(Path(rootDir), fileCount, fileSize=16)
+        files = list(currentFileRows(Path(rootDir)))
+
+    results = {}
+    with openConnection(config.connect) as cursor:
+        cursor.execute(queries.resetAllTables)
+        migrate(cursor)
+
+        with timed(results, "INSERT per row"):
+            insertCurrentFiles(cursor, files)
+        cursor.execute(queries.resetCurrentFiles)
+
+        with timed(results, "COPY FROM STDIN"):
+            copyCurrentFiles(cursor, files)
+        cursor.execute(queries.resetCurrentFiles)
+
+    for name, seconds in results.items():
+        printRate(name, fileCount, seconds)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
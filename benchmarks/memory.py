@@ -0,0 +1,64 @@
+"""Measures how the peak memory of the hash stages grows with the archive.
+
+For each file count a corpus is generated and loaded into currentFiles in a
+fresh process, then every file is partially and fully hashed through the
+streamed stages. The process's peak resident set size is read before and
+after, so memory held by libpq and the Go library is counted along with
+Python's own. With streaming the growth should stay flat as files are added.
+
+Run from the repository root against the test database:
+    python -m benchmarks.memory [fileCount ...]
+"""
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker import queries
+from duplicateAndDeletedFileTracker.main import (loadCurrentFiles,
+                                                 openConnection,
+                                                 queryUpdateFilesHash,
+                                                 updatePartialHashesOf)
+from duplicateAndDeletedFileTracker.schema import migrate
+from tests.test_config import config
+
+from benchmarks.common import makeCorpus, timed
+
+
+def peakRssKiB() -> int:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def measure(fileCount: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as rootDir, openConnection(config.connect) as cursor:
+        makeCorpus(Path(rootDir), fileCount, fileSize=16)
+        cursor.execute(queries.resetAllTables)
+        migrate(cursor)
+        loadCurrentFiles(cursor, Path(rootDir))
+
+        baseline = peakRssKiB()
+        with timed(results, "seconds"):
+            updatePartialHashesOf(cursor, Path(rootDir), "newPathFilesWithoutHash")
+            queryUpdateFilesHash(cursor, Path(rootDir), "newPathFilesWithoutHash")
+        results["growthKiB"] = peakRssKiB() - baseline
+    return results
+
+def main(fileCounts):
+    print(f"{'files':>10} {'peak growth':>14} {'time':>10}")
+    for fileCount in fileCounts:
+        # A fresh process each, as the peak resident set size never falls
+        child = subprocess.run(
+            [sys.executable, "-m", "benchmarks.memory", "--child", str(fileCount)],
+            capture_output=True, text=True, check=True)
+        results = json.loads(child.stdout)
+        print(f"{fileCount:>10} {results['growthKiB'] / 1024:>10.1f} MiB "
+              f"{results['seconds']:>8.2f} s")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(measure(int(sys.argv[2]))))
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [10000, 40000, 160000])
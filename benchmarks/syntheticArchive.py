@@ -0,0 +1,110 @@
+"""Generates synthetic archive trees for benchmarking, with control over the
+number of files, their size distribution, directory depth and the share of
+duplicated, moved, deleted and new files between runs."""
+import os
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+@dataclass
+class ArchiveSpec:
+    fileCount: int = 10000
+    # File sizes are log-normally distributed around sizeMedian bytes,
+    # sizeSigma = 0 makes every file sizeMedian bytes
+    sizeMedian: int = 64 * 1024
+    sizeSigma: float = 1.0
+    maxSize: int = 64 * 1024 * 1024
+    depth: int = 3
+    dirsPerLevel: int = 8
+    # Share of files created as copies of another file in the archive
+    duplicateRatio: float = 0.05
+    # Shares of the archive moved, deleted and newly added between runs
+    moveRatio: float = 0.05
+    deleteRatio: float = 0.05
+    newRatio: float = 0.10
+    seed: int = 0
+
+_filler = bytes(range(256)) * 256
+
+def contents(contentId: int, size: int) -> bytes:
+    """Deterministic file contents, distinct for each contentId."""
+    header = f"{contentId}\n".encode('utf-8')
+    body = size - len(header)
+    return header + (_filler * (body // len(_filler) + 1))[:max(body, 0)]
+
+class SyntheticArchive:
+    """A generated archive tree under rootDir, tracking which contents each
+    file holds so that changes between runs can reuse them."""
+
+    def __init__(self, rootDir: Path, spec: ArchiveSpec):
+        self.rootDir = rootDir
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        # relative path -> (contentId, size)
+        self.files: Dict[str, Tuple[int, int]] = {}
+        self.deleted: List[Tuple[int, int]] = []
+        self.nextContentId = 0
+        self.nextFileId = 0
+
+    def randomSize(self) -> int:
+        size = self.spec.sizeMedian * self.rng.lognormvariate(0, self.spec.sizeSigma)
+        return max(1, min(int(size), self.spec.maxSize))
+
+    def randomPath(self, name: str) -> str:
+        depth = self.rng.randint(0, self.spec.depth)
+        folders = [
+            f"d{level}_{self.rng.randrange(self.spec.dirsPerLevel)}"
+            for level in range(depth)]
+        return os.sep.join(folders + [name])
+
+    def newContents(self) -> Tuple[int, int]:
+        self.nextContentId += 1
+        return self.nextContentId, self.randomSize()
+
+    def write(self, relative_path: str, content: Tuple[int, int]):
+        path = Path(self.rootDir, relative_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(contents(*content))
+        self.files[relative_path] = content
+
+    def addFiles(self, count: int, reuse: List[Tuple[int, int]] = ()):
+        """Adds count files, duplicateRatio of them copying existing contents
+        and the rest new. Contents in reuse are added first."""
+        existing = list(self.files.values())
+        for i in range(count):
+            if i < len(reuse):
+                content = reuse[i]
+            elif existing and self.rng.random() < self.spec.duplicateRatio:
+                content = self.rng.choice(existing)
+            else:
+                content = self.newContents()
+            self.nextFileId += 1
+            self.write(self.randomPath(f"f{self.nextFileId}.bin"), content)
+
+    def populate(self):
+        self.addFiles(self.spec.fileCount)
+
+    def applyChanges(self):
+        """Moves, deletes and adds files as a user reorganising the archive
+        and importing new files would. Some of the new files are re-imports
+        of files deleted earlier."""
+        paths = sorted(self.files)
+        self.rng.shuffle(paths)
+        moveCount = int(len(paths) * self.spec.moveRatio)
+        deleteCount = int(len(paths) * self.spec.deleteRatio)
+
+        for relative_path in paths[:moveCount]:
+            content = self.files.pop(relative_path)
+            newPath = self.randomPath("moved_" + Path(relative_path).name)
+            Path(self.rootDir, newPath).parent.mkdir(parents=True, exist_ok=True)
+            os.replace(Path(self.rootDir, relative_path), Path(self.rootDir, newPath))
+            self.files[newPath] = content
+
+        for relative_path in paths[moveCount:moveCount + deleteCount]:
+            self.deleted.append(self.files.pop(relative_path))
+            Path(self.rootDir, relative_path).unlink()
+
+        reimported = self.deleted[:int(len(self.deleted) * self.spec.duplicateRatio)]
+        self.addFiles(int(len(paths) * self.spec.newRatio), reimported)
@@ -0,0 +1,139 @@
+"""Times each phase of the updateDatabase.py flow against a synthetic archive,
+and writes the timings as JSON so runs can be compared across commits.
+With --pipelined the walk, partial hashing and writes of currentFiles overlap,
+as with config.pipelinedUpdate.
+
+The archive is generated, imported by a first timed update, changed by moving,
+deleting and adding files, then imported again by a second timed update.
+
+Run from the repository root against the test database:
+    python -m benchmarks.updateFlow --file-count 100000 --output results.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, fields
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker import queries
+from duplicateAndDeletedFileTracker.hashOptions import HashOptions
+from duplicateAndDeletedFileTracker.main import (ExtendedCursorInterface,
+                                                 loadCurrentFiles,
+                                                 openConnection,
+                                                 selectClassified,
+                                                 updateModifiedFilesHash,
+                                                 updateNewFilesHash)
+from duplicateAndDeletedFileTracker.pipeline import pipelinedLoadCurrentFiles
+from duplicateAndDeletedFileTracker.schema import migrate
+from tests.test_config import config
+
+from benchmarks.syntheticArchive import ArchiveSpec, SyntheticArchive
+
+
+def updatePhases(
+    cursor: ExtendedCursorInterface,
+    rootDir: Path,
+    hashOptions: HashOptions,
+    pipelined: bool = False
+):
+    """(name, callable) for each phase of updateDatabase.py, in order."""
+    def call(procedure):
+        return lambda: cursor.execute(f"CALL {procedure}();")
+
+    def select(query):
+        return lambda: cursor.getResult(query)
+
+    loadPhase = ("loadCurrentFiles", lambda: loadCurrentFiles(cursor, rootDir))
+    if pipelined:
+        loadPhase = ("pipelinedLoadCurrentFiles",
+                     lambda: pipelinedLoadCurrentFiles(cursor, rootDir, hashOptions))
+
+    return [
+        ("migrate", lambda: migrate(cursor)),
+        loadPhase,
+        ("updateNewFilesHash", lambda: updateNewFilesHash(cursor, rootDir, hashOptions)),
+        ("updateModifiedFilesHash", lambda: updateModifiedFilesHash(cursor, rootDir, hashOptions)),
+        ("analyzeCurrentFiles", lambda: cursor.execute(queries.analyzeCurrentFiles)),
+        ("updateArchiveMovedFiles", call("updateArchiveMovedFiles")),
+        ("updateArchiveModifiedFiles", call("updateArchiveModifiedFiles")),
+        ("updateArchiveNewUnseenFiles", call("updateArchiveNewUnseenFiles")),
+        ("updateArchiveDeletedFiles", call("updateArchiveDeletedFiles")),
+        ("classifyDuplicates", call("classifyDuplicates")),
+        ("duplicateFiles", select(selectClassified('duplicate', '*'))),
+        ("duplicatePreviouslyDeletedFiles", select(selectClassified('duplicatePreviouslyDeleted', '*'))),
+    ]
+
+def timeUpdate(rootDir: Path, hashOptions: HashOptions, pipelined: bool = False) -> dict:
+    timings = {}
+    with openConnection(config.connect) as cursor:
+        for name, phase in updatePhases(cursor, rootDir, hashOptions, pipelined):
+            start = time.perf_counter()
+            phase()
+            timings[name] = time.perf_counter() - start
+    timings["total"] = sum(timings.values())
+    return timings
+
+def countRows(view: str) -> int:
+    with openConnection(config.connect) as cursor:
+        return cursor.getResult(f"SELECT count(*) FROM {view}")[0][0]
+
+def currentCommit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(spec: ArchiveSpec, hashOptions: HashOptions, pipelined: bool = False) -> dict:
+    with openConnection(config.connect) as cursor:
+        cursor.execute(queries.resetAllTables)
+
+    with tempfile.TemporaryDirectory() as rootDir:
+        archive = SyntheticArchive(Path(rootDir), spec)
+        archive.populate()
+        initial = timeUpdate(Path(rootDir), hashOptions, pipelined)
+
+        archive.applyChanges()
+        update = timeUpdate(Path(rootDir), hashOptions, pipelined)
+
+    return {
+        "commit": currentCommit(),
+        "spec": asdict(spec),
+        "hashOptions": asdict(hashOptions),
+        "pipelined": pipelined,
+        "initial": initial,
+        "update": update,
+        "rows": {
+            view: countRows(view)
+            for view in ("archiveFiles", "archiveDeletedFiles", "currentFiles")
+        },
+    }
+
+def parseArgs(argv) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    for field in fields(ArchiveSpec):
+        flag = "--" + "".join("-" + c.lower() if c.isupper() else c for c in field.name)
+        parser.add_argument(flag, dest=field.name, type=field.type, default=field.default)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--engine", default="auto", choices=("auto", "go", "python"))
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--output", help="file to write JSON results to, default stdout")
+    return parser.parse_args(argv)
+
+def main(argv):
+    args = parseArgs(argv)
+    spec = ArchiveSpec(**{field.name: getattr(args, field.name) for field in fields(ArchiveSpec)})
+    results = run(spec, HashOptions(workers=args.workers, engine=args.engine), args.pipelined)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(report)
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
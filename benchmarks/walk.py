@@ -0,0 +1,39 @@
+"""Compares the scandir based scanTree walker against os.walk with a stat
+of every file, as main.ingest used to list the archive.
+
+Run from the repository root:
+    python -m benchmarks.walk [fileCount] [filesPerDir] [workers]
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.walk import scanTree
+
+from benchmarks.common import makeCorpus, printRate, timed
+
+
+def osWalk(rootDir: Path):
+    for path, _, files in os.walk(rootDir):
+        for name in files:
+            yield Path(path, name).stat()
+
+def main(fileCount: int, filesPerDir: int, workers: int):
+    results = {}
+    with tempfile.TemporaryDirectory() as rootDir:
+        makeCorpus(Path(rootDir), fileCount, fileSize=16, filesPerDir=filesPerDir)
+
+        with timed(results, "os.walk"):
+            walked = sum(1 for _ in osWalk(Path(rootDir)))
+        with timed(results, f"scanTree ({workers or 'default'} workers)"):
+            scanned = sum(1 for _ in scanTree(Path(rootDir), workers or None))
+        assert walked == scanned == fileCount
+
+    for name, seconds in results.items():
+        printRate(name, fileCount, seconds, "files")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [50000, 100, 0]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import io
+from typing import Iterable, Iterator, Sequence
+
+
+class IterableReader(io.TextIOBase):
+    """Read only text file backed by an iterable of strings.
+
+    Lets COPY ... FROM STDIN pull rows from a generator, so only the chunk
+    currently requested by the database driver is held in memory."""
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self._buffer = ''
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self, size: int):
+        pieces = [self._buffer]
+        filled = len(self._buffer)
+        while size < 0 or filled < size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                break
+            pieces.append(chunk)
+            filled += len(chunk)
+        self._buffer = ''.join(pieces)
+
+    def read(self, size: int = -1) -> str:
+        if size is None: size = -1
+        self._fill(size)
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size: int = -1) -> str:
+        while '\n' not in self._buffer:
+            length = len(self._buffer)
+            self._fill(length + 1)
+            if len(self._buffer) == length: break
+        end = self._buffer.find('\n') + 1 or len(self._buffer)
+        if size is not None and 0 <= size < end:
+            end = size
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+
+def formatCopyField(value) -> str:
+    """Formats a value for postgres' COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea's hex input format, with its backslash escaped for COPY
+        return '\\\\x' + bytes(value).hex()
+    return (str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r'))
+
+def copyRows(rows: Iterable[Sequence]) -> Iterator[str]:
+    for row in rows:
+        yield '\t'.join(formatCopyField(value) for value in row) + '\n'
@@ -1,4 +1,3 @@
-
 from pathlib import Path
 
 class config:
@@ -10,3 +9,54 @@ class config:
         'host': 'localhost',
         'port': 5432,
     }
+    # Or {'sqlite': 'path/to/archive.sqlite3'} to keep the database in a local
+    # SQLite file instead of on a Postgres server
+    # Optional. Several archives to track in one database, by root name, in
+    # place of rootPath. Files are compared by hash across every root; a root
+    # named 'default' keeps the history recorded for rootPath
+    roots: dict = None
+    # Optional. 'ssd' or 'hdd', used to pick hashing defaults for the archive's disk
+    storageType: str = 'ssd'
+    # Optional. Files hashed at once and read buffer size in bytes, 0 for the default
+    hashWorkers: int = 0
+    hashBufferSize: int = 0
+    # Optional. 'go', 'python', or 'auto' to use Go when _hash.so can be loaded
+    hashEngine: str = 'auto'
+    # Optional. Order files are read in to be hashed: 'none', 'inode', or 'extent'
+    # for where their data lies on disk where the filesystem can say (Linux).
+    # None for the storage type's default, 'extent' on 'hdd' and 'none' on 'ssd'
+    hashOrder: str = None
+    # Optional. Caps on the bytes and reads a second of all hashing together, so
+    # a shared disk stays responsive to its other users. 0 for no limit
+    hashBytesPerSecond: int = 0
+    hashIops: int = 0
+    # Optional. File keeping hashes between runs so unchanged files, including
+    # moved ones, aren't read again, e.g.
+    # str(Path.home() / '.duplicateAndDeletedFileTracker' / 'hashCache.sqlite3').
+    # Files are known by device, inode, size and mtime, so only enable it where
+    # the archive's filesystem keeps those stable. None, the default, disables it
+    hashCachePath: str = None
+    # Optional. Keep currentFiles between runs and only rescan directories whose
+    # mtime has changed, or which hold a file whose mtime or size has, found by
+    # statting every known file rather than listing every directory
+    incrementalScan: bool = False
+    # Optional. Walk the archive, partially hash new files and write them to the
+    # database concurrently rather than one after another. Ignored with incrementalScan
+    pipelinedUpdate: bool = False
+    # Optional. watchDatabase.py applies changes once no file has changed for
+    # watchDebounceSeconds, or watchMaxDelaySeconds after the first change
+    watchDebounceSeconds: float = 2.0
+    watchMaxDelaySeconds: float = 30.0
+    # Optional. Policies resolveDuplicates.py applies in order, each deciding the
+    # duplicates no earlier one has: 'removePreviouslyDeleted', 'keepOldest',
+    # 'keepAll', or 'preferPrefixes:' followed by relative path prefixes separated by '|'.
+    # 'keepOldest:replace' also deletes an archived file in favour of an older duplicate
+    duplicatePolicies: list = ['removePreviouslyDeleted', 'keepOldest']
+    # Optional. Where to write per phase timings and counters after each update run,
+    # as JSON and/or as a file for the Prometheus node exporter's textfile collector
+    metricsJsonPath: str = None
+    metricsPrometheusPath: str = None
+    # Optional. Run one phase (e.g. 'hash', 'dbWrite', 'walk') under cProfile,
+    # writing the stats to profilePath
+    profilePhase: str = None
+    profilePath: str = None
@@ -0,0 +1,268 @@
+"""Unattended resolution of the duplicates classified by the last update.
+
+Each Policy decides, in a single INSERT ... SELECT, what to do with every
+duplicate it has an opinion on and which no earlier policy has decided:
+    remove   the duplicate is deleted from disk and from currentFiles
+    keep     the duplicate is archived alongside the file it matched
+    replace  the archived file it matched is deleted from disk instead, and
+             its archive entry follows the duplicate as if it had been moved
+Only the first of several duplicates replacing the same archived file does
+so. Duplicates no policy decides on are left for promptUserDuplicates.
+"""
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence, Set, Tuple
+
+from .main import ExtendedCursorInterface, rootDirectories
+
+REMOVE = 'remove'
+KEEP = 'keep'
+REPLACE = 'replace'
+
+UNLINK_BATCH_SIZE = 1000
+
+resetDuplicateDecisions = """
+    CREATE TEMP TABLE IF NOT EXISTS duplicateDecisions (
+        file_id BIGINT NOT NULL PRIMARY KEY,
+        classification VARCHAR NOT NULL,
+        decision VARCHAR NOT NULL,
+        relative_path VARCHAR NOT NULL,
+        matched_path VARCHAR,
+        root_id INTEGER NOT NULL,
+        matched_root_id INTEGER
+    );
+    TRUNCATE duplicateDecisions;
+"""
+
+# Duplicates replacing an archived file another duplicate with a lower
+# file_id already replaces are left undecided
+rejectConflictingReplacements = """
+    DELETE FROM duplicateDecisions
+    WHERE decision = 'replace'
+    AND EXISTS (
+        SELECT 1 FROM duplicateDecisions other
+        WHERE other.decision = 'replace'
+        AND other.matched_root_id = duplicateDecisions.matched_root_id
+        AND other.matched_path = duplicateDecisions.matched_path
+        AND other.file_id < duplicateDecisions.file_id)
+"""
+
+class Policy(ABC):
+    @abstractmethod
+    def decide(self, cursor: ExtendedCursorInterface):
+        """Inserts the policy's decisions into duplicateDecisions."""
+
+class RemovePreviouslyDeleted(Policy):
+    """Removes every duplicate of a previously deleted file."""
+
+    def decide(self, cursor: ExtendedCursorInterface):
+        cursor.execute("""
+            INSERT INTO duplicateDecisions
+                (file_id, classification, decision, relative_path, matched_path,
+                root_id, matched_root_id)
+            SELECT dup.file_id, dup.classification, 'remove',
+                min(dup.relative_path), min(dup.matched_path),
+                min(dup.root_id), min(dup.matched_root_id)
+            FROM fileClassifications dup
+            WHERE dup.classification = 'duplicatePreviouslyDeleted'
+            GROUP BY dup.file_id, dup.classification
+            ON CONFLICT (file_id) DO NOTHING;
+        """)
+
+@dataclass
+class KeepOldest(Policy):
+    """Removes a duplicate if an archived file it matched is at least as old.
+    A duplicate older than the single archived file it matched replaces it
+    if replace is set, and like one matching several is otherwise left
+    undecided."""
+    replace: bool = False
+
+    def decide(self, cursor: ExtendedCursorInterface):
+        cursor.execute("""
+            INSERT INTO duplicateDecisions
+                (file_id, classification, decision, relative_path, matched_path,
+                root_id, matched_root_id)
+            SELECT dup.file_id, dup.classification,
+                CASE WHEN bool_and(dup.modified < arch.modified) THEN 'replace' ELSE 'remove' END,
+                min(dup.relative_path), min(dup.matched_path),
+                min(dup.root_id), min(dup.matched_root_id)
+            FROM fileClassifications dup
+            INNER JOIN archiveFiles arch
+                ON arch.root_id = dup.matched_root_id AND arch.relative_path = dup.matched_path
+            WHERE dup.classification = 'duplicate'
+            GROUP BY dup.file_id, dup.classification
+            HAVING (%(replace)s AND count(*) = 1) OR NOT bool_and(dup.modified < arch.modified)
+            ON CONFLICT (file_id) DO NOTHING;
+        """, {'replace': self.replace})
+
+@dataclass
+class PreferPrefixes(Policy):
+    """Keeps the copy under one of prefixes: a duplicate outside them which
+    matched an archived file inside is removed, and a duplicate inside them
+    which matched a single archived file outside replaces it."""
+    prefixes: Sequence[str]
+
+    def decide(self, cursor: ExtendedCursorInterface):
+        cursor.execute("""
+            INSERT INTO duplicateDecisions
+                (file_id, classification, decision, relative_path, matched_path,
+                root_id, matched_root_id)
+            SELECT file_id, classification,
+                CASE WHEN dupPreferred THEN 'replace' ELSE 'remove' END,
+                relative_path, matched_path, root_id, matched_root_id
+            FROM (
+                SELECT dup.file_id, dup.classification,
+                    min(dup.relative_path) AS relative_path,
+                    min(dup.matched_path) AS matched_path,
+                    min(dup.root_id) AS root_id,
+                    min(dup.matched_root_id) AS matched_root_id,
+                    count(*) AS matches,
+                    bool_or(EXISTS (SELECT 1 FROM unnest(%(prefixes)s::varchar[]) AS p(prefix)
+                        WHERE starts_with(dup.relative_path, p.prefix))) AS dupPreferred,
+                    bool_or(EXISTS (SELECT 1 FROM unnest(%(prefixes)s::varchar[]) AS p(prefix)
+                        WHERE starts_with(dup.matched_path, p.prefix))) AS matchPreferred
+                FROM fileClassifications dup
+                WHERE dup.classification = 'duplicate'
+                GROUP BY dup.file_id, dup.classification
+            ) dup
+            WHERE (dupPreferred AND NOT matchPreferred AND matches = 1)
+                OR (matchPreferred AND NOT dupPreferred)
+            ON CONFLICT (file_id) DO NOTHING;
+        """, {'prefixes': list(self.prefixes)})
+
+class KeepAll(Policy):
+    """Archives every remaining duplicate alongside the file it matched."""
+
+    def decide(self, cursor: ExtendedCursorInterface):
+        cursor.execute("""
+            INSERT INTO duplicateDecisions
+                (file_id, classification, decision, relative_path, matched_path,
+                root_id, matched_root_id)
+            SELECT dup.file_id, dup.classification, 'keep',
+                min(dup.relative_path), min(dup.matched_path),
+                min(dup.root_id), min(dup.matched_root_id)
+            FROM fileClassifications dup
+            WHERE dup.classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+            GROUP BY dup.file_id, dup.classification
+            ON CONFLICT (file_id) DO NOTHING;
+        """)
+
+POLICIES = {
+    'removePreviouslyDeleted': RemovePreviouslyDeleted,
+    'keepOldest': KeepOldest,
+    'preferPrefixes': PreferPrefixes,
+    'keepAll': KeepAll,
+}
+
+def parsePolicy(spec: str) -> Policy:
+    """Policy from its name, followed for preferPrefixes by a colon and the
+    prefixes separated by '|', e.g. 'preferPrefixes:Photos\\\\Sorted|Documents',
+    and for keepOldest optionally by ':replace' to let older duplicates
+    replace the archived file."""
+    name, _, argument = spec.partition(':')
+    if name not in POLICIES:
+        raise ValueError(f"Unknown duplicate policy {name!r}, expected one of {', '.join(POLICIES)}")
+    if name == 'preferPrefixes':
+        return PreferPrefixes(argument.split('|'))
+    if name == 'keepOldest':
+        if argument not in ('', 'replace'):
+            raise ValueError(f"Unknown keepOldest option {argument!r}, expected 'replace'")
+        return KeepOldest(replace=argument == 'replace')
+    return POLICIES[name]()
+
+@dataclass
+class ResolutionReport:
+    """(file_id, classification, decision, relative_path, matched_path) for
+    each decision, and (path, error message) for each file which couldn't be
+    deleted, whose decision was then not applied."""
+    decisions: List[Tuple[int, str, str, str, str]] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {}
+        for _, _, decision, _, _ in self.decisions:
+            counts[decision] = counts.get(decision, 0) + 1
+        return counts
+
+    def print(self, dryRun: bool = False):
+        print("")
+        print('--- ', "Duplicate decisions" + (" (dry run)" if dryRun else ""), ' ---')
+        for file_id, classification, decision, relative_path, matched_path in self.decisions:
+            print((file_id, decision, relative_path, matched_path))
+        print(self.counts())
+        for path, error in self.errors:
+            print("Could not delete", path, error)
+
+def _unlink(path: Path) -> str:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        return str(e)
+    return None
+
+def unlinkAll(rootPath, paths: List[Tuple[int, str]], workers: int = None) -> Dict[Tuple[int, str], str]:
+    """Deletes the files, given as (root_id, relative_path), in parallel, in
+    batches of UNLINK_BATCH_SIZE, returning the error for each which couldn't
+    be deleted. Files already gone count as deleted. rootPath is the
+    directory of each root by root_id, or that of the default root alone."""
+    roots = rootDirectories(rootPath)
+    errors = {}
+    with ThreadPoolExecutor(workers or min(32, 4 * (os.cpu_count() or 1))) as executor:
+        for start in range(0, len(paths), UNLINK_BATCH_SIZE):
+            batch = paths[start:start + UNLINK_BATCH_SIZE]
+            for path, error in zip(batch, executor.map(
+                    lambda path: _unlink(Path(roots[path[0]], path[1])), batch)):
+                if error is not None: errors[path] = error
+    return errors
+
+def resolveDuplicates(
+    cursor: ExtendedCursorInterface,
+    rootPath,
+    policies: Sequence[Policy],
+    dryRun: bool = False,
+    workers: int = None
+) -> ResolutionReport:
+    """Applies policies in order to the classified duplicates, whose files
+    are under rootPath (see unlinkAll). With dryRun the decisions are only
+    reported."""
+    cursor.execute(resetDuplicateDecisions)
+    for policy in policies:
+        policy.decide(cursor)
+    cursor.execute(rejectConflictingReplacements)
+    report = ResolutionReport(cursor.getResult(
+        "SELECT file_id, classification, decision, relative_path, matched_path "
+        "FROM duplicateDecisions ORDER BY file_id"))
+    if dryRun: return report
+
+    rootIds = {file_id: (root_id, matched_root_id) for file_id, root_id, matched_root_id
+               in cursor.getResult("SELECT file_id, root_id, matched_root_id FROM duplicateDecisions")}
+    toUnlink = {}
+    for file_id, _, decision, relative_path, matched_path in report.decisions:
+        root_id, matched_root_id = rootIds[file_id]
+        if decision == REMOVE: toUnlink[root_id, relative_path] = file_id
+        if decision == REPLACE: toUnlink[matched_root_id, matched_path] = file_id
+    errors = unlinkAll(rootPath, list(toUnlink), workers)
+    report.errors = [(relative_path, error) for (_, relative_path), error in errors.items()]
+
+    failed: Set[int] = {toUnlink[path] for path in errors}
+    ids: Dict[Tuple[str, str], List[int]] = {}
+    for file_id, classification, decision, _, _ in report.decisions:
+        if file_id not in failed:
+            ids.setdefault((classification, decision), []).append(file_id)
+    for (classification, decision), file_ids in ids.items():
+        procedure = {
+            ('duplicate', REMOVE): "removeDuplicates",
+            ('duplicatePreviouslyDeleted', REMOVE): "removeDuplicates",
+            ('duplicate', KEEP): "keepDuplicates",
+            ('duplicatePreviouslyDeleted', KEEP): "keepDuplicatesDeleted",
+            ('duplicate', REPLACE): "replaceDuplicates",
+        }[classification, decision]
+        cursor.execute(f"CALL {procedure}(%s::bigint[])", (file_ids,))
+    return report
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple
+
+KEEP = 'keep'
+REMOVE = 'remove'
+
+@dataclass
+class ReviewFile:
+    relative_path: str
+    matched_paths: List[str] = field(default_factory=list)
+
+class DuplicateReview:
+    """A snapshot of the duplicates to review, shown a page of hashes at a
+    time. Decisions are made against the snapshot and passed on to keepFiles
+    and removeFiles in batches of flushSize file ids, so each command takes
+    the same time however many duplicates there are.
+
+    rows are (file_id, relative_path, matched_path, file_hash), with one row
+    per path a file was matched against."""
+
+    def __init__(
+        self,
+        rows: Iterable[Tuple[int, str, str, str]],
+        keepFiles: Callable[[List[int]], None],
+        removeFiles: Callable[[List[int]], None],
+        pageSize: int = 20,
+        flushSize: int = 500
+    ):
+        self.files: Dict[int, ReviewFile] = {}
+        groups: Dict[str, List[int]] = {}
+        for file_id, relative_path, matched_path, file_hash in rows:
+            if file_id not in self.files:
+                self.files[file_id] = ReviewFile(relative_path)
+                groups.setdefault(file_hash, []).append(file_id)
+            self.files[file_id].matched_paths.append(matched_path)
+        self.groups: List[Tuple[str, List[int]]] = list(groups.items())
+        self.keepFiles = keepFiles
+        self.removeFiles = removeFiles
+        self.pageSize = pageSize
+        self.flushSize = flushSize
+        self.page = 0
+        self.decisions: Dict[int, str] = {}
+        self.pending: Dict[str, List[int]] = {KEEP: [], REMOVE: []}
+
+    @property
+    def pageCount(self) -> int:
+        return max(1, -(-len(self.groups) // self.pageSize))
+
+    @property
+    def undecided(self) -> int:
+        return len(self.files) - len(self.decisions)
+
+    def turnPage(self, step: int):
+        self.page = min(max(self.page + step, 0), self.pageCount - 1)
+
+    def decide(self, file_id: int, decision: str) -> bool:
+        """Records a decision for a file, returning False if it isn't one
+        under review or has already been decided."""
+        if file_id not in self.files or file_id in self.decisions: return False
+        self.decisions[file_id] = decision
+        self.pending[decision].append(file_id)
+        if len(self.pending[decision]) >= self.flushSize: self.flush()
+        return True
+
+    def decideAll(self, decision: str):
+        """Marks every undecided file as decided, for when the decision has
+        been applied to them all at once."""
+        for file_id in self.files:
+            self.decisions.setdefault(file_id, decision)
+
+    def flush(self):
+        keep, remove = self.pending[KEEP], self.pending[REMOVE]
+        self.pending = {KEEP: [], REMOVE: []}
+        if keep: self.keepFiles(keep)
+        if remove: self.removeFiles(remove)
+
+    def printPage(self):
+        start = self.page * self.pageSize
+        print("")
+        print('--- ', f"Duplicates page {self.page + 1} of {self.pageCount}, "
+              f"{self.undecided} of {len(self.files)} files undecided", ' ---')
+        for file_hash, file_ids in self.groups[start:start + self.pageSize]:
+            print(file_hash)
+            for file_id in file_ids:
+                file = self.files[file_id]
+                decision = self.decisions.get(file_id)
+                print(f"  {file_id}", file.relative_path,
+                      f"[{decision}]" if decision else "", "matches", ", ".join(file.matched_paths))
@@ -21,6 +21,7 @@ typedef struct { const char *p; ptrdiff_t n; } _GoString_;
 
 #line 3 "export.go"
 
+#include <stdint.h>
 #include <stdlib.h>
 
 #line 1 "cgo-generated-wrapper"
@@ -73,10 +74,16 @@ typedef struct { void *data; GoInt len; GoInt cap; } GoSlice;
 extern "C" {
 #endif
 
-extern __declspec(dllexport) char** c_hash_list(char** path_list, GoInt length);
-extern __declspec(dllexport) void free_string_array(char** p);
-extern __declspec(dllexport) char* c_hash_file(char* path);
-extern __declspec(dllexport) void free_string(char* p);
+extern __declspec(dllexport) void c_hash_packed(char* paths, GoInt paths_length, GoInt count, GoInt workers, GoInt buffer_size, GoInt order, GoInt bytes_per_second, GoInt iops, unsigned char* digests, int* statuses);
+extern __declspec(dllexport) int c_hash_file(char* path, unsigned char* digest);
+extern __declspec(dllexport) uintptr_t c_throttle_open(GoInt bytes_per_second, GoInt iops);
+extern __declspec(dllexport) void c_throttle_take(uintptr_t throttle, GoInt n);
+extern __declspec(dllexport) void c_throttle_free(uintptr_t throttle);
+extern __declspec(dllexport) uintptr_t c_session_open(GoInt workers, GoInt buffer_size, GoInt order, uintptr_t throttle);
+extern __declspec(dllexport) void c_session_submit(uintptr_t session, char* paths, GoInt paths_length, GoInt first_index);
+extern __declspec(dllexport) void c_session_close_input(uintptr_t session);
+extern __declspec(dllexport) GoInt c_session_results(uintptr_t session, GoInt max_results, long long int* indices, unsigned char* digests, int* statuses);
+extern __declspec(dllexport) void c_session_free(uintptr_t session);
 
 #ifdef __cplusplus
 }
@@ -1,9 +1,13 @@
 package c_arrstr
 
-import "unsafe"
+import (
+	"strings"
+	"unsafe"
+)
 import "C"
 
 type PP_char **C.char
+type P_char *C.char
 
 func From_go_to_c(original []string) unsafe.Pointer {
 	cArray := C.malloc(C.size_t(len(original)) * C.size_t(unsafe.Sizeof(uintptr(0))))
@@ -25,3 +29,21 @@ func From_c_to_go(arr_str PP_char, length int) []string {
 	}
 	return slice
 }
+
+// To_packed_c packs original into one malloc'd buffer of NUL-terminated
+// strings, returning the buffer and its length in bytes.
+func To_packed_c(original []string) (P_char, int) {
+	packed := strings.Join(original, "\x00") + "\x00"
+	return P_char(C.CBytes([]byte(packed))), len(packed)
+}
+
+// From_packed_c_to_go splits the length bytes at packed into the
+// NUL-terminated strings they hold. The buffer is copied into Go memory once
+// as a whole; the strings returned are slices of that copy.
+func From_packed_c_to_go(packed P_char, length int) []string {
+	if length == 0 {
+		return nil
+	}
+	buffer := C.GoStringN(packed, C.int(length))
+	return strings.Split(strings.TrimSuffix(buffer, "\x00"), "\x00")
+}
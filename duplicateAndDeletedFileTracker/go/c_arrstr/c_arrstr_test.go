@@ -38,3 +38,22 @@ func _compare_FuzzArrStr(goArray []string, testArr []string, t *testing.T) {
 		}
 	}
 }
+
+func FuzzPackedArrStr(f *testing.F) {
+	f.Add("a", "b4i4i", "C:\\path\\file.txt")
+	f.Add("", "", "")
+
+	f.Fuzz(func(t *testing.T, a string, b string, c string) {
+		testArr := []string{a, b, c}
+		for _, s := range testArr {
+			// NUL separates the packed strings, so cannot appear within them
+			if strings.Contains(s, "\x00") {
+				return
+			}
+		}
+		packed, length := c_arrstr.To_packed_c(testArr)
+		goArray := c_arrstr.From_packed_c_to_go(packed, length)
+
+		_compare_FuzzArrStr(goArray, testArr, t)
+	})
+}
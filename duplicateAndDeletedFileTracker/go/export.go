@@ -1,43 +1,164 @@
 package main
 
 /*
+#include <stdint.h>
 #include <stdlib.h>
 */
 import "C"
 import (
+	"crypto/sha256"
+	"runtime/cgo"
 	"unsafe"
 
 	"marek/duplicateAndDeletedFileTracker/duplicateAndDeletedFileTracker/go/c_arrstr"
 	"marek/duplicateAndDeletedFileTracker/duplicateAndDeletedFileTracker/go/hash"
 )
 
-//export c_hash_list
-func c_hash_list(path_list **C.char, length int) **C.char {
-	// In order to pass path_list to the package c_arrstr,
-	// we need to convert it to use the **C.char type from the package c_arrstr
-	// which is exported under the name PP_char.
-	retyped_path_list := c_arrstr.PP_char(unsafe.Pointer(path_list))
+// Paths are passed in as a single buffer of paths_length bytes holding
+// NUL-terminated paths. Results are written into buffers owned by the caller:
+// sha256.Size bytes per file into digests and a hash.Status* code per file
+// into statuses. Nothing allocated here needs to be freed by the caller,
+// apart from session handles.
 
-	slice := c_arrstr.From_c_to_go(retyped_path_list, length)
-	hashes := hash.Hash_list(slice)
-	cArray := c_arrstr.From_go_to_c(hashes)
-	return (**C.char)(cArray)
+func unpack_paths(paths *C.char, paths_length int) []string {
+	return c_arrstr.From_packed_c_to_go(c_arrstr.P_char(unsafe.Pointer(paths)), paths_length)
 }
 
-//export free_string_array
-func free_string_array(p **C.char) {
-	C.free(unsafe.Pointer(p))
+func write_result(result hash.Result, slot int, digests *C.uchar, statuses *C.int, count int) {
+	digest_slice := unsafe.Slice((*byte)(unsafe.Pointer(digests)), count*sha256.Size)
+	status_slice := unsafe.Slice(statuses, count)
+	copy(digest_slice[slot*sha256.Size:], result.Digest[:])
+	status_slice[slot] = C.int(hash.Status(result.Err))
 }
 
+// c_hash_packed hashes count paths with at most workers files open at once,
+// each read through a buffer of buffer_size bytes. Zero selects the defaults
+// of hash.NewSession. Files are read in the hash.Order order, at most
+// bytes_per_second bytes and iops reads a second, 0 for no limit.
+//
+//export c_hash_packed
+func c_hash_packed(paths *C.char, paths_length int, count int, workers int, buffer_size int, order int, bytes_per_second int, iops int, digests *C.uchar, statuses *C.int) {
+	path_slice := unpack_paths(paths, paths_length)
+	if workers <= 0 || workers > count {
+		workers = count
+	}
+	session := hash.NewScheduledSession(
+		workers, buffer_size, hash.Order(order), hash.NewThrottle(bytes_per_second, iops))
+	session.Submit(0, path_slice[:count])
+	session.CloseInput()
+	for result := range session.Results() {
+		write_result(result, result.Index, digests, statuses, count)
+	}
+}
+
+// c_hash_file writes the digest of the file at path into digest, returning
+// its hash.Status* code.
+//
 //export c_hash_file
-func c_hash_file(path *C.char) *C.char {
-	hash, _ := hash.Hash_file(C.GoString(path))
-	return C.CString(hash)
+func c_hash_file(path *C.char, digest *C.uchar) C.int {
+	result, err := hash.Hash_file(C.GoString(path))
+	copy(unsafe.Slice((*byte)(unsafe.Pointer(digest)), sha256.Size), result[:])
+	return C.int(hash.Status(err))
+}
+
+// c_throttle_open returns a handle to a hash.Throttle limiting reads to
+// bytes_per_second bytes and iops reads a second, to be shared by the
+// sessions opened with it and charged for reads made outside the library
+// with c_throttle_take. It is 0, which never waits, when neither limit is
+// set, and must otherwise be released with c_throttle_free.
+//
+//export c_throttle_open
+func c_throttle_open(bytes_per_second int, iops int) C.uintptr_t {
+	throttle := hash.NewThrottle(bytes_per_second, iops)
+	if throttle == nil {
+		return 0
+	}
+	return C.uintptr_t(cgo.NewHandle(throttle))
+}
+
+func throttle_from_handle(throttle C.uintptr_t) *hash.Throttle {
+	if throttle == 0 {
+		return nil
+	}
+	return cgo.Handle(throttle).Value().(*hash.Throttle)
+}
+
+// c_throttle_take charges a read of n bytes to throttle, sleeping as long as
+// it takes to pay for.
+//
+//export c_throttle_take
+func c_throttle_take(throttle C.uintptr_t, n int) {
+	throttle_from_handle(throttle).Take(n)
+}
+
+// c_throttle_free releases a handle from c_throttle_open. Sessions opened
+// with it keep using the throttle.
+//
+//export c_throttle_free
+func c_throttle_free(throttle C.uintptr_t) {
+	if throttle != 0 {
+		cgo.Handle(throttle).Delete()
+	}
+}
+
+// c_session_open starts a hash.Session, reading as for c_hash_packed and
+// charging its reads to the throttle from c_throttle_open, and returns a
+// handle to it, which must be released with c_session_free.
+//
+//export c_session_open
+func c_session_open(workers int, buffer_size int, order int, throttle C.uintptr_t) C.uintptr_t {
+	session := hash.NewScheduledSession(
+		workers, buffer_size, hash.Order(order), throttle_from_handle(throttle))
+	return C.uintptr_t(cgo.NewHandle(session))
+}
+
+func session_from_handle(session C.uintptr_t) *hash.Session {
+	return cgo.Handle(session).Value().(*hash.Session)
+}
+
+//export c_session_submit
+func c_session_submit(session C.uintptr_t, paths *C.char, paths_length int, first_index int) {
+	session_from_handle(session).Submit(first_index, unpack_paths(paths, paths_length))
+}
+
+//export c_session_close_input
+func c_session_close_input(session C.uintptr_t) {
+	session_from_handle(session).CloseInput()
+}
+
+// c_session_results blocks until at least one result is ready, then writes up
+// to max_results of them into indices, digests and statuses. Returns the
+// number written, or 0 once input is closed and every result has been
+// delivered.
+//
+//export c_session_results
+func c_session_results(session C.uintptr_t, max_results int, indices *C.longlong, digests *C.uchar, statuses *C.int) int {
+	results := session_from_handle(session).Results()
+	index_slice := unsafe.Slice(indices, max_results)
+
+	result, ok := <-results
+	count := 0
+	for ok {
+		index_slice[count] = C.longlong(result.Index)
+		write_result(result, count, digests, statuses, max_results)
+		count++
+		if count == max_results {
+			break
+		}
+		select {
+		case result, ok = <-results:
+		default:
+			ok = false
+		}
+	}
+	return count
 }
 
-//export free_string
-func free_string(p *C.char) {
-	C.free(unsafe.Pointer(p))
+//export c_session_free
+func c_session_free(session C.uintptr_t) {
+	handle := cgo.Handle(session)
+	handle.Value().(*hash.Session).Discard()
+	handle.Delete()
 }
 
 func main() {}
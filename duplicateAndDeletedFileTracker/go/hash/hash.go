@@ -2,45 +2,100 @@ package hash
 
 import (
 	"crypto/sha256"
-	"fmt"
+	"errors"
 	"io"
+	"io/fs"
 	"os"
-
-	"golang.org/x/sync/errgroup"
+	"runtime"
 )
 
-func Hash_file(filePath string) (string, error) {
+// Read buffer size used when none is given.
+const DefaultBufferSize = 256 * 1024
+
+// Hash_file returns the raw SHA-256 digest of the file at filePath.
+func Hash_file(filePath string) ([sha256.Size]byte, error) {
+	return Hash_file_buffered(filePath, make([]byte, DefaultBufferSize))
+}
+
+// Hash_file_buffered returns the raw SHA-256 digest of the file at filePath,
+// reading it through buffer.
+func Hash_file_buffered(filePath string, buffer []byte) ([sha256.Size]byte, error) {
+	return hashFileThrottled(filePath, buffer, nil)
+}
+
+// hashFileThrottled is Hash_file_buffered charging each read to throttle.
+func hashFileThrottled(filePath string, buffer []byte, throttle *Throttle) ([sha256.Size]byte, error) {
+	var digest [sha256.Size]byte
 	file, err := os.Open(filePath)
 	if err != nil {
-		return "", err
+		return digest, err
 	}
 	defer file.Close()
 
 	sha256 := sha256.New()
-	if _, err := io.Copy(sha256, file); err != nil {
-		return "", err
+	for {
+		n, err := file.Read(buffer)
+		if n > 0 {
+			throttle.Take(n)
+		}
+		sha256.Write(buffer[:n])
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			return digest, err
+		}
 	}
 
-	return fmt.Sprintf("%x", sha256.Sum(nil)), nil
+	sha256.Sum(digest[:0])
+	return digest, nil
 }
 
-func Hash_list(filePaths []string) []string {
+// Status codes reported for each file across the C interface. Errors from
+// the operating system are reported as StatusErrno plus their errno, so the
+// caller can word them as the operating system does. The other codes cover
+// errors which carry no errno.
+const (
+	StatusOK               = 0
+	StatusNotFound         = 1
+	StatusPermissionDenied = 2
+	StatusReadError        = 3
+	StatusErrno            = 1000
+)
+
+func Status(err error) int {
+	if errno, ok := errnoOf(err); ok {
+		return StatusErrno + errno
+	}
+	switch {
+	case err == nil:
+		return StatusOK
+	case errors.Is(err, fs.ErrNotExist):
+		return StatusNotFound
+	case errors.Is(err, fs.ErrPermission):
+		return StatusPermissionDenied
+	default:
+		return StatusReadError
+	}
+}
+
+// Hash_list hashes filePaths using a pool of workers goroutines, each reading
+// through its own buffer of bufferSize bytes. Values <= 0 select
+// runtime.NumCPU() workers and DefaultBufferSize respectively.
+func Hash_list(filePaths []string, workers int, bufferSize int) []string {
+	if workers <= 0 {
+		workers = runtime.NumCPU()
+	}
+	if workers > len(filePaths) {
+		workers = len(filePaths)
+	}
+
 	hashes := make([]string, len(filePaths))
-	var g errgroup.Group
-	for i, filePath := range filePaths {
-		i, filePath := i, filePath
-		hashes[i] = "Error: Not populated"
-		g.Go(func() error {
-			hash, err := Hash_file(filePath)
-			if err != nil {
-				hashes[i] = "Error: " + err.Error() + " Path: " + filePath
-			}
-			if err == nil {
-				hashes[i] = hash
-			}
-			return nil
-		})
+	session := NewSession(workers, bufferSize)
+	session.Submit(0, filePaths)
+	session.CloseInput()
+	for result := range session.Results() {
+		hashes[result.Index] = result.String()
 	}
-	g.Wait()
 	return hashes
 }
@@ -0,0 +1,115 @@
+package hash_test
+
+import (
+	"fmt"
+	"os"
+	"path/filepath"
+	"strings"
+	"testing"
+	"time"
+
+	"marek/duplicateAndDeletedFileTracker/duplicateAndDeletedFileTracker/go/hash"
+)
+
+// To benchmark, run `go test -bench=. -benchtime=3x` in this file's directory.
+// Drop the page cache between runs to measure cold reads from disk.
+
+func writeFiles(t testing.TB, count int, size int) []string {
+	dir := t.TempDir()
+	paths := make([]string, count)
+	for i := range paths {
+		contents := []byte(strings.Repeat(fmt.Sprint(i%10), size))
+		paths[i] = filepath.Join(dir, fmt.Sprintf("file%d", i))
+		if err := os.WriteFile(paths[i], contents, 0o644); err != nil {
+			t.Fatal(err)
+		}
+	}
+	return paths
+}
+
+func TestHash_list(t *testing.T) {
+	paths := writeFiles(t, 3, 5)
+	paths = append(paths, filepath.Join(t.TempDir(), "missing"))
+
+	hashes := hash.Hash_list(paths, 2, 2)
+
+	// sha256 of "00000"
+	expected := "e7042ac7d09c7bc41c8cfa5749e41858f6980643bc0db1a83cc793d3e24d3f77"
+	if hashes[0] != expected {
+		t.Errorf("Expected hash %s, got %s", expected, hashes[0])
+	}
+	single, err := hash.Hash_file(paths[0])
+	if err != nil || fmt.Sprintf("%x", single) != expected {
+		t.Errorf("Expected Hash_file to give %s, got %x (%v)", expected, single, err)
+	}
+	if hashes[0] == hashes[1] {
+		t.Errorf("Expected different hashes for different contents")
+	}
+	if !strings.HasPrefix(hashes[3], "Error: ") {
+		t.Errorf("Expected an error for a missing file, got %s", hashes[3])
+	}
+}
+
+func BenchmarkHash_list(b *testing.B) {
+	const count, size = 256, 1 << 20
+	paths := writeFiles(b, count, size)
+	for _, workers := range []int{1, 2, 4, 8, 16, 64} {
+		b.Run(fmt.Sprintf("workers=%d", workers), func(b *testing.B) {
+			b.SetBytes(count * size)
+			for i := 0; i < b.N; i++ {
+				hash.Hash_list(paths, workers, 0)
+			}
+		})
+	}
+}
+
+func TestSession(t *testing.T) {
+	paths := writeFiles(t, 10, 5)
+	expected := hash.Hash_list(paths, 0, 0)
+
+	session := hash.NewSession(3, 0)
+	session.Submit(0, paths[:4])
+	session.Submit(4, paths[4:])
+	session.CloseInput()
+
+	seen := 0
+	for result := range session.Results() {
+		if result.String() != expected[result.Index] {
+			t.Errorf("Expected %s at index %d, got %s", expected[result.Index], result.Index, result.String())
+		}
+		seen++
+	}
+	if seen != len(paths) {
+		t.Errorf("Expected %d results, got %d", len(paths), seen)
+	}
+}
+
+func TestScheduledSession(t *testing.T) {
+	paths := writeFiles(t, 20, 5)
+	paths = append(paths, filepath.Join(t.TempDir(), "missing"))
+	expected := hash.Hash_list(paths, 0, 0)
+
+	for _, order := range []hash.Order{hash.OrderInode, hash.OrderExtent} {
+		session := hash.NewScheduledSession(2, 0, order, nil)
+		session.Submit(0, paths)
+		session.CloseInput()
+		for result := range session.Results() {
+			if result.String() != expected[result.Index] {
+				t.Errorf("Order %d: expected %s at index %d, got %s",
+					order, expected[result.Index], result.Index, result.String())
+			}
+		}
+	}
+}
+
+func TestThrottle(t *testing.T) {
+	throttle := hash.NewThrottle(100000, 0)
+	start := time.Now()
+	throttle.Take(50000)
+	if elapsed := time.Since(start); elapsed < 400*time.Millisecond || elapsed > 2*time.Second {
+		t.Errorf("Expected to wait about 0.5s for 50000 bytes at 100000 B/s, waited %v", elapsed)
+	}
+	if hash.NewThrottle(0, 0) != nil {
+		t.Errorf("Expected no throttle without limits")
+	}
+}
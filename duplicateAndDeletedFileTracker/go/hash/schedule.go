@@ -0,0 +1,61 @@
+package hash
+
+import "sort"
+
+// Order is the order a batch of submitted files is read in. The values are
+// shared with ioSchedule.ORDERS on the Python side.
+type Order int
+
+const (
+	// OrderNone reads files in the order they were submitted.
+	OrderNone Order = 0
+	// OrderInode reads files by device and inode number, which filesystems
+	// mostly allocate in step with where they place data.
+	OrderInode Order = 1
+	// OrderExtent reads files by the physical offset of their first extent
+	// where the filesystem reports it (FIEMAP), and by inode otherwise.
+	OrderExtent Order = 2
+)
+
+// Rank of a file's location on its device: files with a known physical
+// offset are read first, then those only known by inode. Files which can't
+// be stat'd are read after all the others.
+const (
+	rankExtent = iota
+	rankInode
+	rankUnknown
+)
+
+type diskLocation struct {
+	device   uint64
+	rank     int
+	position uint64
+}
+
+func (a diskLocation) less(b diskLocation) bool {
+	if (a.rank == rankUnknown) != (b.rank == rankUnknown) {
+		return b.rank == rankUnknown
+	}
+	if a.device != b.device {
+		return a.device < b.device
+	}
+	if a.rank != b.rank {
+		return a.rank < b.rank
+	}
+	return a.position < b.position
+}
+
+// scheduleJobs sorts jobs into the order they should be read in, keeping
+// the submitted order between files at the same location.
+func scheduleJobs(jobs []job, order Order) {
+	if order == OrderNone || len(jobs) < 2 {
+		return
+	}
+	locations := make(map[int]diskLocation, len(jobs))
+	for _, j := range jobs {
+		locations[j.index] = locate(j.path, order)
+	}
+	sort.SliceStable(jobs, func(a, b int) bool {
+		return locations[jobs[a].index].less(locations[jobs[b].index])
+	})
+}
@@ -0,0 +1,58 @@
+package hash
+
+import (
+	"os"
+	"syscall"
+	"unsafe"
+)
+
+// FS_IOC_FIEMAP, _IOWR('f', 11, struct fiemap)
+const fsIocFiemap = 0xC020660B
+
+// struct fiemap followed by the single struct fiemap_extent asked for.
+type fiemap struct {
+	start         uint64
+	length        uint64
+	flags         uint32
+	mappedExtents uint32
+	extentCount   uint32
+	reserved      uint32
+	// struct fiemap_extent
+	logical    uint64
+	physical   uint64
+	extentLen  uint64
+	reserved64 [2]uint64
+	extentFlag uint32
+	reserved32 [3]uint32
+}
+
+func locate(path string, order Order) diskLocation {
+	var stat syscall.Stat_t
+	if syscall.Stat(path, &stat) != nil {
+		return diskLocation{rank: rankUnknown}
+	}
+	location := diskLocation{uint64(stat.Dev), rankInode, stat.Ino}
+	if order == OrderExtent {
+		if physical, ok := firstExtent(path); ok {
+			location.rank, location.position = rankExtent, physical
+		}
+	}
+	return location
+}
+
+// firstExtent returns the physical offset of the first extent of the file
+// at path, if its filesystem supports FIEMAP and it has any data.
+func firstExtent(path string) (uint64, bool) {
+	file, err := os.Open(path)
+	if err != nil {
+		return 0, false
+	}
+	defer file.Close()
+	request := fiemap{length: ^uint64(0), extentCount: 1}
+	_, _, errno := syscall.Syscall(
+		syscall.SYS_IOCTL, file.Fd(), fsIocFiemap, uintptr(unsafe.Pointer(&request)))
+	if errno != 0 || request.mappedExtents == 0 {
+		return 0, false
+	}
+	return request.physical, true
+}
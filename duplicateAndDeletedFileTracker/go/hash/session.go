@@ -0,0 +1,167 @@
+package hash
+
+import (
+	"crypto/sha256"
+	"fmt"
+	"runtime"
+	"sync"
+)
+
+// Number of finished results held before workers wait for them to be read.
+const resultBufferSize = 4096
+
+type Result struct {
+	Index  int
+	Digest [sha256.Size]byte
+	Err    error
+}
+
+// String gives the hex digest, or the error message starting with "Error: ".
+func (r Result) String() string {
+	if r.Err != nil {
+		return "Error: " + r.Err.Error()
+	}
+	return fmt.Sprintf("%x", r.Digest)
+}
+
+type job struct {
+	index int
+	path  string
+}
+
+// Session is a long lived pool of hashing workers. Paths can be submitted in
+// any number of batches while earlier ones are being hashed, and results are
+// delivered in completion order as soon as each file is done. Each batch is
+// read in the session's Order.
+type Session struct {
+	mu      sync.Mutex
+	ready   *sync.Cond
+	pending []job
+	closed  bool
+	results chan Result
+	order   Order
+}
+
+// NewSession starts workers goroutines, each reading through its own buffer
+// of bufferSize bytes. Values <= 0 select runtime.NumCPU() workers and
+// DefaultBufferSize respectively.
+func NewSession(workers int, bufferSize int) *Session {
+	return NewScheduledSession(workers, bufferSize, OrderNone, nil)
+}
+
+// NewScheduledSession is NewSession reading each batch in order, with every
+// read charged to throttle, which may be nil.
+func NewScheduledSession(workers int, bufferSize int, order Order, throttle *Throttle) *Session {
+	if workers <= 0 {
+		workers = runtime.NumCPU()
+	}
+	if bufferSize <= 0 {
+		bufferSize = DefaultBufferSize
+	}
+
+	s := &Session{results: make(chan Result, resultBufferSize), order: order}
+	s.ready = sync.NewCond(&s.mu)
+	jobs := make(chan job)
+	go s.feed(jobs)
+
+	var wg sync.WaitGroup
+	for w := 0; w < workers; w++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			buffer := make([]byte, bufferSize)
+			for j := range jobs {
+				digest, err := hashFileThrottled(j.path, buffer, throttle)
+				if err != nil {
+					err = pathError{err, j.path}
+				}
+				s.results <- Result{j.index, digest, err}
+			}
+		}()
+	}
+	go func() {
+		wg.Wait()
+		close(s.results)
+	}()
+	return s
+}
+
+type pathError struct {
+	err  error
+	path string
+}
+
+func (e pathError) Error() string {
+	return e.err.Error() + " Path: " + e.path
+}
+
+func (e pathError) Unwrap() error {
+	return e.err
+}
+
+// feed hands queued paths to the workers, so that Submit never blocks on
+// workers which are themselves waiting for their results to be read.
+func (s *Session) feed(jobs chan<- job) {
+	for {
+		s.mu.Lock()
+		for len(s.pending) == 0 && !s.closed {
+			s.ready.Wait()
+		}
+		batch := s.pending
+		s.pending = nil
+		s.mu.Unlock()
+
+		if len(batch) == 0 {
+			close(jobs)
+			return
+		}
+		for _, j := range batch {
+			jobs <- j
+		}
+	}
+}
+
+// Submit queues paths for hashing. Their results are numbered from firstIndex
+// in the order given, whatever order they are read in.
+func (s *Session) Submit(firstIndex int, paths []string) {
+	batch := make([]job, len(paths))
+	for i, path := range paths {
+		batch[i] = job{firstIndex + i, path}
+	}
+	scheduleJobs(batch, s.order)
+
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	if s.closed {
+		panic("hash: Submit called after CloseInput")
+	}
+	s.pending = append(s.pending, batch...)
+	s.ready.Signal()
+}
+
+// CloseInput marks that no more paths will be submitted. Results is closed
+// once every submitted path has been hashed.
+func (s *Session) CloseInput() {
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	s.closed = true
+	s.ready.Signal()
+}
+
+func (s *Session) Results() <-chan Result {
+	return s.results
+}
+
+// Discard abandons the session, letting its workers finish without the
+// remaining results being read.
+func (s *Session) Discard() {
+	s.mu.Lock()
+	s.pending = nil
+	s.closed = true
+	s.ready.Signal()
+	s.mu.Unlock()
+	go func() {
+		for range s.results {
+		}
+	}()
+}
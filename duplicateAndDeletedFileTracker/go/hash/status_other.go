@@ -0,0 +1,9 @@
+//go:build !unix
+
+package hash
+
+// errnoOf reports no errno where system errors aren't errnos the caller
+// could word, leaving them to the other status codes.
+func errnoOf(err error) (int, bool) {
+	return 0, false
+}
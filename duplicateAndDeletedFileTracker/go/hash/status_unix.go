@@ -0,0 +1,17 @@
+//go:build unix
+
+package hash
+
+import (
+	"errors"
+	"syscall"
+)
+
+// errnoOf returns the errno err wraps, if it wraps one.
+func errnoOf(err error) (int, bool) {
+	var errno syscall.Errno
+	if errors.As(err, &errno) && errno != 0 {
+		return int(errno), true
+	}
+	return 0, false
+}
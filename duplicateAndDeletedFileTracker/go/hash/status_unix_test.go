@@ -0,0 +1,44 @@
+//go:build unix
+
+package hash_test
+
+import (
+	"errors"
+	"io/fs"
+	"os"
+	"strings"
+	"syscall"
+	"testing"
+
+	"marek/duplicateAndDeletedFileTracker/duplicateAndDeletedFileTracker/go/hash"
+)
+
+func TestStatus(t *testing.T) {
+	cases := []struct {
+		err      error
+		expected int
+	}{
+		{nil, hash.StatusOK},
+		{&fs.PathError{Op: "open", Path: "file", Err: syscall.ENOENT}, hash.StatusErrno + int(syscall.ENOENT)},
+		{&fs.PathError{Op: "open", Path: "file", Err: syscall.EACCES}, hash.StatusErrno + int(syscall.EACCES)},
+		{&fs.PathError{Op: "read", Path: "file", Err: syscall.EIO}, hash.StatusErrno + int(syscall.EIO)},
+		{fs.ErrPermission, hash.StatusPermissionDenied},
+		{errors.New("short read"), hash.StatusReadError},
+	}
+	for _, c := range cases {
+		if status := hash.Status(c.err); status != c.expected {
+			t.Errorf("Expected status %d for %v, got %d", c.expected, c.err, status)
+		}
+	}
+}
+
+func TestStatusOfDirectory(t *testing.T) {
+	_, err := hash.Hash_file(t.TempDir())
+	if status := hash.Status(err); status != hash.StatusErrno+int(syscall.EISDIR) {
+		t.Errorf("Expected EISDIR status for a directory, got %d (%v)", status, err)
+	}
+	hashes := hash.Hash_list([]string{os.TempDir()}, 1, 0)
+	if !strings.HasPrefix(hashes[0], "Error: ") {
+		t.Errorf("Expected an error hashing a directory, got %s", hashes[0])
+	}
+}
@@ -0,0 +1,57 @@
+package hash
+
+import (
+	"math"
+	"sync"
+	"time"
+)
+
+// Throttle limits the reads of every worker sharing it to bytesPerSecond
+// bytes and iops reads a second, 0 leaving either unlimited. Reads are
+// charged once made, and the reader then waits until the average is back
+// within the limits. Up to a second's worth left unused during a pause can
+// be read in a burst afterwards.
+type Throttle struct {
+	mu             sync.Mutex
+	bytesPerSecond float64
+	iops           float64
+	bytes          float64
+	ops            float64
+	last           time.Time
+}
+
+// NewThrottle returns nil, which never waits, when neither limit is set.
+func NewThrottle(bytesPerSecond int, iops int) *Throttle {
+	if bytesPerSecond <= 0 && iops <= 0 {
+		return nil
+	}
+	return &Throttle{
+		bytesPerSecond: math.Max(float64(bytesPerSecond), 0),
+		iops:           math.Max(float64(iops), 0),
+		last:           time.Now(),
+	}
+}
+
+// Take charges a read of n bytes, sleeping as long as it takes to pay for.
+func (t *Throttle) Take(n int) {
+	if t == nil {
+		return
+	}
+	t.mu.Lock()
+	now := time.Now()
+	elapsed := now.Sub(t.last).Seconds()
+	t.last = now
+	wait := 0.0
+	if t.bytesPerSecond > 0 {
+		t.bytes = math.Min(t.bytes+elapsed*t.bytesPerSecond, t.bytesPerSecond) - float64(n)
+		wait = math.Max(wait, -t.bytes/t.bytesPerSecond)
+	}
+	if t.iops > 0 {
+		t.ops = math.Min(t.ops+elapsed*t.iops, t.iops) - 1
+		wait = math.Max(wait, -t.ops/t.iops)
+	}
+	t.mu.Unlock()
+	if wait > 0 {
+		time.Sleep(time.Duration(wait * float64(time.Second)))
+	}
+}
@@ -1,51 +1,211 @@
+from __future__ import annotations
+
 import ctypes
-from typing import List, Type
+import os
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .ioSchedule import ORDERS
+
+DIGEST_SIZE = 32
+
+# Per file status codes written by the Go library, see hash.Status
+HASH_OK = 0
+# Statuses from HASH_ERRNO up carry the errno the read failed with
+HASH_ERRNO = 1000
+_statusMessages = {
+    1: "file not found",
+    2: "permission denied",
+    3: "read failed",
+}
+
+_hashLibraryPath = Path(__file__).parent / 'go' / '_hash.so'
+_hashLibrary = None
+
+def loadHashLibrary() -> ctypes.CDLL:
+    """Loads _hash.so from beside this module, once per process."""
+    global _hashLibrary
+    if _hashLibrary is None:
+        lib = ctypes.cdll.LoadLibrary(str(_hashLibraryPath))
+        _declare_signatures(lib)
+        _hashLibrary = lib
+    return _hashLibrary
+
+def _declare_signatures(lib: ctypes.CDLL):
+    # GoInt is 64 bits wide
+    GoInt = ctypes.c_longlong
+    # Buffers are passed as raw pointers, see _address
+    buffer = ctypes.c_void_p
+
+    lib.c_hash_packed.argtypes = [
+        buffer, GoInt, GoInt, GoInt, GoInt, GoInt, GoInt, GoInt, buffer, buffer]
+    lib.c_hash_packed.restype = None
+
+    lib.c_throttle_open.argtypes = [GoInt, GoInt]
+    lib.c_throttle_open.restype = ctypes.c_size_t
+    lib.c_throttle_take.argtypes = [ctypes.c_size_t, GoInt]
+    lib.c_throttle_free.argtypes = [ctypes.c_size_t]
+
+    lib.c_session_open.argtypes = [GoInt, GoInt, GoInt, ctypes.c_size_t]
+    lib.c_session_open.restype = ctypes.c_size_t
+    lib.c_session_submit.argtypes = [ctypes.c_size_t, buffer, GoInt, GoInt]
+    lib.c_session_close_input.argtypes = [ctypes.c_size_t]
+    lib.c_session_results.argtypes = [ctypes.c_size_t, GoInt, buffer, buffer, buffer]
+    lib.c_session_results.restype = GoInt
+    lib.c_session_free.argtypes = [ctypes.c_size_t]
+
+def hashErrorMessage(status: int) -> str:
+    """The message of a failed status, worded as an OSError would be where
+    it carries an errno."""
+    if status >= HASH_ERRNO:
+        errno = status - HASH_ERRNO
+        return f"Error: [Errno {errno}] {os.strerror(errno)}"
+    return "Error: " + _statusMessages.get(status, f"status {status}")
+
+def goHashFilesRaw(
+    filePaths: List[str],
+    workers: int = 0,
+    bufferSize: int = 0,
+    order: str = 'none',
+    bytesPerSecond: int = 0,
+    iops: int = 0
+) -> Tuple[memoryview, array]:
+    """Hashes filePaths, returning the raw digests of all files packed end to
+    end (DIGEST_SIZE bytes each) and an array of per file status codes, where
+    HASH_OK marks a valid digest. Both buffers are allocated and owned by the
+    caller; the Go library only writes into them."""
+    packed = _packPaths(filePaths)
+    digests = bytearray(DIGEST_SIZE * len(filePaths))
+    statuses = array('i', bytes(array('i').itemsize * len(filePaths)))
+
+    loadHashLibrary().c_hash_packed(
+        packed, len(packed), len(filePaths), workers, bufferSize,
+        ORDERS[order], bytesPerSecond, iops, _address(digests), _address(statuses))
+
+    return memoryview(digests), statuses
 
 def goHashFiles(
-    filePaths: List[str]
-)->List[str]:
-    """Returns a list of hashes for the given file paths. If an error occurs,
-    the hash for that file will be a string with the error message (starting
-    with "Error:" )."""
-    
-    c_array_str, convertedFilePaths = _stringList_to_CstringArray(filePaths)
-
-    lib = ctypes.cdll.LoadLibrary('./duplicateAndDeletedFileTracker/go/_hash.so')
-
-    hashes_pointer = _call_c_hash_list(lib, c_array_str, convertedFilePaths)
-    decoded = _decode_hashes_pointer(filePaths, hashes_pointer)
-    _free_hashes_pointer(lib, hashes_pointer)
-
-    return decoded
-
-def _free_hashes_pointer(lib, hashes_pointer):
-    lib.free_string_array.argtypes = [ctypes.c_void_p]
-    lib.free_string_array(hashes_pointer)
-
-def _decode_hashes_pointer(filePaths, hashes_pointer):
-    decoded = []
-    
-    for i in range(len(filePaths)):
-        try:
-            decoded.append(ctypes.string_at(hashes_pointer[i]).decode('utf-8'))
-        except UnicodeDecodeError:
-            print(f"Bad return from c_hash_list[{i}]: {hashes_pointer[i]}")
-            raise
-    return decoded
-
-def _call_c_hash_list(
-    lib: ctypes.CDLL,
-    c_array_str: Type,
-    convertedFilePaths: ctypes.Array[ctypes.c_char_p]
-) -> ctypes.POINTER(ctypes.c_void_p):
-
-    lib.c_hash_list.argtypes = [c_array_str, ctypes.c_int]
-    lib.c_hash_list.restype = ctypes.POINTER(ctypes.c_void_p)
-    hashes_pointer = lib.c_hash_list(convertedFilePaths, ctypes.c_int(len(convertedFilePaths)))
-    return hashes_pointer
-
-def _stringList_to_CstringArray(list_strings):
-    list_bytes = [s.encode('utf-8') for s in list_strings]
-    instance_type = (ctypes.c_char_p * len(list_bytes))
-    array_cStrings = instance_type(*list_bytes)
-    return instance_type, array_cStrings
\ No newline at end of file
+    filePaths: List[str],
+    workers: int = 0,
+    bufferSize: int = 0,
+    order: str = 'none',
+    bytesPerSecond: int = 0,
+    iops: int = 0
+)->List[Union[bytes, str]]:
+    """Returns a list of raw digests for the given file paths. If an error
+    occurs, the hash for that file will be a string with the error message
+    (starting with "Error:" ). At most workers files are read at once, each
+    through a buffer of bufferSize bytes; 0 uses the Go library's defaults.
+    Files are read in order (see ioSchedule.ORDERS), at most bytesPerSecond
+    bytes and iops reads a second, 0 for no limit."""
+    digests, statuses = goHashFilesRaw(filePaths, workers, bufferSize, order, bytesPerSecond, iops)
+    return [
+        bytes(digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE])
+        if status == HASH_OK else hashErrorMessage(status)
+        for i, status in enumerate(statuses)
+    ]
+
+class GoThrottle:
+    """ioSchedule.Throttle held by the Go library, so that the
+    GoHasherSessions opened with it share its limits with the reads charged
+    to it from Python with take."""
+
+    def __init__(self, bytesPerSecond: int = 0, iops: int = 0):
+        self.lib = loadHashLibrary()
+        self.handle = self.lib.c_throttle_open(bytesPerSecond, iops)
+
+    @classmethod
+    def limiting(cls, bytesPerSecond: int = 0, iops: int = 0) -> Optional[GoThrottle]:
+        """A GoThrottle, or None when neither limit is set."""
+        if bytesPerSecond <= 0 and iops <= 0: return None
+        return cls(bytesPerSecond, iops)
+
+    def take(self, n: int):
+        """Charges a read of n bytes, sleeping as long as it takes to pay for."""
+        self.lib.c_throttle_take(self.handle, n)
+
+    def __del__(self):
+        if self.handle: self.lib.c_throttle_free(self.handle)
+
+class GoHasherSession:
+    """A long lived pool of Go hashing workers.
+
+    Paths are submitted in chunks with submit(), and results are delivered in
+    completion order while later files are still being hashed; indices count
+    submitted paths from 0. The Go workers run outside the GIL, so the caller
+    is free to write each result to the database as it arrives. Call
+    closeInput() once every path is submitted, or the results will wait for
+    more. Each chunk is read in order as for goHashFiles, charging the reads
+    to throttle."""
+
+    def __init__(
+        self,
+        workers: int = 0,
+        bufferSize: int = 0,
+        resultBatchSize: int = 1024,
+        order: str = 'none',
+        throttle: GoThrottle = None
+    ):
+        self.lib = loadHashLibrary()
+        self.handle = self.lib.c_session_open(
+            workers, bufferSize, ORDERS[order], throttle.handle if throttle is not None else 0)
+        self.submitted = 0
+        self._indices = array('q', bytes(array('q').itemsize * resultBatchSize))
+        self._digests = bytearray(DIGEST_SIZE * resultBatchSize)
+        self._statuses = array('i', bytes(array('i').itemsize * resultBatchSize))
+
+    def submit(self, filePaths: List[str]) -> int:
+        """Queues filePaths for hashing, returning the index of the first."""
+        packed = _packPaths(filePaths)
+        firstIndex = self.submitted
+        self.lib.c_session_submit(self.handle, packed, len(packed), firstIndex)
+        self.submitted += len(filePaths)
+        return firstIndex
+
+    def closeInput(self):
+        self.lib.c_session_close_input(self.handle)
+
+    def resultBatches(self) -> Iterator[Tuple[memoryview, memoryview, memoryview]]:
+        """Yields (indices, digests, statuses) views of each batch of finished
+        results, without copying them out of the session's buffers. The views
+        are only valid until the next batch is requested."""
+        indices, digests, statuses = (
+            memoryview(self._indices), memoryview(self._digests), memoryview(self._statuses))
+        while True:
+            count = self.lib.c_session_results(
+                self.handle, len(self._indices), _address(self._indices),
+                _address(self._digests), _address(self._statuses))
+            if count == 0: return
+            yield indices[:count], digests[:count * DIGEST_SIZE], statuses[:count]
+
+    def results(self) -> Iterator[Tuple[int, Union[bytes, str]]]:
+        """Yields (index, hash) for each file, where hash is the raw digest or
+        an error message starting with "Error:"."""
+        for indices, digests, statuses in self.resultBatches():
+            for i, index in enumerate(indices):
+                if statuses[i] == HASH_OK:
+                    yield index, bytes(digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE])
+                else:
+                    yield index, hashErrorMessage(statuses[i])
+
+    def close(self):
+        if self.handle is None: return
+        self.lib.c_session_free(self.handle)
+        self.handle = None
+
+    def __enter__(self) -> GoHasherSession:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _packPaths(filePaths: List[str]) -> bytes:
+    """Packs paths into a single buffer of NUL-terminated UTF-8 strings."""
+    return b''.join(path.encode('utf-8') + b'\0' for path in filePaths)
+
+def _address(buffer) -> int:
+    """Address of a writable buffer's memory, which ctypes shares rather than
+    copies."""
+    if len(buffer) == 0: return None
+    return ctypes.addressof(ctypes.c_char.from_buffer(buffer))
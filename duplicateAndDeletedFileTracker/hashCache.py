@@ -0,0 +1,177 @@
+"""Persistent cache of file hashes keyed by where and when a file was stored.
+
+A file keeps its device and inode when it is moved or renamed within a
+volume, and its size and mtime unless its contents are rewritten, so
+(st_dev, st_ino, size, mtime_ns) identifies contents without reading them.
+The cache lives outside the database, so it survives resetDatabase.py and
+the rebuild of currentFiles on every run.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+DEFAULT_CACHE_PATH = Path.home() / '.duplicateAndDeletedFileTracker' / 'hashCache.sqlite3'
+# Entries not looked up or recorded in this many runs are evicted
+DEFAULT_MAX_AGE_RUNS = 30
+# Beyond this many entries the least recently used are evicted
+DEFAULT_MAX_ENTRIES = 5_000_000
+
+class StatKey(NamedTuple):
+    dev: int
+    ino: int
+    size: int
+    mtime_ns: int
+
+@dataclass
+class CachedHashes:
+    partial_hash: bytes
+    file_hash: Optional[bytes]
+
+def statKey(path) -> Optional[StatKey]:
+    """The cache key for the file at path, or None if it can't be cached:
+    the file can't be stat'd, or its filesystem has no stable inode numbers."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if stat.st_ino == 0: return None
+    return StatKey(stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+class HashCache:
+    """Partial and full hashes by StatKey, in an SQLite file at path.
+
+    Digests are stored as raw bytes in a WITHOUT ROWID table clustered on the
+    key, so an entry takes around 100 bytes on disk. Each open of the cache
+    counts as a run; close() evicts entries unused for maxAgeRuns runs, then
+    the least recently used entries beyond maxEntries. One cache can be
+    shared by threads, such as those updating several roots at once."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        maxAgeRuns: int = DEFAULT_MAX_AGE_RUNS,
+        maxEntries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.path = Path(path)
+        self.maxAgeRuns = maxAgeRuns
+        self.maxEntries = maxEntries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS hashes (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                partial_hash BLOB NOT NULL,
+                file_hash BLOB,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (dev, ino, size, mtime_ns)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used);
+            CREATE TEMP TABLE lookupKeys (
+                position INTEGER PRIMARY KEY,
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+        """)
+        self.run = self.connection.execute("PRAGMA user_version").fetchone()[0] + 1
+        self.connection.execute(f"PRAGMA user_version = {self.run}")
+
+    def lookup(self, keys: Sequence[Optional[StatKey]]) -> List[Optional[CachedHashes]]:
+        """The cached hashes for each key, or None where there are none."""
+        with self._lock:
+            return self._lookup(keys)
+
+    def _lookup(self, keys: Sequence[Optional[StatKey]]) -> List[Optional[CachedHashes]]:
+        # The keys are looked up together by joining them from a temporary
+        # table, rather than with a query each
+        found: List[Optional[CachedHashes]] = [None] * len(keys)
+        self.connection.execute("DELETE FROM temp.lookupKeys")
+        self.connection.executemany(
+            "INSERT INTO temp.lookupKeys (position, dev, ino, size, mtime_ns) "
+            "VALUES (?, ?, ?, ?, ?)",
+            ((position, *_signed(key)) for position, key in enumerate(keys) if key is not None)
+        )
+        for position, partial_hash, file_hash in self.connection.execute(
+                "SELECT lookup.position, hashes.partial_hash, hashes.file_hash "
+                "FROM temp.lookupKeys lookup "
+                "INNER JOIN hashes USING (dev, ino, size, mtime_ns)"):
+            found[position] = CachedHashes(partial_hash, file_hash)
+        self.connection.execute(
+            "UPDATE hashes SET last_used = ? WHERE (dev, ino, size, mtime_ns) IN ("
+            "SELECT dev, ino, size, mtime_ns FROM temp.lookupKeys)",
+            (self.run,)
+        )
+        return found
+
+    def recordPartial(self, key: Optional[StatKey], partial_hash: bytes):
+        """Stores a partial hash. Any full hash stored for the key is kept."""
+        if key is None: return
+        with self._lock:
+            self.connection.execute(
+                "INSERT INTO hashes (dev, ino, size, mtime_ns, partial_hash, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (dev, ino, size, mtime_ns) DO UPDATE SET "
+                "partial_hash = excluded.partial_hash, last_used = excluded.last_used",
+                (*_signed(key), partial_hash, self.run)
+            )
+
+    def recordFull(self, key: Optional[StatKey], file_hash: bytes):
+        """Stores a full hash alongside the key's partial hash. Full hashes
+        are only cached once a partial hash is, since a file given a full hash
+        from the cache must also have the partial hash other files are
+        compared against."""
+        if key is None: return
+        with self._lock:
+            self.connection.execute(
+                "UPDATE hashes SET file_hash = ?, last_used = ? "
+                "WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+                (file_hash, self.run, *_signed(key))
+            )
+
+    def evict(self):
+        self.connection.execute(
+            "DELETE FROM hashes WHERE last_used <= ?", (self.run - self.maxAgeRuns,))
+        excess = self.connection.execute("SELECT count(*) FROM hashes").fetchone()[0] - self.maxEntries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM hashes WHERE (dev, ino, size, mtime_ns) IN ("
+                "SELECT dev, ino, size, mtime_ns FROM hashes ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+
+    def commit(self):
+        """Saves what has been recorded so far, for long running processes."""
+        with self._lock:
+            self.connection.commit()
+
+    def close(self):
+        self.evict()
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self) -> HashCache:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Entries recorded before the failure are still valid
+            self.connection.commit()
+            self.connection.close()
+
+def _signed(key: StatKey) -> StatKey:
+    # SQLite integers are signed 64 bit, but st_dev and st_ino can use all 64
+    return StatKey(*(value - (1 << 64) if value >= (1 << 63) else value for value in key))
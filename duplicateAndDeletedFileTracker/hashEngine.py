@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import List, Union
+
+from .goInterface import GoHasherSession, GoThrottle, goHashFiles, loadHashLibrary
+from .hashOptions import HashOptions
+from .ioSchedule import Throttle
+from .pyHash import PyHasherSession, pyHashFiles
+
+HasherSession = Union[GoHasherSession, PyHasherSession]
+
+def goEngineAvailable() -> bool:
+    """Whether _hash.so exists, loads on this platform and is up to date."""
+    try:
+        loadHashLibrary()
+    except (OSError, AttributeError):
+        return False
+    return True
+
+def useGoEngine(hashOptions: HashOptions) -> bool:
+    if hashOptions.engine == 'python': return False
+    if hashOptions.engine == 'go': return True
+    return goEngineAvailable()
+
+def sharedThrottle(hashOptions: HashOptions) -> Union[GoThrottle, Throttle, None]:
+    """The throttle every read made with hashOptions is charged to. It is
+    held by the Go library when that hashes, so partial hashes read from
+    Python count against the same limits as the Go sessions."""
+    return hashOptions.sharedThrottle(
+        GoThrottle.limiting if useGoEngine(hashOptions) else Throttle.limiting)
+
+def openHasherSession(hashOptions: HashOptions = None) -> HasherSession:
+    """Opens a hasher session on the engine chosen by hashOptions, preferring
+    the Go library and falling back to Python hashing when it can't be
+    loaded."""
+    if hashOptions is None: hashOptions = HashOptions()
+    if useGoEngine(hashOptions):
+        return GoHasherSession(
+            hashOptions.workers, hashOptions.bufferSize, order=hashOptions.order,
+            throttle=sharedThrottle(hashOptions))
+    return PyHasherSession(
+        hashOptions.workers, hashOptions.bufferSize, order=hashOptions.order,
+        throttle=sharedThrottle(hashOptions))
+
+def hashFiles(filePaths: List[str], hashOptions: HashOptions = None) -> List[str]:
+    """goHashFiles or pyHashFiles, chosen as for openHasherSession."""
+    if hashOptions is None: hashOptions = HashOptions()
+    engine = goHashFiles if useGoEngine(hashOptions) else pyHashFiles
+    return engine(
+        filePaths, hashOptions.workers, hashOptions.bufferSize, hashOptions.order,
+        hashOptions.bytesPerSecond, hashOptions.iops)
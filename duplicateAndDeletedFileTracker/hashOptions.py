@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+_throttleLock = threading.Lock()
+
+
+@dataclass
+class HashOptions:
+    """How many files are hashed concurrently and the size of the buffer each
+    is read through. 0 leaves the choice to the hashing engine. engine is
+    'go', 'python' or 'auto' to use Go where its library can be loaded.
+    order is the order each chunk of files is read in (see
+    ioSchedule.ORDERS), and bytesPerSecond and iops cap the reads of all
+    workers together, 0 for no limit, through the one throttle shared by
+    every read made with the same options."""
+    workers: int = 0
+    bufferSize: int = 0
+    engine: str = 'auto'
+    order: str = 'none'
+    bytesPerSecond: int = 0
+    iops: int = 0
+
+    @classmethod
+    def forStorage(cls, storageType: str) -> HashOptions:
+        if storageType == 'hdd':
+            # Concurrent reads make a spinning disk seek back and forth between
+            # files, so read few files at a time in large sequential chunks,
+            # in the order they lie on the disk.
+            return cls(workers=2, bufferSize=4 * 1024 * 1024, order='extent')
+        return cls(workers=2 * (os.cpu_count() or 1), bufferSize=256 * 1024)
+
+    def sharedThrottle(self, limiting: Callable[[int, int], Optional[object]]):
+        """The throttle built by limiting(bytesPerSecond, iops) on first use,
+        so the limits hold for a whole run rather than for each of the roots,
+        stages and sessions reading at once."""
+        with _throttleLock:
+            if not hasattr(self, '_throttle'):
+                self._throttle = limiting(self.bytesPerSecond, self.iops)
+            return self._throttle
+
+    @classmethod
+    def fromConfig(cls, config) -> HashOptions:
+        """Options for the storage type in config, overridden by its
+        hashWorkers, hashBufferSize, hashEngine, hashOrder,
+        hashBytesPerSecond and hashIops where these are set."""
+        options = cls.forStorage(getattr(config, 'storageType', 'ssd'))
+        options.workers = getattr(config, 'hashWorkers', 0) or options.workers
+        options.bufferSize = getattr(config, 'hashBufferSize', 0) or options.bufferSize
+        options.engine = getattr(config, 'hashEngine', options.engine)
+        options.order = getattr(config, 'hashOrder', None) or options.order
+        options.bytesPerSecond = getattr(config, 'hashBytesPerSecond', 0) or options.bytesPerSecond
+        options.iops = getattr(config, 'hashIops', 0) or options.iops
+        return options
@@ -0,0 +1,113 @@
+"""Minimal ctypes binding to Linux's inotify API."""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from typing import Iterator, NamedTuple, Optional
+
+IN_ACCESS = 0x00000001
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, 'O_NONBLOCK') else 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 1024 * (_EVENT_HEADER.size + 256)
+
+class Event(NamedTuple):
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+_libc = None
+
+def _loadLibc():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        # Raises AttributeError where the C library has no inotify, i.e. off Linux
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_init1.restype = ctypes.c_int
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_add_watch.restype = ctypes.c_int
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        libc.inotify_rm_watch.restype = ctypes.c_int
+        _libc = libc
+    return _libc
+
+def inotifyAvailable() -> bool:
+    try:
+        _loadLibc()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+def _check(result: int, path: str = None) -> int:
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), path)
+    return result
+
+class Inotify:
+    """An inotify instance. Watches are added with addWatch, and the events
+    for them collected with read."""
+
+    def __init__(self):
+        self.libc = _loadLibc()
+        self.fd = _check(self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def addWatch(self, path: str, mask: int) -> int:
+        return _check(self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask), path)
+
+    def removeWatch(self, wd: int):
+        """Removes a watch, ignoring one the kernel has already dropped."""
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: Optional[float] = None) -> Iterator[Event]:
+        """Yields the queued events, waiting up to timeout seconds (forever
+        if None) for there to be any."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable: return
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            yield Event(wd, mask, cookie, name)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self) -> Inotify:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,112 @@
+"""Orders hash reads by where files lie on disk, and throttles them.
+
+Reading files in the order their data is laid out lets a spinning disk read
+mostly forwards instead of seeking between them. Files are ordered by device
+and then by inode number, which filesystems mostly allocate in step with
+where they place data, or with 'extent' by the physical offset of their
+first extent, asked of the filesystem with FIEMAP on Linux.
+
+Throttle caps the bytes and reads a second shared by every hashing worker,
+so that hashing a shared disk leaves room for its other users. The Go engine
+has its own implementation of both, see hash/schedule.go and
+hash/throttle.go.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+# Codes of each order, shared with hash.Order in the Go library
+ORDERS = {'none': 0, 'inode': 1, 'extent': 2}
+
+# FS_IOC_FIEMAP, _IOWR('f', 11, struct fiemap)
+FS_IOC_FIEMAP = 0xC020660B
+# struct fiemap, followed by the one struct fiemap_extent asked for
+_FIEMAP = struct.Struct('=QQIIII')
+_FIEMAP_EXTENT = struct.Struct('=QQQ2QI3I')
+
+# Rank of a file's location on its device: files with a known physical
+# offset are read first, then those only known by inode. Files which can't be
+# stat'd are read after all the others
+_RANK_EXTENT, _RANK_INODE, _RANK_UNKNOWN = 0, 1, 2
+
+def firstExtent(path) -> Optional[int]:
+    """Physical offset of the first extent of the file at path, or None if
+    it has no data or its filesystem can't say."""
+    if sys.platform != 'linux': return None
+    import fcntl
+    request = bytearray(_FIEMAP.size + _FIEMAP_EXTENT.size)
+    _FIEMAP.pack_into(request, 0, 0, 2 ** 64 - 1, 0, 0, 1, 0)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, request, True)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    if _FIEMAP.unpack_from(request)[3] == 0: return None
+    return _FIEMAP_EXTENT.unpack_from(request, _FIEMAP.size)[1]
+
+def diskLocation(path, order: str) -> Tuple[bool, int, int, int]:
+    """Sort key placing path where order reads it among others."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (True, 0, _RANK_UNKNOWN, 0)
+    if order == 'extent':
+        physical = firstExtent(path)
+        if physical is not None: return (False, stat.st_dev, _RANK_EXTENT, physical)
+    return (False, stat.st_dev, _RANK_INODE, stat.st_ino)
+
+def diskOrder(paths: Sequence[str], order: str) -> List[int]:
+    """Indices of paths in the order they should be read, keeping their
+    given order between files at the same location."""
+    if order not in ORDERS:
+        raise ValueError(f"Unknown hash order {order!r}, expected one of {', '.join(ORDERS)}")
+    if order == 'none' or len(paths) < 2: return list(range(len(paths)))
+    locations = [diskLocation(path, order) for path in paths]
+    return sorted(range(len(paths)), key=locations.__getitem__)
+
+class Throttle:
+    """Limits the reads of every thread sharing it to bytesPerSecond bytes
+    and iops reads a second, 0 leaving either unlimited. Reads are charged
+    once made, and the reader then waits until the average is back within
+    the limits. Up to a second's worth left unused during a pause can be read
+    in a burst afterwards."""
+
+    def __init__(self, bytesPerSecond: int = 0, iops: int = 0):
+        self.bytesPerSecond = max(bytesPerSecond, 0)
+        self.iops = max(iops, 0)
+        self._bytes = 0.0
+        self._ops = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def limiting(cls, bytesPerSecond: int = 0, iops: int = 0) -> Optional[Throttle]:
+        """A Throttle, or None when neither limit is set."""
+        if bytesPerSecond <= 0 and iops <= 0: return None
+        return cls(bytesPerSecond, iops)
+
+    def take(self, n: int):
+        """Charges a read of n bytes, sleeping as long as it takes to pay for."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last
+            self._last = now
+            wait = 0.0
+            if self.bytesPerSecond:
+                self._bytes = min(self._bytes + elapsed * self.bytesPerSecond,
+                                  self.bytesPerSecond) - n
+                wait = max(wait, -self._bytes / self.bytesPerSecond)
+            if self.iops:
+                self._ops = min(self._ops + elapsed * self.iops, self.iops) - 1
+                wait = max(wait, -self._ops / self.iops)
+        if wait > 0: time.sleep(wait)
@@ -2,17 +2,24 @@ from __future__ import annotations
 
 import contextlib
 import hashlib
+import itertools
 import os
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Callable, Iterable, List, Tuple
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-import psycopg2
-
-from . import queries
-from .goInterface import goHashFiles
+from . import metrics, queries
+from .bulkCopy import IterableReader, copyRows
+from .duplicateReview import KEEP, REMOVE, DuplicateReview
+from .hashCache import HashCache, StatKey, statKey
+from .hashEngine import HasherSession, openHasherSession, sharedThrottle
+from .hashOptions import HashOptions
+from .ioSchedule import Throttle, diskOrder
+from .pyHash import PyHasherSession, hashFileInto
+from .walk import TreeChanges, rescanDirectories, scanChanges, scanTree
 
 
 class CursorInterface(ABC):
@@ -26,11 +33,30 @@ class ExtendedCursorInterface(CursorInterface):
     @abstractmethod
     def getResult(self, query: str, param: Tuple = None) -> List[Tuple]: pass
 
+class BatchCursorInterface(ExtendedCursorInterface):
+    @abstractmethod
+    def executeMany(self, query: str, rows: Iterable[Sequence]): pass
+
+class CopyCursorInterface(ExtendedCursorInterface):
+    @abstractmethod
+    def copyFrom(self, file: IO[str], table: str, columns: Sequence[str]): pass
+
+STREAM_CHUNK_SIZE = 10000
+
+class StreamCursorInterface(ExtendedCursorInterface):
+    @abstractmethod
+    def iterChunks(
+        self, query: str, param: Tuple = None, chunkSize: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[List[Tuple]]: pass
+
+_streamNames = itertools.count()
+
 @dataclass
-class CursorWrapper(ExtendedCursorInterface):
+class CursorWrapper(CopyCursorInterface, StreamCursorInterface):
     cursor: CursorInterface
 
     def execute(self, query: str, param: Tuple = None):
+        metrics.count('roundTrips')
         return self.cursor.execute(query, param)
 
     def fetchall(self) -> List[Tuple]:
@@ -40,14 +66,65 @@ class CursorWrapper(ExtendedCursorInterface):
         self.execute(query, param)
         return self.fetchall()
 
+    def copyFrom(self, file: IO[str], table: str, columns: Sequence[str]):
+        """Streams rows in postgres' COPY text format from file into table."""
+        metrics.count('roundTrips')
+        return self.cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN", file)
+
+    def iterChunks(
+        self, query: str, param: Tuple = None, chunkSize: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[List[Tuple]]:
+        """Yields the rows of query in lists of up to chunkSize, fetched from
+        a named server-side cursor so only one chunk is held at a time. The
+        cursor's rows are fixed when it is opened, so the tables it reads may
+        be written to while iterating."""
+        stream = self.cursor.connection.cursor(name=f"stream{next(_streamNames)}")
+        try:
+            metrics.count('roundTrips')
+            stream.execute(query, param)
+            while True:
+                metrics.count('roundTrips')
+                rows = stream.fetchmany(chunkSize)
+                if not rows: return
+                yield rows
+        finally:
+            stream.close()
+
+def iterChunks(
+    dbCursor: CursorInterface, query: str, param: Tuple = None, chunkSize: int = STREAM_CHUNK_SIZE
+) -> Iterator[List[Tuple]]:
+    """The rows of query in lists of up to chunkSize, streamed where the
+    cursor supports it and otherwise fetched at once and split."""
+    if isinstance(dbCursor, StreamCursorInterface):
+        return dbCursor.iterChunks(query, param, chunkSize)
+    dbCursor.execute(query, param)
+    return chunked(dbCursor.fetchall(), chunkSize)
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
 class openConnection:
-    def __init__(self, db_params: str):
+    """Connects to the Postgres server described by db_params, or with
+    {'sqlite': path} to the SQLite database at path, yielding a cursor and
+    committing on success."""
+    def __init__(self, db_params: dict):
         self.db_params = db_params
         self.connection = None
         self.cursor = None
         self.cursor_wrapper = None
 
     def __enter__(self):
+        if 'sqlite' in self.db_params:
+            from .sqliteBackend import SqliteCursor, connectSqlite
+            self.connection = connectSqlite(self.db_params['sqlite'])
+            self.cursor = self.connection.cursor()
+            self.cursor_wrapper = SqliteCursor(self.cursor)
+            return self.cursor_wrapper
+
+        import psycopg2
         self.connection = psycopg2.connect(**self.db_params)
         self.cursor = self.connection.cursor()
         self.cursor_wrapper = CursorWrapper(self.cursor)
@@ -63,84 +140,649 @@ class openConnection:
 
 def hashFile(path):
     BUF_SIZE = 65536  # lets read stuff in 64kb chunks!
+    with metrics.phase('hash'):
+        file_hash = hashFileInto(path, bytearray(BUF_SIZE))
+    if metrics.enabled(): metrics.count('bytesHashed', fileSize(path))
+    return file_hash
+
+PARTIAL_HASH_BLOCK_SIZE = 65536
+
+def fileSize(path) -> int:
+    """Size of the file at path, or 0 if it can no longer be stat'd."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+def partialHashFile(path, throttle: Throttle = None):
+    """Hashes the size, first block and last block of a file. Files sharing
+    a partial hash are only possibly identical; files which differ in their
+    partial hash cannot be. Each block read is charged to throttle."""
     sha256 = hashlib.sha256()
     with open(path, 'rb') as file:
-        while True:
-            data = file.read(BUF_SIZE)
-            if not data:
-                break
-            sha256.update(data)
-    return sha256.hexdigest()
+        size = os.fstat(file.fileno()).st_size
+        sha256.update(size.to_bytes(8, 'little'))
+        blocks = [0]
+        if size > PARTIAL_HASH_BLOCK_SIZE:
+            blocks.append(max(size - PARTIAL_HASH_BLOCK_SIZE, PARTIAL_HASH_BLOCK_SIZE))
+        for offset in blocks:
+            file.seek(offset)
+            block = file.read(PARTIAL_HASH_BLOCK_SIZE)
+            if throttle is not None: throttle.take(len(block))
+            sha256.update(block)
+    return sha256.digest()
+
+def inDiskOrder(
+    rootDir: Path,
+    files_id_path: List[Tuple[int, str]],
+    order: str = 'none'
+) -> List[Tuple[int, str]]:
+    """The files reordered to be read in order (see ioSchedule.diskOrder)."""
+    paths = [str(Path(rootDir, relative_path)) for _, relative_path in files_id_path]
+    return [files_id_path[i] for i in diskOrder(paths, order)]
 
 def ingest(rootDir: Path) -> Iterable[dict]:
-    for path, subdirs, files in os.walk(rootDir):
-        for name in files:
-
-            file_path = Path(path, name)
-
-            properties = {
-                'file_path': file_path,
-                'relative_path': file_path.relative_to(rootDir),
-                'modified': datetime.fromtimestamp( file_path.stat().st_mtime )
-            }
-
-            yield properties
+    """The properties of every file under rootDir, listed by walk.scanTree."""
+    for relative_path, mtime, size, _, _ in scanTree(rootDir):
+        metrics.count('filesWalked')
+        yield {
+            'file_path': Path(rootDir, relative_path),
+            'relative_path': Path(relative_path),
+            'modified': datetime.fromtimestamp(mtime),
+            'size': size
+        }
 
 def ingestHashAll(rootDir: Path) -> Iterable[dict]:
     for file_properties in ingest(rootDir):
         file_properties['hash'] = hashFile(file_properties['file_path'])
         yield file_properties
 
-def loadCurrentFiles(dbCursor: CursorInterface, rootDir: Path):
-    dbCursor.execute(queries.resetCurrentFiles)
-    for queryParams in ingest(rootDir):
-        dbCursor.execute(
-            "INSERT INTO currentFiles (relative_path, modified) VALUES (%s, %s)",
-            (str(queryParams['relative_path']),queryParams['modified'])
-        )
+# A file found under a root: (relative_path, modified, file_size, device, inode)
+CurrentFileRow = Tuple[str, datetime, int, Optional[int], Optional[int]]
+CURRENT_FILE_COLUMNS = ("relative_path", "modified", "file_size", "device", "inode")
+# currentFiles columns written for each CurrentFileRow, led by its root
+ROOTED_CURRENT_FILE_COLUMNS = ("root_id",) + CURRENT_FILE_COLUMNS
+
+# Root of the rows from before several roots could be tracked, and of every
+# row where only one is
+DEFAULT_ROOT_ID = 1
+
+def rootDirectories(rootPath) -> Dict[int, Path]:
+    """The directory of each root by root_id, from either such a dict or a
+    single directory, which is the default root."""
+    if isinstance(rootPath, dict): return rootPath
+    return {DEFAULT_ROOT_ID: Path(rootPath)}
+
+def withRoot(root_id: int, rows: Iterable[CurrentFileRow]) -> Iterator[Tuple]:
+    """rows led by root_id, to be written as ROOTED_CURRENT_FILE_COLUMNS."""
+    return ((root_id, *row) for row in rows)
+
+def currentFileRows(rootDir: Path) -> Iterable[CurrentFileRow]:
+    """A CurrentFileRow for each file under rootDir."""
+    walked = metrics.countedIterator('filesWalked', scanTree(rootDir))
+    for relative_path, mtime, size, device, inode in metrics.timedIterator('walk', walked):
+        yield relative_path, datetime.fromtimestamp(mtime), size, device, inode
+
+def loadCurrentFiles(dbCursor: CursorInterface, rootDir: Path, root_id: int = DEFAULT_ROOT_ID):
+    """Replaces the files of root root_id in currentFiles with those under
+    rootDir. Uses a single streamed COPY where the cursor supports it, a batched
+    INSERT for in-process cursors, and one INSERT per file otherwise. The table is re-analyzed afterwards so the
+    views are planned against its new size.
+
+    The root's directory mtimes used by updateCurrentFiles are cleared, so
+    its next incremental update starts with a full scan."""
+    with metrics.phase('loadCurrentFiles'):
+        dbCursor.execute(queries.resetRootCurrentFiles, (root_id,))
+        dbCursor.execute(queries.resetRootCurrentDirectories, (root_id,))
+        if isinstance(dbCursor, CopyCursorInterface):
+            copyCurrentFiles(dbCursor, currentFileRows(rootDir), root_id)
+        else:
+            insertCurrentFiles(dbCursor, currentFileRows(rootDir), root_id)
+        dbCursor.execute(queries.analyzeCurrentFiles)
+
+def copyCurrentFiles(
+    dbCursor: CopyCursorInterface,
+    rows: Iterable[CurrentFileRow],
+    root_id: int = DEFAULT_ROOT_ID
+):
+    rows = metrics.countedIterator('rowsWritten', withRoot(root_id, rows))
+    dbCursor.copyFrom(IterableReader(copyRows(rows)), "currentFiles", ROOTED_CURRENT_FILE_COLUMNS)
+
+INSERT_CURRENT_FILE = "INSERT INTO currentFiles " \
+    "(root_id, relative_path, modified, file_size, device, inode) " \
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+
+def insertCurrentFiles(
+    dbCursor: CursorInterface,
+    rows: Iterable[CurrentFileRow],
+    root_id: int = DEFAULT_ROOT_ID
+):
+    rows = withRoot(root_id, rows)
+    if isinstance(dbCursor, BatchCursorInterface):
+        dbCursor.executeMany(INSERT_CURRENT_FILE, metrics.countedIterator('rowsWritten', rows))
+        return
+    for queryParams in rows:
+        dbCursor.execute(INSERT_CURRENT_FILE, queryParams)
+        metrics.count('rowsWritten')
+
+def updateCurrentFiles(
+    dbCursor: ExtendedCursorInterface,
+    rootDir: Path,
+    root_id: int = DEFAULT_ROOT_ID
+) -> TreeChanges:
+    """Brings the files of root root_id in currentFiles up to date with the
+    files under rootDir, keeping them between runs rather than reloading
+    them. Only directories whose mtime changed since the last update are
+    listed again (see walk.scanChanges), along with those holding a file
+    rewritten in place, found by statting the files already known (see
+    rewrittenDirectories). Only the files which were added, changed or
+    removed are written. Falls back to a full scan when there are no
+    directory mtimes to go by."""
+    with metrics.phase('updateCurrentFiles'):
+        known = dict(dbCursor.getResult(
+            "SELECT relative_path, modified_ns FROM currentDirectories WHERE root_id = %s",
+            (root_id,)))
+        if not known: dbCursor.execute(queries.resetRootCurrentFiles, (root_id,))
+        changes = scanChanges(rootDir, known)
+        if known:
+            changes.merge(rescanDirectories(
+                rootDir, rewrittenDirectories(dbCursor, rootDir, changes, root_id)))
+        applyTreeChanges(dbCursor, changes, root_id)
+        dbCursor.execute(queries.analyzeCurrentFiles)
+    return changes
+
+def roundedToSecond(value: datetime) -> datetime:
+    """value rounded to the second, as TIMESTAMP(0) stores modified."""
+    return (value + timedelta(microseconds=500_000)).replace(microsecond=0)
+
+def _rewritten(rootDir: Path, relative_path: str, modified: datetime, file_size: int) -> bool:
+    try:
+        stat = os.stat(Path(rootDir, relative_path))
+    except OSError:
+        return True
+    return roundedToSecond(datetime.fromtimestamp(stat.st_mtime)) != modified \
+        or stat.st_size != file_size
+
+def rewrittenDirectories(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    changes: TreeChanges,
+    root_id: int = DEFAULT_ROOT_ID
+) -> List[str]:
+    """The directories of root root_id left unlisted by changes which hold a
+    file of currentFiles whose mtime or size no longer match, as a file
+    rewritten in place leaves its directory's mtime unchanged."""
+    listed = set(changes.rescanned) | set(changes.removed)
+    rewritten = set()
+    with ThreadPoolExecutor() as executor:
+        for rows in iterChunks(
+                dbCursor, "SELECT relative_path, modified, file_size FROM currentFiles "
+                "WHERE root_id = %s", (root_id,)):
+            rows = [(directoryOf(row[0]),) + row for row in rows]
+            rows = [row for row in rows if row[0] not in listed and row[0] not in rewritten]
+            for (directory, *_), changed in zip(rows, executor.map(
+                    lambda row: _rewritten(rootDir, *row[1:]), rows)):
+                if changed: rewritten.add(directory)
+    metrics.count('directoriesRewritten', len(rewritten))
+    return sorted(rewritten)
+
+def directoryOf(relative_path: str) -> str:
+    """The directory of a relative path as walk gives it, with a trailing
+    os.sep, or '' for the root."""
+    return relative_path[:relative_path.rfind(os.sep) + 1]
+
+def applyTreeChanges(dbCursor: CursorInterface, changes: TreeChanges, root_id: int = DEFAULT_ROOT_ID):
+    """Writes the files found in the rescanned directories of root root_id
+    to currentFiles, removing those no longer there or in a removed
+    directory, and records the rescanned directories' mtimes."""
+    metrics.count('directoriesRescanned', len(changes.rescanned))
+    metrics.count('filesWalked', len(changes.files))
+    dbCursor.execute(queries.resetScannedFiles)
+    writeRows(dbCursor, "scannedFiles", CURRENT_FILE_COLUMNS, (
+        (relative_path, datetime.fromtimestamp(mtime), size, device, inode)
+        for relative_path, mtime, size, device, inode in changes.files))
+    dbCursor.execute(queries.applyScannedFiles, {
+        'staleDirectories': changes.rescanned + changes.removed,
+        'sep': os.sep,
+        'root_id': root_id,
+    })
+    writeRows(dbCursor, "currentDirectories", ("root_id", "relative_path", "modified_ns"), (
+        (root_id, prefix, changes.directories[prefix]) for prefix in changes.rescanned))
+
+def writeRows(
+    dbCursor: CursorInterface,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence]
+):
+    """Writes rows to table with a streamed COPY or a batched INSERT where
+    the cursor supports them, or one INSERT per row otherwise."""
+    if isinstance(dbCursor, CopyCursorInterface):
+        dbCursor.copyFrom(IterableReader(copyRows(rows)), table, columns)
+        return
+    query = f"INSERT INTO {table} ({', '.join(columns)}) " \
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    if isinstance(dbCursor, BatchCursorInterface):
+        dbCursor.executeMany(query, rows)
+        return
+    for row in rows:
+        dbCursor.execute(query, tuple(row))
 
-def updateNewFilesHash(dbCursor: CursorInterface, rootDir: Path):
-    dbCursor.execute("SELECT file_id, relative_path FROM newPathFilesWithoutHash")
-    files_id_path = dbCursor.fetchall()
-    goUpdateFilesHash(dbCursor, rootDir, files_id_path, "currentFiles")
+@dataclass
+class HashUpdateResult:
+    """Outcome of a hash update: the number of rows given a hash,
+    (file_id, relative_path, error message) for each file that failed, and
+    the bytes not read because the file was a hard link to one being read."""
+    updated: int = 0
+    errors: List[Tuple[int, str, str]] = field(default_factory=list)
+    bytesSaved: int = 0
+
+    def merge(self, other: HashUpdateResult) -> HashUpdateResult:
+        self.updated += other.updated
+        self.errors.extend(other.errors)
+        self.bytesSaved += other.bytesSaved
+        return self
 
-def updateModifiedFilesHash(dbCursor: CursorInterface, rootDir: Path):
-    dbCursor.execute("SELECT file_id, relative_path FROM modifiedFiles")
-    files_id_path = dbCursor.fetchall()
-    goUpdateFilesHash(dbCursor, rootDir, files_id_path, "currentFiles")
+@dataclass
+class HardLinks:
+    """The files of a hash update to read, one per inode, and by the file_id
+    of each the (file_id, relative_path) of the other paths linked to its
+    inode, which are given its hash rather than being read again."""
+    toRead: List[Tuple[int, str]]
+    links: Dict[int, List[Tuple[int, str]]] = field(default_factory=dict)
+    bytesSaved: int = 0
+
+    def fanOut(self, id_hashes: List[Tuple[int, bytes]]) -> List[Tuple[int, bytes]]:
+        """id_hashes along with the hash of each read file for its links."""
+        return id_hashes + [
+            (linked_id, file_hash) for file_id, file_hash in id_hashes
+            for linked_id, _ in self.links.get(file_id, ())]
+
+    def fanOutErrors(self, errors: List[Tuple[int, str, str]]) -> List[Tuple[int, str, str]]:
+        return errors + [
+            (linked_id, linked_path, error) for file_id, _, error in errors
+            for linked_id, linked_path in self.links.get(file_id, ())]
+
+def groupHardLinks(
+    dbCursor: CursorInterface,
+    files_id_path: List[Tuple[int, str]],
+    table_name: str
+) -> HardLinks:
+    """Groups the files by the device and inode recorded for them, so the
+    contents of hard linked paths are read once. Only currentFiles records
+    inodes; files of other tables are all read."""
+    if table_name != "currentFiles" or len(files_id_path) < 2: return HardLinks(files_id_path)
+    dbCursor.execute(
+        "SELECT file_id, device, inode, file_size FROM currentFiles "
+        "WHERE inode IS NOT NULL AND file_id = ANY(%s::bigint[])",
+        ([file_id for file_id, _ in files_id_path],))
+    inodes = {file_id: ((device, inode), size) for file_id, device, inode, size in dbCursor.fetchall()}
+
+    grouped = HardLinks([])
+    readers = {}
+    for file_id, relative_path in files_id_path:
+        inode, size = inodes.get(file_id, (None, None))
+        reader = readers.setdefault(inode, file_id) if inode else file_id
+        if reader == file_id:
+            grouped.toRead.append((file_id, relative_path))
+        else:
+            grouped.links.setdefault(reader, []).append((file_id, relative_path))
+            grouped.bytesSaved += size or 0
+    return grouped
+
+def updateNewFilesHash(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None,
+    root_id: int = DEFAULT_ROOT_ID
+) -> HashUpdateResult:
+    """Hashes new path files in tiers, reading as little as possible:
+        1. every new path file gets a partial hash of its first and last block,
+        2. only files whose size and partial hash match an archived, deleted
+           or other new file (fullHashCandidateFiles) are fully hashed.
+    Files stopping at the first tier are classed as newUnseenFiles and are
+    archived without a full hash. If a later new file collides with one of
+    them, the archived file is hashed from disk if it is still there, and
+    otherwise is matched by size and partial hash when moved or deleted.
+    Hashes found in hashCache are used instead of reading the file.
+    Each tier streams its files in chunks, so memory use doesn't grow with
+    the number of files.
+
+    Where several roots are tracked the tiers are run for every root before
+    the next starts (see roots.updateRoots), as the candidates for a full
+    hash depend on the partial hashes of the other roots' new files."""
+    result = updateNewFilesPartialHash(dbCursor, rootDir, hashCache, root_id, hashOptions)
+    result.merge(updateNewFilesFullHash(dbCursor, rootDir, hashOptions, hashCache, root_id))
+    result.merge(updateDeferredArchiveHashes(dbCursor, rootDir, hashOptions, hashCache, root_id))
+    dbCursor.execute("CALL updateArchiveDeferredHashes();")
+    return result
+
+def updateNewFilesPartialHash(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    hashCache: HashCache = None,
+    root_id: int = DEFAULT_ROOT_ID,
+    hashOptions: HashOptions = None
+) -> HashUpdateResult:
+    """First tier of updateNewFilesHash, for the files of root root_id."""
+    dbCursor.execute("CALL updateArchiveFileSizes(%s);", (root_id,))
+    return updatePartialHashesOf(
+        dbCursor, rootDir, "newPathFilesWithoutHash WHERE partial_hash IS NULL", hashCache,
+        root_id, hashOptions)
+
+def updateNewFilesFullHash(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None,
+    root_id: int = DEFAULT_ROOT_ID
+) -> HashUpdateResult:
+    """Second tier of updateNewFilesHash, for the files of root root_id."""
+    return queryUpdateFilesHash(
+        dbCursor, rootDir, "fullHashCandidateFiles", hashOptions, hashCache, root_id)
+
+def updateDeferredArchiveHashes(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None,
+    root_id: int = DEFAULT_ROOT_ID
+) -> HashUpdateResult:
+    """Hashes the archived files of root root_id still on disk which collide
+    with a fully hashed new file, once every root's new files are hashed."""
+    return queryUpdateFilesHash(
+        dbCursor, rootDir, "deferredArchiveFilesOnDisk", hashOptions, hashCache, root_id)
+
+def updateModifiedFilesHash(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None,
+    root_id: int = DEFAULT_ROOT_ID
+) -> HashUpdateResult:
+    result = updatePartialHashesOf(
+        dbCursor, rootDir, "modifiedFiles WHERE partial_hash IS NULL", hashCache, root_id,
+        hashOptions)
+    return result.merge(queryUpdateFilesHash(
+        dbCursor, rootDir, "modifiedFiles WHERE file_hash IS NULL", hashOptions, hashCache, root_id))
+
+def selectFilesToHash(source: str) -> str:
+    """Query for the (file_id, relative_path) of the currentFiles rows in
+    source, a view or table optionally followed by a WHERE clause, which
+    belong to the root given as its parameter. Hard linked paths are
+    ordered together so they fall in the same chunk."""
+    return f"SELECT file_id, relative_path FROM (SELECT * FROM {source}) AS files " \
+        "WHERE root_id = %s ORDER BY device, inode, file_id"
+
+def updatePartialHashesOf(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    source: str,
+    hashCache: HashCache = None,
+    root_id: int = DEFAULT_ROOT_ID,
+    hashOptions: HashOptions = None
+) -> HashUpdateResult:
+    """Partially hashes the currentFiles rows of root root_id in source (see
+    selectFilesToHash) a chunk at a time, taking those it holds from
+    hashCache. Files are read in hashOptions.order and throttled to its
+    limits, as full hashes are."""
+    if hashOptions is None: hashOptions = HashOptions()
+    throttle = sharedThrottle(hashOptions)
+    result = HashUpdateResult()
+    for files_id_path in iterChunks(dbCursor, selectFilesToHash(source), (root_id,)):
+        cached, uncached = applyCachedHashes(
+            dbCursor, rootDir, files_id_path, "currentFiles", hashCache)
+        result.merge(cached)
+        result.merge(updatePartialHashes(
+            dbCursor, rootDir, uncached, "currentFiles", hashCache, hashOptions.order, throttle))
+    return result
+
+def applyCachedHashes(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    files_id_path: List[Tuple[int, str]],
+    table_name: str,
+    hashCache: HashCache = None
+) -> Tuple[HashUpdateResult, List[Tuple[int, str]]]:
+    """Writes the partial and, where known, full hashes hashCache holds for
+    the files, returning the files it has no entry for, which are left
+    untouched."""
+    if hashCache is None or len(files_id_path) == 0: return HashUpdateResult(), files_id_path
+    with metrics.phase('hashCache'):
+        keys = [statKey(Path(rootDir, relative_path)) for _, relative_path in files_id_path]
+        id_partials = []
+        id_hashes = []
+        uncached = []
+        for (file_id, relative_path), cached in zip(files_id_path, hashCache.lookup(keys)):
+            if cached is None:
+                uncached.append((file_id, relative_path))
+                continue
+            id_partials.append((file_id, cached.partial_hash))
+            if cached.file_hash is not None:
+                id_hashes.append((file_id, cached.file_hash))
+        metrics.count('hashCacheHits', len(id_partials))
+        metrics.count('hashCacheMisses', len(uncached))
+    writeFileHashes(dbCursor, id_partials, table_name, "partial_hash")
+    return HashUpdateResult(writeFileHashes(dbCursor, id_hashes, table_name)), uncached
+
+def updatePartialHashes(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    files_id_path: List[Tuple[int, str]],
+    table_name: str,
+    hashCache: HashCache = None,
+    order: str = 'none',
+    throttle: Throttle = None
+) -> HashUpdateResult:
+    """Partially hashes the files, reading them in order and charging the
+    reads to throttle."""
+    result = HashUpdateResult()
+    links = groupHardLinks(dbCursor, files_id_path, table_name)
+    id_hashes = []
+    with metrics.phase('partialHash'):
+        for file_id, relative_path in inDiskOrder(rootDir, links.toRead, order):
+            path = Path(rootDir, relative_path)
+            key = statKey(path) if hashCache is not None else None
+            try:
+                id_hashes.append((file_id, partialHashFile(path, throttle)))
+            except OSError as e:
+                result.errors.append((file_id, relative_path, str(e)))
+                continue
+            if hashCache is not None: hashCache.recordPartial(key, id_hashes[-1][1])
+        if id_hashes: metrics.count('filesPartialHashed', len(id_hashes))
+    result.errors = links.fanOutErrors(result.errors)
+    result.updated = writeFileHashes(dbCursor, links.fanOut(id_hashes), table_name, "partial_hash")
+    return result
 
 def updateFilesHash(
     dbCursor: CursorInterface, 
     rootDir: Path, 
     files_id_path: List[Tuple[int, str]], 
-    table_name: str
-):
-    for file_id, relative_path in files_id_path:
-        file_hash = hashFile(Path(rootDir, relative_path))
-        dbCursor.execute(
-            f"UPDATE {table_name} SET file_hash = %s WHERE file_id = %s",
-            (file_hash, file_id)
-        )
+    table_name: str,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None
+) -> HashUpdateResult:
+    """Hashes the files with the pure Python engine."""
+    if hashOptions is None: hashOptions = HashOptions()
+    with PyHasherSession(
+            hashOptions.workers, hashOptions.bufferSize, order=hashOptions.order,
+            throttle=sharedThrottle(hashOptions)) as session:
+        return sessionUpdateFilesHash(
+            dbCursor, rootDir, files_id_path, table_name, session, hashCache)
 
 def goUpdateFilesHash(
     dbCursor: CursorInterface, 
     rootDir: Path, 
     files_id_path: List[Tuple[int, str]], 
-    table_name: str
-):  
-    relPaths = [path for _, path in files_id_path]
-    absPaths = [str(Path(rootDir,path)) for _, path in files_id_path]
-    hashes = goHashFiles(absPaths)
-
-    for file_path, file_hash in zip(relPaths, hashes):
-        if file_hash[:5] != "Error":
-            dbCursor.execute(
-                f"UPDATE {table_name} SET file_hash = %s WHERE relative_path = %s",
-                (file_hash, file_path)
-            )
+    table_name: str,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None
+) -> HashUpdateResult:
+    """Hashes the files with the Go engine, or with the Python engine where
+    the Go library can't be loaded or hashOptions asks for it."""
+    if len(files_id_path) == 0: return HashUpdateResult()
+    with openHasherSession(hashOptions) as session:
+        return sessionUpdateFilesHash(
+            dbCursor, rootDir, files_id_path, table_name, session, hashCache)
+
+def queryUpdateFilesHash(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    source: str,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None,
+    root_id: int = DEFAULT_ROOT_ID
+) -> HashUpdateResult:
+    """goUpdateFilesHash for the currentFiles rows of root root_id in source
+    (see selectFilesToHash), streamed from the database a chunk at a time."""
+    chunks = iterChunks(dbCursor, selectFilesToHash(source), (root_id,))
+    first = next(chunks, None)
+    if first is None: return HashUpdateResult()
+    with openHasherSession(hashOptions) as session:
+        return streamUpdateFilesHash(
+            dbCursor, rootDir, itertools.chain([first], chunks), "currentFiles", session, hashCache)
+
+def sessionUpdateFilesHash(
+    dbCursor: CursorInterface, 
+    rootDir: Path, 
+    files_id_path: List[Tuple[int, str]], 
+    table_name: str,
+    session: HasherSession,
+    hashCache: HashCache = None
+) -> HashUpdateResult:
+    """streamUpdateFilesHash for a list of files."""
+    return streamUpdateFilesHash(
+        dbCursor, rootDir, chunked(files_id_path, STREAM_CHUNK_SIZE), table_name, session, hashCache)
+
+def streamUpdateFilesHash(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    chunks: Iterable[List[Tuple[int, str]]],
+    table_name: str,
+    session: HasherSession,
+    hashCache: HashCache = None
+) -> HashUpdateResult:
+    """Hashes the files of each chunk with session, writing their hashes to
+    table_name in batches as they complete so that the database writes
+    overlap with the hashing of later files. A chunk is submitted while the
+    previous one is still being hashed, so the workers never run dry, but no
+    more than about two chunks of files are held at once. Hard linked paths
+    within a chunk are read once, their hash written to each. Hashes are
+    recorded in hashCache if given."""
+    result = HashUpdateResult()
+    # Session index -> (file_id, relative_path, absolute path, cache key, links)
+    pending: Dict[int, Tuple[int, str, str, Optional[StatKey], List[Tuple[int, str]]]] = {}
+    id_hashes = []
+
+    def record(index: int, file_hash):
+        file_id, relative_path, absPath, key, linked = pending.pop(index)
+        if isinstance(file_hash, bytes):
+            id_hashes.append((file_id, file_hash))
+            id_hashes.extend((linked_id, file_hash) for linked_id, _ in linked)
+            metrics.count('filesHashed')
+            if metrics.enabled(): metrics.count('bytesHashed', fileSize(absPath))
+            if hashCache is not None: hashCache.recordFull(key, file_hash)
         else:
-            print(file_hash)
+            result.errors.append((file_id, relative_path, file_hash))
+            result.errors.extend(
+                (linked_id, linked_path, file_hash) for linked_id, linked_path in linked)
+        if len(id_hashes) >= HASH_STREAM_BATCH_SIZE:
+            result.updated += writeFileHashes(dbCursor, id_hashes, table_name)
+            id_hashes.clear()
+
+    results = metrics.timedIterator('hash', session.results())
+    for files_id_path in chunks:
+        links = groupHardLinks(dbCursor, files_id_path, table_name)
+        if links.bytesSaved: metrics.count('bytesSavedByHardLinks', links.bytesSaved)
+        result.bytesSaved += links.bytesSaved
+        absPaths = [str(Path(rootDir, path)) for _, path in links.toRead]
+        # Stat before reading, so a file changed while being hashed is cached
+        # under its old mtime and missed next time rather than trusted
+        keys = [statKey(path) for path in absPaths] if hashCache is not None else None
+        firstIndex = session.submit(absPaths)
+        for offset, (file_id, relative_path) in enumerate(links.toRead):
+            pending[firstIndex + offset] = (
+                file_id, relative_path, absPaths[offset], keys[offset] if keys else None,
+                links.links.get(file_id, []))
+        while len(pending) > len(absPaths):
+            record(*next(results))
+    session.closeInput()
+    for index, file_hash in results:
+        record(index, file_hash)
+    result.updated += writeFileHashes(dbCursor, id_hashes, table_name)
+    return result
 
+HASH_STREAM_BATCH_SIZE = 10000
+HASH_UPDATE_BATCH_SIZE = 1000
+
+def writeFileHashes(
+    dbCursor: CursorInterface,
+    id_hashes: List[Tuple[int, bytes]],
+    table_name: str,
+    column: str = "file_hash"
+) -> int:
+    """Sets column (file_hash by default) from each (file_id, hash) pair with
+    set-based updates keyed on file_id. Where the cursor supports COPY the
+    hashes are staged in a temporary table and applied by a single UPDATE,
+    an in-process cursor runs one UPDATE per row through executeMany, and
+    otherwise they are sent as batches of VALUES rows."""
+    if len(id_hashes) == 0: return 0
+    with metrics.phase('dbWrite'):
+        _writeFileHashes(dbCursor, id_hashes, table_name, column)
+    metrics.count('rowsWritten', len(id_hashes))
+    return len(id_hashes)
+
+def _writeFileHashes(
+    dbCursor: CursorInterface,
+    id_hashes: List[Tuple[int, bytes]],
+    table_name: str,
+    column: str
+):
+    if isinstance(dbCursor, CopyCursorInterface):
+        dbCursor.execute(queries.resetHashStaging)
+        dbCursor.copyFrom(
+            IterableReader(copyRows(id_hashes)), "hashStaging", ("file_id", "file_hash"))
+        dbCursor.execute(
+            f"UPDATE {table_name} t SET {column} = s.file_hash "
+            "FROM hashStaging s WHERE t.file_id = s.file_id"
+        )
+        return len(id_hashes)
+
+    if isinstance(dbCursor, BatchCursorInterface):
+        dbCursor.executeMany(
+            f"UPDATE {table_name} SET {column} = %s WHERE file_id = %s",
+            ((file_hash, file_id) for file_id, file_hash in id_hashes))
+        return len(id_hashes)
+
+    for start in range(0, len(id_hashes), HASH_UPDATE_BATCH_SIZE):
+        batch = id_hashes[start:start + HASH_UPDATE_BATCH_SIZE]
+        values = ", ".join(["(%s, %s)"] * len(batch))
+        dbCursor.execute(
+            f"UPDATE {table_name} t SET {column} = v.file_hash "
+            f"FROM (VALUES {values}) AS v(file_id, file_hash) "
+            "WHERE t.file_id = v.file_id",
+            tuple(value for row in batch for value in row)
+        )
+    return len(id_hashes)
+
+
+def updateArchive(dbCursor: CursorInterface):
+    """Applies the moved, modified, new and deleted files to the archive
+    tables, recording them and the duplicates left for the user to resolve
+    in fileClassifications."""
+    dbCursor.execute("CALL reconcileArchive();")
+
+def selectClassified(classification: str, columns: str) -> str:
+    """Query for the files of one classification made by updateArchive."""
+    return f"SELECT {columns} FROM fileClassifications " \
+        f"WHERE classification = '{classification}' ORDER BY file_id"
+
+# Classification of the files listed by each duplicate view
+DUPLICATE_CLASSIFICATIONS = {
+    "duplicateFiles": "duplicate",
+    "duplicatePreviouslyDeletedFiles": "duplicatePreviouslyDeleted",
+}
 
 def prettyPrint(
     dbCursor: ExtendedCursorInterface, 
@@ -156,43 +798,73 @@ def prettyPrint(
         print(i)
     return result
 
+def printHashErrors(result: HashUpdateResult):
+    if len(result.errors) == 0: return
+    print("")
+    print('--- ', f"{len(result.errors)} files could not be hashed", ' ---')
+    for file_id, relative_path, error in result.errors:
+        print((file_id, relative_path, error))
+
+def printHardLinkSavings(result: HashUpdateResult):
+    if result.bytesSaved == 0: return
+    print("")
+    print('--- ', f"{result.bytesSaved} bytes of hard linked files not read again", ' ---')
+
 def printDuplicateInstructions():
     print("Enter:")
     print("k### to keep both files")
     print("r### to remove duplicate file")
     print("kall to keep all in list")
     print("rall to remove all in list")
+    print("n / p for the next / previous page")
     print("skip to decide later")
     print("exit to stop program")
 
 def promptUserDuplicates(
     cursor: ExtendedCursorInterface, 
     query: str, 
-    callbacks: dict[str,Callable]
+    callbacks: dict[str,Callable],
+    pageSize: int = 20
 ):
     """
+    Reviews the duplicates returned by query, as rows of
+    (file_id, relative_path, matched_path, file_hash), from a single snapshot
+    shown a page at a time. Decisions on single files are applied in batches,
+    and all at once when the review ends.
+
     callbacks expected key-value pairs:
         "kall": callable(),
-        "k###": callable(file_id: int),
+        "k[]": callable(file_ids: List[int]),
         "rall": callable(),
-        "r###": callable(file_id: int),
+        "r[]": callable(file_ids: List[int]),
     """
-    while(True):
-        queryResult = cursor.getResult(query)
-        emptyQuery = len(queryResult) == 0
-        if emptyQuery: break
-
-        prettyPrint(cursor, query, queryResult)
-        printDuplicateInstructions()
-
-        command = input(">>>")
-
-        if (command == "exit"): exit()
-        if (command == "skip"): break
-        if   (command == "kall"): callbacks["kall"]()
-        elif (command[0] == "k"): callbacks["k###"](parseIdFromCommand(command))
-        if   (command == "rall"): callbacks["rall"]()
-        elif (command[0] == 'r'): callbacks["r###"](parseIdFromCommand(command))
+    review = DuplicateReview(cursor.getResult(query), callbacks["k[]"], callbacks["r[]"], pageSize)
+    try:
+        while review.undecided > 0:
+            review.printPage()
+            printDuplicateInstructions()
+
+            command = input(">>>")
+
+            if (command == "exit"):
+                review.flush()
+                exit()
+            if (command == "skip"): break
+            if (command == "n"): review.turnPage(1)
+            elif (command == "p"): review.turnPage(-1)
+            elif (command == "kall" or command == "rall"):
+                review.flush()
+                callbacks[command]()
+                review.decideAll(KEEP if command == "kall" else REMOVE)
+            elif (command[:1] == "k"): decideFromCommand(review, command, KEEP)
+            elif (command[:1] == "r"): decideFromCommand(review, command, REMOVE)
+    finally:
+        review.flush()
+
+def decideFromCommand(review: DuplicateReview, command: str, decision: str):
+    file_id = parseIdFromCommand(command)
+    if file_id is not None and not review.decide(file_id, decision):
+        print("~~~ ID not awaiting a decision ~~~")
 
 def parseIdFromCommand(command):
     input_id = None
@@ -202,32 +874,51 @@ def parseIdFromCommand(command):
         print("~~~ Input ID invalid ~~~")
     return input_id
 
-def getDuplicateManagementCallbacks(cursor: ExtendedCursorInterface, duplicateView: str, rootPath: Path):
+def getDuplicateManagementCallbacks(cursor: ExtendedCursorInterface, duplicateView: str, rootPath):
+    """Callbacks for promptUserDuplicates. rootPath is the directory of each
+    root by root_id, or the directory of the default root alone."""
+    roots = rootDirectories(rootPath)
     if duplicateView == "duplicateFiles":
         k_all_proc = "keepAllDuplicates"
         k_id_proc = "keepDuplicate"
+        k_ids_proc = "keepDuplicates"
         r_all_proc = "removeAllDuplicates"
         r_id_proc = "removeDuplicate"
             
     if duplicateView == "duplicatePreviouslyDeletedFiles":
         k_all_proc = "keepAllDuplicatesDeleted"
         k_id_proc = "keepDuplicateDeleted"
+        k_ids_proc = "keepDuplicatesDeleted"
         r_all_proc = "removeAllDuplicatesDeleted"
         r_id_proc = "removeDuplicate"
 
+    classification = DUPLICATE_CLASSIFICATIONS[duplicateView]
+
     def rall():
-        for (relative_path,) in cursor.getResult(f"SELECT relative_path FROM {duplicateView}"):
-            Path(rootPath, relative_path).unlink()
+        for root_id, relative_path in cursor.getResult(
+                "SELECT DISTINCT root_id, relative_path FROM fileClassifications "
+                "WHERE classification = %s", (classification,)
+            ):
+            Path(roots[root_id], relative_path).unlink()
         cursor.execute(f"call {r_all_proc}()")
 
     def r_id(id):
         if id is None: return
-        for (relative_path,) in cursor.getResult(
-                f"SELECT relative_path FROM {duplicateView} WHERE file_id = {id}"
+        for root_id, relative_path in cursor.getResult(
+                "SELECT DISTINCT root_id, relative_path FROM fileClassifications "
+                "WHERE classification = %s AND file_id = %s", (classification, id)
             ):
-            Path(rootPath, relative_path).unlink()
+            Path(roots[root_id], relative_path).unlink()
             cursor.execute(f"call {r_id_proc}(%s)",(id,))
 
+    def r_ids(ids):
+        for root_id, relative_path in cursor.getResult(
+                "SELECT DISTINCT root_id, relative_path FROM fileClassifications "
+                "WHERE classification = %s AND file_id = ANY(%s)", (classification, ids)
+            ):
+            Path(roots[root_id], relative_path).unlink()
+        cursor.execute("call removeDuplicates(%s::bigint[])",(ids,))
+
     def k_id(id):
         if id is None: return
         cursor.execute(f"call {k_id_proc}(%s)",(id,))
@@ -235,8 +926,10 @@ def getDuplicateManagementCallbacks(cursor: ExtendedCursorInterface, duplicateVi
     callbacks = {
             "kall": lambda   : cursor.execute(f"call {k_all_proc}()"),
             "k###": k_id,
+            "k[]": lambda ids: cursor.execute(f"call {k_ids_proc}(%s::bigint[])",(ids,)),
             "rall": rall,
-            "r###": r_id
+            "r###": r_id,
+            "r[]": r_ids
         }
     
     return callbacks
@@ -0,0 +1,203 @@
+"""Per phase instrumentation of update runs.
+
+Code marks out phases with `with metrics.phase(name):` and counts events with
+metrics.count(counter, amount). Both do nothing until enable() installs an
+active MetricsRecorder, after which its report can be written as JSON or as a
+Prometheus textfile.
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+@dataclass
+class PhaseMetrics:
+    seconds: float = 0.0
+    calls: int = 0
+    counters: Dict[str, int] = field(default_factory=dict)
+
+class MetricsRecorder:
+    """Accumulates wall time and counters per phase. Phases may nest, and
+    entering a phase again adds to its totals. Counters are attributed to the
+    innermost active phase of the counting thread as well as to the run as a
+    whole. If profilePhase is given, that phase, whether entered with phase()
+    or timed with timedIterator(), is run under cProfile and the stats of
+    every time it ran are written to profilePath."""
+
+    def __init__(self, enabled: bool = True, profilePhase: str = None, profilePath: Path = None):
+        self.enabled = enabled
+        self.profilePhase = profilePhase
+        self.profilePath = profilePath
+        self.phases: Dict[str, PhaseMetrics] = {}
+        self.totals: Dict[str, int] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profile: Optional[cProfile.Profile] = None
+        self._profileStats: Optional[pstats.Stats] = None
+
+    @property
+    def _active(self) -> List[str]:
+        """The phases the calling thread is in, innermost last."""
+        return self._local.__dict__.setdefault('active', [])
+
+    def _addTime(self, name: str, seconds: float, calls: int = 1):
+        with self._lock:
+            phase = self.phases.setdefault(name, PhaseMetrics())
+            phase.seconds += seconds
+            phase.calls += calls
+
+    def _startProfile(self, name: str) -> Optional[cProfile.Profile]:
+        """A profile to run phase name under, if it is the profiled phase
+        and isn't already being profiled."""
+        with self._lock:
+            if name != self.profilePhase or self._profile is not None: return None
+            self._profile = cProfile.Profile()
+            return self._profile
+
+    def _dumpProfile(self, name: str):
+        """Adds the finished profile to those of earlier runs of the phase and
+        writes them all out."""
+        with self._lock:
+            profile, self._profile = self._profile, None
+            if self._profileStats is None:
+                self._profileStats = pstats.Stats(profile)
+            else:
+                self._profileStats.add(profile)
+            self._profileStats.dump_stats(self.profilePath or f"{name}.prof")
+
+    @contextmanager
+    def phase(self, name: str):
+        profile = self._startProfile(name)
+        if profile is not None: profile.enable()
+        self._active.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._addTime(name, time.perf_counter() - start)
+            self._active.pop()
+            if profile is not None:
+                profile.disable()
+                self._dumpProfile(name)
+
+    def timedIterator(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yields from iterable, adding the time spent waiting on each item to
+        phase name, so a producer can be timed apart from its consumer."""
+        iterator = iter(iterable)
+        waited = 0.0
+        profile = self._startProfile(name)
+        try:
+            while True:
+                start = time.perf_counter()
+                if profile is not None: profile.enable()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    if profile is not None: profile.disable()
+                    waited += time.perf_counter() - start
+                yield item
+        finally:
+            self._addTime(name, waited)
+            if profile is not None: self._dumpProfile(name)
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.totals[counter] = self.totals.get(counter, 0) + amount
+            if self._active:
+                counters = self.phases.setdefault(self._active[-1], PhaseMetrics()).counters
+                counters[counter] = counters.get(counter, 0) + amount
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = {name: asdict(phase) for name, phase in self.phases.items()}
+            totals = dict(self.totals)
+        hashSeconds = phases.get('hash', {}).get('seconds', 0.0)
+        bytesHashed = totals.get('bytesHashed', 0)
+        return {
+            'phases': phases,
+            'totals': totals,
+            'hashThroughputBytesPerSecond': bytesHashed / hashSeconds if hashSeconds else None,
+        }
+
+    def writeJson(self, path: Path):
+        _writeAtomically(path, json.dumps(self.report(), indent=2))
+
+    def writePrometheus(self, path: Path, prefix: str = 'dadft'):
+        """Writes the report in the Prometheus textfile collector format."""
+        report = self.report()
+        lines = [
+            f"# HELP {prefix}_phase_seconds Wall time spent in each phase of the last update run",
+            f"# TYPE {prefix}_phase_seconds gauge",
+        ]
+        lines += [
+            f'{prefix}_phase_seconds{{phase="{name}"}} {phase["seconds"]}'
+            for name, phase in report['phases'].items()]
+        lines += [
+            f"# HELP {prefix}_phase_calls Times each phase was entered in the last update run",
+            f"# TYPE {prefix}_phase_calls gauge",
+        ]
+        lines += [
+            f'{prefix}_phase_calls{{phase="{name}"}} {phase["calls"]}'
+            for name, phase in report['phases'].items()]
+        for counter, value in report['totals'].items():
+            metric = f"{prefix}_{_snakeCase(counter)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        if report['hashThroughputBytesPerSecond'] is not None:
+            metric = f"{prefix}_hash_throughput_bytes_per_second"
+            lines += [f"# TYPE {metric} gauge",
+                      f"{metric} {report['hashThroughputBytesPerSecond']}"]
+        _writeAtomically(path, "\n".join(lines) + "\n")
+
+def _snakeCase(name: str) -> str:
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+def _writeAtomically(path: Path, text: str):
+    # The textfile collector may read at any time, so never expose a partial file
+    temporary = Path(f"{path}.tmp")
+    temporary.write_text(text)
+    os.replace(temporary, path)
+
+recorder = MetricsRecorder(enabled=False)
+
+def enable(profilePhase: str = None, profilePath: Path = None) -> MetricsRecorder:
+    """Starts recording into a new MetricsRecorder, which is returned."""
+    global recorder
+    recorder = MetricsRecorder(True, profilePhase, profilePath)
+    return recorder
+
+def enabled() -> bool:
+    return recorder.enabled
+
+def phase(name: str):
+    if not recorder.enabled: return nullcontext()
+    return recorder.phase(name)
+
+def timedIterator(name: str, iterable: Iterable[T]) -> Iterable[T]:
+    if not recorder.enabled: return iterable
+    return recorder.timedIterator(name, iterable)
+
+def count(counter: str, amount: int = 1):
+    if recorder.enabled: recorder.count(counter, amount)
+
+def countedIterator(counter: str, iterable: Iterable[T]) -> Iterable[T]:
+    """Yields from iterable, counting each item."""
+    if not recorder.enabled: return iterable
+    return _countItems(counter, iterable)
+
+def _countItems(counter: str, iterable: Iterable[T]) -> Iterator[T]:
+    for item in iterable:
+        recorder.count(counter)
+        yield item
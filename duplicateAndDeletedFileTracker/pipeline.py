@@ -0,0 +1,205 @@
+"""Pipelined alternative to loadCurrentFiles followed by the partial hashing
+in updateNewFilesHash.
+
+Walking the archive, partially hashing new path files and writing to the
+database run as concurrent stages. A walker thread lists the tree in chunks,
+a thread pool partially hashes each chunk's new path files, and the calling
+thread, which owns the database connection, writes each chunk and each batch
+of hashes as they arrive. At most maxInFlight files are held between the
+stages at once, so memory stays flat however large the archive is.
+
+The phased hash updates are still run afterwards, and find only what the
+pipeline leaves them: full hashes, modified files and any file whose partial
+hash failed, which they retry and report. Reconciliation therefore sees the
+same tables as in the phased flow.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+from . import metrics, queries
+from .hashCache import HashCache, statKey
+from .hashEngine import sharedThrottle
+from .hashOptions import HashOptions
+from .ioSchedule import Throttle
+from .main import (DEFAULT_ROOT_ID, ROOTED_CURRENT_FILE_COLUMNS, CursorInterface,
+                   HardLinks, HashUpdateResult, applyCachedHashes, chunked,
+                   currentFileRows, groupHardLinks, inDiskOrder, partialHashFile,
+                   withRoot, writeFileHashes, writeRows)
+
+PIPELINE_CHUNK_SIZE = 1000
+PIPELINE_MAX_IN_FLIGHT = 20000
+
+# Kinds of event sent to the database stage
+_FILES, _HASHED, _WALKED, _FAILED = 'files', 'hashed', 'walked', 'failed'
+
+class _Cancelled(Exception): pass
+
+class InFlight:
+    """Counts the files between the stages, blocking acquire while limit are
+    already in flight. A single acquire larger than limit is let through
+    once nothing else is in flight."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.count = 0
+        self.cancelled = False
+        self._condition = threading.Condition()
+
+    def acquire(self, n: int):
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.cancelled or self.count == 0 or self.count + n <= self.limit)
+            if self.cancelled: raise _Cancelled()
+            self.count += n
+
+    def release(self, n: int):
+        with self._condition:
+            self.count -= n
+            self._condition.notify_all()
+
+    def cancel(self):
+        with self._condition:
+            self.cancelled = True
+            self._condition.notify_all()
+
+def _walk(rootDir: Path, chunkSize: int, inFlight: InFlight, events: queue.Queue):
+    try:
+        for chunk in chunked(currentFileRows(rootDir), chunkSize):
+            inFlight.acquire(len(chunk))
+            events.put((_FILES, chunk))
+    except _Cancelled:
+        return
+    except BaseException as e:
+        events.put((_FAILED, e))
+        return
+    events.put((_WALKED, None))
+
+def _partialHash(
+    rootDir: Path,
+    links: HardLinks,
+    withKeys: bool,
+    order: str,
+    throttle: Throttle,
+    events: queue.Queue
+):
+    """Partially hashes the files to be read in order, charging the reads to
+    throttle, and sends the (file_id, hash) pairs and their cache keys to the
+    database stage. Files which can't be read are skipped, to be retried by
+    the phased update."""
+    try:
+        id_hashes = []
+        keys = []
+        for file_id, relative_path in inDiskOrder(rootDir, links.toRead, order):
+            path = Path(rootDir, relative_path)
+            key = statKey(path) if withKeys else None
+            try:
+                id_hashes.append((file_id, partialHashFile(path, throttle)))
+            except OSError:
+                continue
+            keys.append(key)
+        events.put((_HASHED, (links, id_hashes, keys)))
+    except BaseException as e:
+        events.put((_FAILED, e))
+
+NEW_FILES_IN_RANGE = """
+    SELECT file_id, relative_path FROM newPathFilesWithoutHash
+    WHERE partial_hash IS NULL AND root_id = %s AND file_id > %s AND file_id <= %s
+    ORDER BY file_id
+"""
+
+def pipelinedLoadCurrentFiles(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None,
+    chunkSize: int = PIPELINE_CHUNK_SIZE,
+    maxInFlight: int = PIPELINE_MAX_IN_FLIGHT,
+    root_id: int = DEFAULT_ROOT_ID
+) -> HashUpdateResult:
+    """Replaces the files of root root_id in currentFiles with those under rootDir, as
+    loadCurrentFiles does, while partially hashing the new path files among
+    them on hashOptions.workers threads, in its order and within its limits.
+    Hashes found in hashCache are used instead of reading the file, and
+    those read are recorded in it."""
+    if hashOptions is None: hashOptions = HashOptions()
+    throttle = sharedThrottle(hashOptions)
+    result = HashUpdateResult()
+    events = queue.Queue()
+    inFlight = InFlight(maxInFlight)
+    walker = threading.Thread(
+        target=_walk, args=(rootDir, chunkSize, inFlight, events), daemon=True)
+    hashers = ThreadPoolExecutor(hashOptions.workers or None)
+
+    with metrics.phase('pipeline'):
+        dbCursor.execute(queries.resetRootCurrentFiles, (root_id,))
+        dbCursor.execute(queries.resetRootCurrentDirectories, (root_id,))
+        lastFileId = _maxFileId(dbCursor)
+        walking, hashing = True, 0
+        walker.start()
+        try:
+            while walking or hashing:
+                kind, payload = events.get()
+                if kind == _FAILED:
+                    raise payload
+                if kind == _WALKED:
+                    walking = False
+                elif kind == _FILES:
+                    writeRows(dbCursor, "currentFiles", ROOTED_CURRENT_FILE_COLUMNS,
+                              withRoot(root_id, payload))
+                    metrics.count('rowsWritten', len(payload))
+                    newFiles, lastFileId = _newFilesSince(
+                        dbCursor, rootDir, root_id, lastFileId, hashCache, result)
+                    inFlight.release(len(payload) - len(newFiles))
+                    if newFiles:
+                        hashing += 1
+                        links = groupHardLinks(dbCursor, newFiles, "currentFiles")
+                        hashers.submit(
+                            _partialHash, rootDir, links, hashCache is not None,
+                            hashOptions.order, throttle, events)
+                else:
+                    hashing -= 1
+                    links, id_hashes, keys = payload
+                    if hashCache is not None:
+                        for key, (_, partial_hash) in zip(keys, id_hashes):
+                            hashCache.recordPartial(key, partial_hash)
+                    if id_hashes: metrics.count('filesPartialHashed', len(id_hashes))
+                    result.updated += writeFileHashes(
+                        dbCursor, links.fanOut(id_hashes), "currentFiles", "partial_hash")
+                    inFlight.release(len(links.toRead) + sum(map(len, links.links.values())))
+        except BaseException:
+            inFlight.cancel()
+            raise
+        finally:
+            hashers.shutdown(wait=True, cancel_futures=True)
+            walker.join()
+        dbCursor.execute(queries.analyzeCurrentFiles)
+    return result
+
+def _maxFileId(dbCursor: CursorInterface) -> int:
+    dbCursor.execute("SELECT coalesce(max(file_id), 0) FROM currentFiles")
+    return dbCursor.fetchall()[0][0]
+
+def _newFilesSince(
+    dbCursor: CursorInterface,
+    rootDir: Path,
+    root_id: int,
+    lastFileId: int,
+    hashCache: HashCache,
+    result: HashUpdateResult
+) -> Tuple[List[Tuple[int, str]], int]:
+    """The new path files of root root_id written since lastFileId still
+    needing a partial hash once hashCache's have been applied, and the new
+    last file_id."""
+    maxFileId = _maxFileId(dbCursor)
+    dbCursor.execute(NEW_FILES_IN_RANGE, (root_id, lastFileId, maxFileId))
+    newFiles = dbCursor.fetchall()
+    if hashCache is not None and newFiles:
+        cached, newFiles = applyCachedHashes(
+            dbCursor, rootDir, newFiles, "currentFiles", hashCache)
+        result.merge(cached)
+    return newFiles, maxFileId
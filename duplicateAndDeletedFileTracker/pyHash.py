@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Tuple, Union
+
+from .ioSchedule import Throttle, diskOrder
+
+DEFAULT_BUFFER_SIZE = 256 * 1024
+# Files at least this large are hashed from a memory map in a single update
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+def hashFileInto(
+    path,
+    buffer: bytearray,
+    mmapThreshold: int = MMAP_THRESHOLD,
+    throttle: Throttle = None
+) -> bytes:
+    """Returns the raw SHA-256 digest of the file at path. Small files are
+    read into buffer, which is reused between calls; large files are mapped
+    into memory instead, unless each read is to be charged to throttle.
+    hashlib releases the GIL while hashing either."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb', buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        if size >= mmapThreshold > 0 and throttle is None:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sha256.update(mapped)
+            return sha256.digest()
+
+        view = memoryview(buffer)
+        while True:
+            n = file.readinto(buffer)
+            if not n:
+                break
+            if throttle is not None: throttle.take(n)
+            sha256.update(view[:n])
+    return sha256.digest()
+
+class PyHasherSession:
+    """Pure Python equivalent of goInterface.GoHasherSession, hashing files
+    on a thread pool. Used where the Go library can't be loaded. Each
+    submitted chunk is read in order (see ioSchedule.ORDERS), charging the
+    reads to throttle."""
+
+    _inputClosed = object()
+
+    def __init__(
+        self,
+        workers: int = 0,
+        bufferSize: int = 0,
+        mmapThreshold: int = MMAP_THRESHOLD,
+        order: str = 'none',
+        throttle: Throttle = None
+    ):
+        self.executor = ThreadPoolExecutor(workers or 2 * (os.cpu_count() or 1))
+        self.bufferSize = bufferSize or DEFAULT_BUFFER_SIZE
+        self.mmapThreshold = mmapThreshold
+        self.order = order
+        self.throttle = throttle
+        self.submitted = 0
+        self._local = threading.local()
+        self._results = queue.Queue()
+        self._closed = False
+
+    def _hash(self, index: int, path: str):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = bytearray(self.bufferSize)
+        try:
+            file_hash = hashFileInto(path, buffer, self.mmapThreshold, self.throttle)
+        except (OSError, ValueError) as e:
+            file_hash = f"Error: {e}"
+        self._results.put((index, file_hash))
+
+    def submit(self, filePaths: List[str]) -> int:
+        """Queues filePaths for hashing, returning the index of the first.
+        Indices follow the order given, whatever order the files are read in."""
+        firstIndex = self.submitted
+        for i in diskOrder(filePaths, self.order):
+            self.executor.submit(self._hash, firstIndex + i, filePaths[i])
+        self.submitted += len(filePaths)
+        return firstIndex
+
+    def closeInput(self):
+        self._closed = True
+        self._results.put(self._inputClosed)
+
+    def results(self) -> Iterator[Tuple[int, Union[bytes, str]]]:
+        """Yields (index, hash) for each file in completion order, where hash
+        is the raw digest or an error message starting with "Error:"."""
+        delivered = 0
+        while not (self._closed and delivered == self.submitted):
+            result = self._results.get()
+            if result is self._inputClosed: continue
+            delivered += 1
+            yield result
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> PyHasherSession:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def pyHashFiles(
+    filePaths: List[str],
+    workers: int = 0,
+    bufferSize: int = 0,
+    order: str = 'none',
+    bytesPerSecond: int = 0,
+    iops: int = 0
+) -> List[Union[bytes, str]]:
+    """Same contract as goInterface.goHashFiles."""
+    hashes = [None] * len(filePaths)
+    with PyHasherSession(
+            workers, bufferSize, order=order,
+            throttle=Throttle.limiting(bytesPerSecond, iops)) as session:
+        session.submit(filePaths)
+        session.closeInput()
+        for index, file_hash in session.results():
+            hashes[index] = file_hash
+    return hashes
@@ -1,7 +1,45 @@
+from functools import lru_cache
 from importlib.resources import files
+
 from . import sql
 
 selectAllCurrentFiles = "SELECT * FROM currentFiles;"
 resetCurrentFiles = "DELETE FROM currentFiles;"
-resetAllTables = files(sql).joinpath('resetAllTables.sql').read_text()
-resetViewAndProcs = files(sql).joinpath('resetViewsAndProcs.sql').read_text()
\ No newline at end of file
+resetCurrentDirectories = "DELETE FROM currentDirectories;"
+resetRootCurrentFiles = "DELETE FROM currentFiles WHERE root_id = %s;"
+resetRootCurrentDirectories = "DELETE FROM currentDirectories WHERE root_id = %s;"
+resetScannedFiles = """
+    CREATE TEMP TABLE IF NOT EXISTS scannedFiles (
+        relative_path VARCHAR, modified TIMESTAMP(0), file_size BIGINT,
+        device BIGINT, inode BIGINT);
+    TRUNCATE scannedFiles;
+"""
+resetHashStaging = """
+    CREATE TEMP TABLE IF NOT EXISTS hashStaging (file_id BIGINT, file_hash BYTEA);
+    TRUNCATE hashStaging;
+"""
+analyzeCurrentFiles = "ANALYZE currentFiles;"
+selectSchemaVersion = """
+    CREATE TABLE IF NOT EXISTS schemaVersion (
+        version INTEGER NOT NULL PRIMARY KEY, applied TIMESTAMP(0));
+    SELECT coalesce(max(version), 0) FROM schemaVersion;
+"""
+recordSchemaVersion = "INSERT INTO schemaVersion (version, applied) VALUES (%s, %s);"
+
+# The longer scripts are read from sql when first used, as most runs only
+# need the version check above
+SCRIPTS = {
+    'resetAllTables': 'resetAllTables.sql',
+    'upgradeSchema': 'upgradeSchema.sql',
+    'resetViewAndProcs': 'resetViewsAndProcs.sql',
+    'applyScannedFiles': 'applyScannedFiles.sql',
+}
+
+@lru_cache(maxsize=None)
+def readScript(name: str) -> str:
+    return files(sql).joinpath(name).read_text()
+
+def __getattr__(name: str) -> str:
+    if name in SCRIPTS:
+        return readScript(SCRIPTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,116 @@
+"""Several archive roots tracked in one database.
+
+Each root is a directory registered by name in archiveRoots, and every file
+row carries the root_id of the root it was found under. Paths are compared
+within a root, so the same relative path under two roots is two files, while
+hashes are compared across all of them, so a file copied from one root to
+another is found as a duplicate and one moved between them as moved.
+
+updateRoots brings currentFiles and its hashes up to date for every root,
+each on its own connection so roots on different disks are walked and hashed
+side by side. Which new files need a full hash depends on the partial hashes
+of every root's new files, so each stage is finished for all roots, and
+committed, before the next starts.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict
+
+from . import metrics
+from .hashCache import HashCache
+from .hashOptions import HashOptions
+from .main import (CursorInterface, HashUpdateResult, loadCurrentFiles,
+                   openConnection, updateCurrentFiles, updateDeferredArchiveHashes,
+                   updateModifiedFilesHash, updateNewFilesFullHash, updateNewFilesPartialHash)
+from .pipeline import pipelinedLoadCurrentFiles
+
+# Name of the root rows from before several roots could be tracked belong to
+DEFAULT_ROOT_NAME = 'default'
+
+REGISTER_ROOTS = """
+    INSERT INTO archiveRoots (name)
+    SELECT name FROM unnest(%s::varchar[]) AS roots(name)
+    WHERE name NOT IN (SELECT name FROM archiveRoots)
+"""
+SELECT_ROOTS = "SELECT root_id, name FROM archiveRoots WHERE name = ANY(%s::varchar[])"
+
+def configuredRoots(config) -> Dict[str, Path]:
+    """The directory of each root by name: config.roots, or config.rootPath
+    as the default root."""
+    roots = getattr(config, 'roots', None)
+    if roots: return {name: Path(rootDir) for name, rootDir in roots.items()}
+    return {DEFAULT_ROOT_NAME: Path(config.rootPath)}
+
+def registerRoots(dbCursor: CursorInterface, roots: Dict[str, Path]) -> Dict[int, Path]:
+    """Adds the roots not yet in archiveRoots, returning the directory of
+    each by root_id."""
+    names = list(roots)
+    dbCursor.execute(REGISTER_ROOTS, (names,))
+    dbCursor.execute(SELECT_ROOTS, (names,))
+    return {root_id: roots[name] for root_id, name in dbCursor.fetchall()}
+
+def qualifiedPath(rootColumn: str, pathColumn: str) -> str:
+    """SQL for a path prefixed with its root_id, to tell apart the paths of
+    different roots when listing them."""
+    return f"CAST({rootColumn} AS VARCHAR) || ':' || {pathColumn}"
+
+def updateRoots(
+    connect: dict,
+    roots: Dict[int, Path],
+    hashOptions: HashOptions = None,
+    hashCache: HashCache = None,
+    incremental: bool = False,
+    pipelined: bool = False
+) -> HashUpdateResult:
+    """Loads the files of every root in roots into currentFiles, with
+    updateCurrentFiles if incremental, pipelinedLoadCurrentFiles if
+    pipelined or loadCurrentFiles otherwise, and hashes them as
+    updateNewFilesHash and updateModifiedFilesHash do.
+
+    The roots are updated side by side on connections opened with connect.
+    An SQLite database takes one writer at a time, so there they are updated
+    one after another."""
+    def load(cursor: CursorInterface, root_id: int, rootDir: Path) -> HashUpdateResult:
+        result = HashUpdateResult()
+        if incremental:
+            updateCurrentFiles(cursor, rootDir, root_id)
+        elif pipelined:
+            result = pipelinedLoadCurrentFiles(
+                cursor, rootDir, hashOptions, hashCache, root_id=root_id)
+        else:
+            loadCurrentFiles(cursor, rootDir, root_id)
+        with metrics.phase('updateHashes'):
+            return result.merge(
+                updateNewFilesPartialHash(cursor, rootDir, hashCache, root_id, hashOptions))
+
+    def fullHash(cursor: CursorInterface, root_id: int, rootDir: Path) -> HashUpdateResult:
+        with metrics.phase('updateHashes'):
+            result = updateNewFilesFullHash(cursor, rootDir, hashOptions, hashCache, root_id)
+            return result.merge(
+                updateModifiedFilesHash(cursor, rootDir, hashOptions, hashCache, root_id))
+
+    def deferredHash(cursor: CursorInterface, root_id: int, rootDir: Path) -> HashUpdateResult:
+        with metrics.phase('updateHashes'):
+            return updateDeferredArchiveHashes(cursor, rootDir, hashOptions, hashCache, root_id)
+
+    result = HashUpdateResult()
+    workers = 1 if 'sqlite' in connect else len(roots)
+    with ThreadPoolExecutor(max(workers, 1)) as executor:
+        for stage in (load, fullHash, deferredHash):
+            for rootResult in executor.map(
+                    lambda root: _inTransaction(connect, stage, *root), roots.items()):
+                result.merge(rootResult)
+    with openConnection(connect) as cursor:
+        cursor.execute("CALL updateArchiveDeferredHashes();")
+    return result
+
+def _inTransaction(
+    connect: dict,
+    stage: Callable[[CursorInterface, int, Path], HashUpdateResult],
+    root_id: int,
+    rootDir: Path
+) -> HashUpdateResult:
+    with openConnection(connect) as cursor:
+        return stage(cursor, root_id, rootDir)
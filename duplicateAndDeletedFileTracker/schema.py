@@ -0,0 +1,61 @@
+"""Versioned schema, so a run only pays for DDL the database hasn't seen.
+
+The version a database has reached is recorded in schemaVersion, and migrate
+applies the scripts of the later versions in MIGRATIONS, in order, within
+the caller's transaction. A database already up to date costs a single
+version check, taking no locks on the archive tables.
+
+Any change to the sql scripts needs a new entry appended to MIGRATIONS:
+upgradeSchema.sql is safe to rerun on any database, and resetViewsAndProcs.sql
+recreates every view and procedure, so rerunning either at a new version
+brings the database up to date.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Tuple
+
+from . import queries
+from .main import CursorInterface
+
+# (version, name of the script in queries), in the order they're applied
+MIGRATIONS: List[Tuple[int, str]] = [
+    # Databases from before schemaVersion existed start at version 0, and
+    # are brought up to date by the scripts each run used to apply
+    (1, 'upgradeSchema'),
+    (2, 'resetViewAndProcs'),
+    # Several archive roots: root_id on the file tables and archiveRoots
+    (3, 'upgradeSchema'),
+    (4, 'resetViewAndProcs'),
+    # Deferred hashes only taken from the file itself, and the full hash
+    # fallback for unsized archived files limited to their extension
+    (5, 'resetViewAndProcs'),
+    # Deleted and duplicate files classified without re-evaluating movedFiles
+    (6, 'resetViewAndProcs'),
+    # Files archived with only a partial hash matched when moved or deleted
+    (7, 'resetViewAndProcs'),
+    # Unsized archived and deleted files matched whatever their extension
+    (8, 'resetViewAndProcs'),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schemaVersion(dbCursor: CursorInterface) -> int:
+    """The last version applied to the database, 0 if none has been."""
+    dbCursor.execute(queries.selectSchemaVersion)
+    return dbCursor.fetchall()[0][0]
+
+def migrate(dbCursor: CursorInterface) -> List[int]:
+    """Applies the migrations the database is missing, returning their
+    versions."""
+    current = schemaVersion(dbCursor)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this version of the "
+            f"package supports ({SCHEMA_VERSION})")
+    applied = []
+    for version, script in MIGRATIONS:
+        if version <= current: continue
+        dbCursor.execute(getattr(queries, script))
+        dbCursor.execute(queries.recordSchemaVersion, (version, datetime.now()))
+        applied.append(version)
+    return applied
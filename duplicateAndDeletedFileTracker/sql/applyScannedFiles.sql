@@ -0,0 +1,41 @@
+-- Applies an incremental scan of the root root_id, staged in scannedFiles,
+-- to currentFiles.
+-- The staleDirectories parameter holds every directory which was rescanned or
+-- no longer exists, as a relative path ending in the path separator sep, or ''
+-- for the root.
+
+-- Files in a stale directory which the scan didn't find there
+DELETE FROM currentFiles curr
+WHERE curr.root_id = %(root_id)s
+AND (CASE WHEN strpos(reverse(curr.relative_path), %(sep)s) = 0 THEN ''
+	ELSE left(curr.relative_path,
+		length(curr.relative_path) - strpos(reverse(curr.relative_path), %(sep)s) + 1)
+	END) = ANY(%(staleDirectories)s)
+AND NOT EXISTS (
+	SELECT 1 FROM scannedFiles s WHERE s.relative_path = curr.relative_path);
+
+-- Files which have changed since they were recorded need hashing again
+UPDATE currentFiles curr
+SET modified = s.modified, file_size = s.file_size, file_hash = NULL, partial_hash = NULL
+FROM scannedFiles s
+WHERE curr.root_id = %(root_id)s
+AND s.relative_path = curr.relative_path
+AND (curr.modified IS DISTINCT FROM s.modified OR curr.file_size IS DISTINCT FROM s.file_size);
+
+-- Device and inode numbers, which can change while the mtime and size don't
+UPDATE currentFiles curr
+SET device = s.device, inode = s.inode
+FROM scannedFiles s
+WHERE curr.root_id = %(root_id)s
+AND s.relative_path = curr.relative_path
+AND (curr.device IS DISTINCT FROM s.device OR curr.inode IS DISTINCT FROM s.inode);
+
+INSERT INTO currentFiles (root_id, relative_path, modified, file_size, device, inode)
+SELECT %(root_id)s, s.relative_path, s.modified, s.file_size, s.device, s.inode
+FROM scannedFiles s
+WHERE NOT EXISTS (
+	SELECT 1 FROM currentFiles curr
+	WHERE curr.root_id = %(root_id)s AND curr.relative_path = s.relative_path);
+
+DELETE FROM currentDirectories
+WHERE root_id = %(root_id)s AND relative_path = ANY(%(staleDirectories)s);
@@ -1,25 +1,29 @@
 DROP TABLE IF EXISTS currentFiles CASCADE;
 DROP TABLE IF EXISTS archiveFiles CASCADE;
 DROP TABLE IF EXISTS archiveDeletedFiles CASCADE;
+DROP TABLE IF EXISTS currentDirectories CASCADE;
+DROP TABLE IF EXISTS fileClassifications CASCADE;
+DROP TABLE IF EXISTS archiveRoots;
+DROP TABLE IF EXISTS schemaVersion;
 
 CREATE TABLE archiveFiles (
     file_id BIGSERIAL NOT NULL PRIMARY KEY, 
 	relative_path VARCHAR NOT NULL,
-	file_hash CHAR(64),
+	file_hash BYTEA,
 	modified TIMESTAMP(0)
 );
 
 CREATE TABLE currentFiles (
 	file_id BIGSERIAL NOT NULL PRIMARY KEY, 
 	relative_path VARCHAR NOT NULL,
-	file_hash CHAR(64),
+	file_hash BYTEA,
 	modified TIMESTAMP(0)
 );
 
 CREATE TABLE archiveDeletedFiles (
 	file_id BIGSERIAL NOT NULL PRIMARY KEY,
 	relative_path VARCHAR NOT NULL,
-	file_hash CHAR(64),
+	file_hash BYTEA,
 	modified TIMESTAMP(0),
 	deleteDetected TIMESTAMP(0)
 );
\ No newline at end of file
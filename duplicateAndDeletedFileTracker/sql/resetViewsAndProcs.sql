@@ -1,8 +1,34 @@
+-- Views are dropped rather than replaced so that columns added to the tables
+-- by upgradeSchema.sql can change the shape of the views built on them
+DROP VIEW IF EXISTS
+	newPathFiles,
+	newPathFilesWithoutHash,
+	fullHashCandidateFiles,
+	deferredArchiveFilesOnDisk,
+	newUnseenFiles,
+	hashMatchesArchiveFiles,
+	partialMatchesArchiveFiles,
+	movedFiles,
+	duplicateFiles,
+	modifiedFiles,
+	modifiedMetaFiles,
+	modifiedContentsFiles,
+	deletedFiles,
+	duplicatePreviouslyDeletedFiles,
+	duplicatesInArchive
+CASCADE;
+
+DROP FUNCTION IF EXISTS file_extension(VARCHAR);
+
+-- Paths are only compared within a root, while hashes, sizes and partial
+-- hashes are compared across every root, so a file is matched with its
+-- copies on other roots as well as its own
+
 -- Current files whose relative_path doesn't match a file in archiveFiles
 CREATE OR REPLACE VIEW newPathFiles AS
 SELECT curr.*
 FROM currentFiles curr
-LEFT JOIN archiveFiles arch USING (relative_path)
+LEFT JOIN archiveFiles arch USING (root_id, relative_path)
 WHERE arch.relative_path IS NULL;
 
 CREATE OR REPLACE VIEW newPathFilesWithoutHash AS 
@@ -10,6 +36,57 @@ SELECT *
 FROM newPathFiles
 WHERE file_hash IS NULL;
 
+-- New path files which share their size and partial hash with an archived,
+-- deleted or other new path file, and so need a full hash to be told apart.
+-- Files archived before sizes were recorded, and not sized since, can only be
+-- told apart by full hash, so while any remain every new file is hashed.
+CREATE OR REPLACE VIEW fullHashCandidateFiles AS
+SELECT new.*
+FROM newPathFilesWithoutHash new
+WHERE new.partial_hash IS NULL
+	OR EXISTS (
+		SELECT 1 FROM archiveFiles arch
+		WHERE arch.file_size = new.file_size
+		AND (arch.partial_hash = new.partial_hash OR arch.partial_hash IS NULL))
+	OR EXISTS (
+		SELECT 1 FROM archiveDeletedFiles archDel
+		WHERE archDel.file_size = new.file_size
+		AND (archDel.partial_hash = new.partial_hash OR archDel.partial_hash IS NULL))
+	OR EXISTS (
+		SELECT 1 FROM newPathFiles other
+		WHERE other.file_size = new.file_size
+		AND other.partial_hash = new.partial_hash
+		AND other.file_id <> new.file_id)
+	OR EXISTS (
+		SELECT 1 FROM archiveFiles arch
+		WHERE arch.file_size IS NULL)
+	OR EXISTS (
+		SELECT 1 FROM archiveDeletedFiles archDel
+		WHERE archDel.file_size IS NULL);
+
+-- Unchanged current files at the path of an archived file which was never
+-- fully hashed, now that a new path file with the same size and partial hash
+-- has been found
+CREATE OR REPLACE VIEW deferredArchiveFilesOnDisk AS
+SELECT curr.*
+FROM currentFiles curr
+INNER JOIN archiveFiles arch
+	ON curr.root_id = arch.root_id
+	AND curr.relative_path = arch.relative_path
+	AND curr.modified = arch.modified
+WHERE arch.file_hash IS NULL
+	AND curr.file_hash IS NULL
+	AND EXISTS (
+		SELECT 1 FROM newPathFiles new
+		WHERE new.file_hash IS NOT NULL
+		AND new.file_size = arch.file_size
+		AND new.partial_hash = arch.partial_hash);
+
+-- New path files which were either hashed without matching any archived or
+-- deleted file, or ruled out from matching by their size and partial hash.
+-- Those sharing their size and partial hash with an archived or deleted file
+-- which was never fully hashed are left to movedFiles and
+-- duplicatePreviouslyDeletedFiles.
 CREATE OR REPLACE VIEW newUnseenFiles AS
 SELECT new.*
 FROM newPathFiles new
@@ -17,36 +94,69 @@ LEFT JOIN archiveFiles arch USING (file_hash)
 LEFT JOIN archiveDeletedFiles archDel USING (file_hash)
 WHERE arch.file_hash IS NULL
 	AND archDel.file_hash IS NULL
-	AND new.file_hash IS NOT NULL;
+	AND (new.file_hash IS NOT NULL OR new.partial_hash IS NOT NULL)
+	AND NOT EXISTS (
+		SELECT 1 FROM archiveFiles arch
+		WHERE arch.file_hash IS NULL
+		AND arch.file_size = new.file_size
+		AND arch.partial_hash = new.partial_hash)
+	AND NOT EXISTS (
+		SELECT 1 FROM archiveDeletedFiles archDel
+		WHERE archDel.file_hash IS NULL
+		AND archDel.file_size = new.file_size
+		AND archDel.partial_hash = new.partial_hash);
 
 -- New path files whose hash matches an existing file
 CREATE OR REPLACE VIEW hashMatchesArchiveFiles AS
-SELECT new.*, arch.relative_path as original_path
+SELECT new.*, arch.root_id as original_root_id, arch.relative_path as original_path
 FROM newPathFiles new
 INNER JOIN archiveFiles arch USING (file_hash);
 
+-- New path files sharing their size and partial hash with an archived file
+-- which was never fully hashed. The archived file was hashed from disk if it
+-- was still there, so these only stand for it when it has been moved away.
+CREATE OR REPLACE VIEW partialMatchesArchiveFiles AS
+SELECT new.*, arch.root_id as original_root_id, arch.relative_path as original_path
+FROM newPathFiles new
+INNER JOIN archiveFiles arch
+	ON arch.file_size = new.file_size
+	AND arch.partial_hash = new.partial_hash
+WHERE arch.file_hash IS NULL;
+
 CREATE OR REPLACE VIEW movedFiles as
-SELECT hm.file_id, hm.relative_path, hm.file_hash, hm.modified, hm.original_path
+SELECT hm.file_id, hm.root_id, hm.relative_path, hm.file_hash, hm.modified,
+	hm.original_root_id, hm.original_path, hm.file_size, hm.partial_hash
 FROM hashMatchesArchiveFiles hm
 LEFT JOIN currentFiles curr
-	ON hm.original_path = curr.relative_path
+	ON hm.original_root_id = curr.root_id
+	AND hm.original_path = curr.relative_path
 WHERE curr.relative_path IS NULL
-OR curr.file_hash <> hm.file_hash; -- New file at orignal location edge case
+OR curr.file_hash <> hm.file_hash -- New file at orignal location edge case
+UNION ALL
+SELECT pm.file_id, pm.root_id, pm.relative_path, pm.file_hash, pm.modified,
+	pm.original_root_id, pm.original_path, pm.file_size, pm.partial_hash
+FROM partialMatchesArchiveFiles pm
+LEFT JOIN currentFiles curr
+	ON pm.original_root_id = curr.root_id
+	AND pm.original_path = curr.relative_path
+WHERE curr.relative_path IS NULL;
 
 CREATE OR REPLACE VIEW duplicateFiles as
 SELECT hashMatch.*
 FROM hashMatchesArchiveFiles hashMatch
 LEFT JOIN movedFiles moved
-	ON hashMatch.original_path = moved.original_path
+	ON hashMatch.original_root_id = moved.original_root_id
+	AND hashMatch.original_path = moved.original_path
 WHERE moved.original_path IS NULL;
 
 -- Files where "modified" has changed compared to file in archiveFiles with 
--- 	same relative_path
+-- 	same root and relative_path
 CREATE OR REPLACE VIEW modifiedFiles AS
 SELECT curr.*, arch.file_id as arch_id, arch.file_hash as arch_hash, arch.modified as arch_modified
 FROM currentFiles curr
 INNER JOIN archiveFiles arch
-	ON curr.relative_path = arch.relative_path
+	ON curr.root_id = arch.root_id
+	AND curr.relative_path = arch.relative_path
 WHERE
 	curr.modified <> arch.modified;
 
@@ -62,82 +172,293 @@ CREATE OR REPLACE VIEW deletedFiles AS
 SELECT arch.* 
 FROM archiveFiles arch
 LEFT JOIN currentFiles curr
-	ON arch.relative_path = curr.relative_path
+	ON arch.root_id = curr.root_id
+	AND arch.relative_path = curr.relative_path
 LEFT JOIN movedFiles mv
-	ON arch.relative_path = mv.original_path
+	ON arch.root_id = mv.original_root_id
+	AND arch.relative_path = mv.original_path
 WHERE curr.relative_path IS NULL
 AND mv.original_path IS NULL;
 
+-- Current files matching a deleted file by hash, or new path files matching
+-- by size and partial hash a deleted file which was never fully hashed
 CREATE OR REPLACE VIEW duplicatePreviouslyDeletedFiles AS
-SELECT curr.*, archDel.relative_path as previously_deleted_path
+SELECT curr.*, archDel.root_id as previously_deleted_root_id,
+	archDel.relative_path as previously_deleted_path
 FROM currentFiles curr
 INNER JOIN archiveDeletedFiles archDel
-	ON archDel.file_hash = curr.file_hash;
+	ON archDel.file_hash = curr.file_hash
+UNION ALL
+SELECT new.*, archDel.root_id as previously_deleted_root_id,
+	archDel.relative_path as previously_deleted_path
+FROM newPathFiles new
+INNER JOIN archiveDeletedFiles archDel
+	ON archDel.file_size = new.file_size
+	AND archDel.partial_hash = new.partial_hash
+WHERE archDel.file_hash IS NULL;
 
 CREATE OR REPLACE VIEW duplicatesInArchive AS
-SELECT arch1.*, arch2.relative_path as duplicate_path
+SELECT arch1.*, arch2.root_id as duplicate_root_id, arch2.relative_path as duplicate_path
 FROM archiveFiles arch1
 INNER JOIN archiveFiles arch2 USING (file_hash)
 WHERE arch1.file_id <> arch2.file_id;
 
+-- Archived files of root recorded before sizes were tracked take the size of
+-- the unchanged file still at their path
+DROP PROCEDURE IF EXISTS updateArchiveFileSizes();
+CREATE OR REPLACE PROCEDURE updateArchiveFileSizes(root int)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	UPDATE archiveFiles arch
+	SET file_size = curr.file_size
+	FROM currentFiles curr
+	WHERE arch.root_id = root
+	AND curr.root_id = root
+	AND arch.relative_path = curr.relative_path
+	AND arch.modified = curr.modified
+	AND arch.file_size IS NULL;
+END; $$;
+
+-- Gives a full hash to archived files which were never fully hashed and are
+-- still on disk. Those which can no longer be read stay without one, and are
+-- matched by size and partial hash once moved or deleted. Archived and
+-- deleted files recorded before sizes were tracked take the size and partial
+-- hash of a file with the same full hash.
+CREATE OR REPLACE PROCEDURE updateArchiveDeferredHashes()
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	-- Take the hash read from deferredArchiveFilesOnDisk
+	UPDATE archiveFiles arch
+	SET file_hash = curr.file_hash
+	FROM currentFiles curr
+	WHERE arch.root_id = curr.root_id
+	AND arch.relative_path = curr.relative_path
+	AND arch.modified = curr.modified
+	AND arch.file_hash IS NULL
+	AND curr.file_hash IS NOT NULL;
+
+	UPDATE archiveFiles arch
+	SET file_size = curr.file_size, partial_hash = curr.partial_hash
+	FROM currentFiles curr
+	WHERE arch.file_size IS NULL
+	AND curr.file_hash = arch.file_hash
+	AND curr.file_size IS NOT NULL;
+
+	UPDATE archiveDeletedFiles archDel
+	SET file_size = curr.file_size, partial_hash = curr.partial_hash
+	FROM currentFiles curr
+	WHERE archDel.file_size IS NULL
+	AND curr.file_hash = archDel.file_hash
+	AND curr.file_size IS NOT NULL;
+
+	UPDATE archiveDeletedFiles archDel
+	SET file_size = arch.file_size, partial_hash = arch.partial_hash
+	FROM archiveFiles arch
+	WHERE archDel.file_size IS NULL
+	AND arch.file_hash = archDel.file_hash
+	AND arch.file_size IS NOT NULL;
+END; $$;
+
+-- Each updateArchive* procedure first records the files it applies to in
+-- fileClassifications, evaluating its view once, then updates the archive
+-- from that table. They are called in order by reconcileArchive, each seeing
+-- the archive as left by the one before.
 CREATE OR REPLACE PROCEDURE updateArchiveMovedFiles() 
 LANGUAGE plpgsql
 AS $$
 BEGIN
+	DELETE FROM fileClassifications WHERE classification = 'moved';
+	INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+		file_hash, modified, file_size, partial_hash, matched_root_id, matched_path)
+	SELECT 'moved', file_id, root_id, relative_path, file_hash, modified, file_size,
+		partial_hash, original_root_id, original_path
+	FROM movedFiles;
+
 	UPDATE archiveFiles arch
-	SET	relative_path = mv.relative_path, modified = mv.modified
-	FROM movedFiles mv
-	WHERE arch.relative_path = mv.original_path;
+	SET	root_id = mv.root_id, relative_path = mv.relative_path, modified = mv.modified,
+		file_hash = mv.file_hash, file_size = mv.file_size, partial_hash = mv.partial_hash
+	FROM fileClassifications mv
+	WHERE mv.classification = 'moved'
+	AND arch.root_id = mv.matched_root_id
+	AND arch.relative_path = mv.matched_path;
 END; $$;
  
 CREATE OR REPLACE PROCEDURE updateArchiveModifiedFiles()
 LANGUAGE plpgsql
 AS $$
 BEGIN
+	DELETE FROM fileClassifications WHERE classification = 'modified';
+	INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+		file_hash, modified, file_size, partial_hash)
+	SELECT 'modified', file_id, root_id, relative_path, file_hash, modified, file_size,
+		partial_hash
+	FROM modifiedFiles;
+
 	UPDATE archiveFiles arch
-	SET modified = mod.modified, file_hash = mod.file_hash
-	FROM modifiedFiles mod
-	WHERE arch.relative_path = mod.relative_path;
+	SET modified = mod.modified, file_hash = mod.file_hash,
+		file_size = mod.file_size, partial_hash = mod.partial_hash
+	FROM fileClassifications mod
+	WHERE mod.classification = 'modified'
+	AND arch.root_id = mod.root_id
+	AND arch.relative_path = mod.relative_path;
 END; $$;
 
 CREATE OR REPLACE PROCEDURE updateArchiveNewUnseenFiles()
 LANGUAGE plpgsql
 AS $$
 BEGIN
-	INSERT INTO archiveFiles (relative_path, file_hash, modified)
-	SELECT relative_path, file_hash, modified 
+	DELETE FROM fileClassifications WHERE classification = 'newUnseen';
+	INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+		file_hash, modified, file_size, partial_hash)
+	SELECT 'newUnseen', file_id, root_id, relative_path, file_hash, modified, file_size,
+		partial_hash
 	FROM newUnseenFiles;
+
+	INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+		partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'newUnseen';
 END; $$;
 
+-- deletedFiles, taking the files moved away from their path from the moves
+-- recorded by updateArchiveMovedFiles rather than evaluating movedFiles again
 CREATE OR REPLACE PROCEDURE updateArchiveDeletedFiles()
 LANGUAGE plpgsql
 AS $$
 BEGIN
-	INSERT INTO archiveDeletedFiles (relative_path, file_hash, modified, deleteDetected)
-	SELECT relative_path, file_hash, modified, now() 
-	FROM deletedFiles;
-	DELETE FROM archiveFiles
-	WHERE file_id
-	IN (SELECT file_id FROM deletedFiles);
+	DELETE FROM fileClassifications WHERE classification = 'deleted';
+	INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+		file_hash, modified, file_size, partial_hash)
+	SELECT 'deleted', arch.file_id, arch.root_id, arch.relative_path, arch.file_hash,
+		arch.modified, arch.file_size, arch.partial_hash
+	FROM archiveFiles arch
+	LEFT JOIN currentFiles curr
+		ON arch.root_id = curr.root_id
+		AND arch.relative_path = curr.relative_path
+	WHERE curr.relative_path IS NULL
+	AND NOT EXISTS (
+		SELECT 1 FROM fileClassifications mv
+		WHERE mv.classification = 'moved'
+		AND mv.matched_root_id = arch.root_id
+		AND mv.matched_path = arch.relative_path);
+
+	INSERT INTO archiveDeletedFiles (root_id, relative_path, file_hash, modified,
+		deleteDetected, file_size, partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, now(), file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'deleted';
+	DELETE FROM archiveFiles arch
+	USING fileClassifications del
+	WHERE del.classification = 'deleted'
+	AND arch.file_id = del.file_id;
+END; $$;
+
+-- Records the files for the user to resolve as duplicates. The keep and
+-- remove procedures below work from, and remove resolved files from, these
+-- classifications rather than the views. duplicateFiles is found by checking
+-- each match's original is still on disk with its hash, as movedFiles does,
+-- rather than evaluating movedFiles again.
+CREATE OR REPLACE PROCEDURE classifyDuplicates()
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	DELETE FROM fileClassifications
+	WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted');
+	INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+		file_hash, modified, file_size, partial_hash, matched_root_id, matched_path)
+	SELECT 'duplicate', hm.file_id, hm.root_id, hm.relative_path, hm.file_hash,
+		hm.modified, hm.file_size, hm.partial_hash, hm.original_root_id, hm.original_path
+	FROM hashMatchesArchiveFiles hm
+	INNER JOIN currentFiles curr
+		ON hm.original_root_id = curr.root_id
+		AND hm.original_path = curr.relative_path
+	WHERE curr.file_hash = hm.file_hash OR curr.file_hash IS NULL;
+	INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+		file_hash, modified, file_size, partial_hash, matched_root_id, matched_path)
+	SELECT 'duplicatePreviouslyDeleted', file_id, root_id, relative_path, file_hash,
+		modified, file_size, partial_hash, previously_deleted_root_id, previously_deleted_path
+	FROM duplicatePreviouslyDeletedFiles;
+END; $$;
+
+-- Classifies the files found by this run and applies them to the archive
+CREATE OR REPLACE PROCEDURE reconcileArchive()
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	TRUNCATE fileClassifications;
+	CALL updateArchiveMovedFiles();
+	CALL updateArchiveModifiedFiles();
+	CALL updateArchiveNewUnseenFiles();
+	CALL updateArchiveDeletedFiles();
+	CALL classifyDuplicates();
+	ANALYZE fileClassifications;
 END; $$;
 
 CREATE OR REPLACE PROCEDURE keepDuplicate(input_id int)
 LANGUAGE plpgsql
 AS $$
 BEGIN
-	INSERT INTO archiveFiles (relative_path, file_hash, modified)
-	SELECT relative_path, file_hash, modified
-	FROM duplicateFiles
-	WHERE file_id = input_id; 
+	INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+		partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'duplicate' AND file_id = input_id;
+	DELETE FROM fileClassifications
+	WHERE classification = 'duplicate' AND file_id = input_id;
+END; $$;
+
+CREATE OR REPLACE PROCEDURE keepDuplicates(input_ids BIGINT[])
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+		partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'duplicate' AND file_id = ANY(input_ids);
+	DELETE FROM fileClassifications
+	WHERE classification = 'duplicate' AND file_id = ANY(input_ids);
+END; $$;
+
+-- For duplicates whose matched file has been deleted in their favour: the
+-- archive entry follows the duplicate as if it had been moved there
+CREATE OR REPLACE PROCEDURE replaceDuplicates(input_ids BIGINT[])
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	WITH replaced AS (
+		DELETE FROM currentFiles curr
+		USING fileClassifications dup
+		WHERE dup.classification = 'duplicate' AND dup.file_id = ANY(input_ids)
+		AND curr.root_id = dup.matched_root_id
+		AND curr.relative_path = dup.matched_path
+		RETURNING curr.file_id
+	)
+	DELETE FROM fileClassifications
+	WHERE file_id IN (SELECT file_id FROM replaced);
+	UPDATE archiveFiles arch
+	SET root_id = dup.root_id, relative_path = dup.relative_path, modified = dup.modified
+	FROM fileClassifications dup
+	WHERE dup.classification = 'duplicate' AND dup.file_id = ANY(input_ids)
+	AND arch.root_id = dup.matched_root_id
+	AND arch.relative_path = dup.matched_path;
+	DELETE FROM fileClassifications
+	WHERE classification = 'duplicate' AND file_id = ANY(input_ids);
 END; $$;
 
 CREATE OR REPLACE PROCEDURE keepAllDuplicates()
 LANGUAGE plpgsql
 AS $$
 BEGIN
-	INSERT INTO archiveFiles (relative_path, file_hash, modified)
-	SELECT relative_path, file_hash, modified
-	FROM duplicateFiles;
+	INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+		partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'duplicate';
+	DELETE FROM fileClassifications WHERE classification = 'duplicate';
 END; $$;
 
 CREATE OR REPLACE PROCEDURE removeDuplicate(input_id int)
@@ -146,6 +467,20 @@ AS $$
 BEGIN
 	DELETE FROM currentFiles
 	WHERE file_id = input_id; 
+	DELETE FROM fileClassifications
+	WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+	AND file_id = input_id;
+END; $$;
+
+CREATE OR REPLACE PROCEDURE removeDuplicates(input_ids BIGINT[])
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	DELETE FROM currentFiles
+	WHERE file_id = ANY(input_ids);
+	DELETE FROM fileClassifications
+	WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+	AND file_id = ANY(input_ids);
 END; $$;
 
 CREATE OR REPLACE PROCEDURE removeAllDuplicates()
@@ -153,27 +488,50 @@ LANGUAGE plpgsql
 AS $$
 BEGIN
 	DELETE FROM currentFiles
-	USING duplicateFiles
-	WHERE currentFiles.file_id = duplicateFiles.file_id;
+	USING fileClassifications dup
+	WHERE dup.classification = 'duplicate'
+	AND currentFiles.file_id = dup.file_id;
+	DELETE FROM fileClassifications
+	WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+	AND file_id NOT IN (SELECT file_id FROM currentFiles);
 END; $$;
 
 CREATE OR REPLACE PROCEDURE keepDuplicateDeleted(input_id int)
 LANGUAGE plpgsql
 AS $$
 BEGIN
-	INSERT INTO archiveFiles (relative_path, file_hash, modified)
-	SELECT relative_path, file_hash, modified
-	FROM duplicatePreviouslyDeletedFiles
-	WHERE file_id = input_id; 
+	INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+		partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'duplicatePreviouslyDeleted' AND file_id = input_id;
+	DELETE FROM fileClassifications
+	WHERE classification = 'duplicatePreviouslyDeleted' AND file_id = input_id;
+END; $$;
+
+CREATE OR REPLACE PROCEDURE keepDuplicatesDeleted(input_ids BIGINT[])
+LANGUAGE plpgsql
+AS $$
+BEGIN
+	INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+		partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'duplicatePreviouslyDeleted' AND file_id = ANY(input_ids);
+	DELETE FROM fileClassifications
+	WHERE classification = 'duplicatePreviouslyDeleted' AND file_id = ANY(input_ids);
 END; $$;
 
 CREATE OR REPLACE PROCEDURE keepAllDuplicatesDeleted()
 LANGUAGE plpgsql
 AS $$
 BEGIN
-	INSERT INTO archiveFiles (relative_path, file_hash, modified)
-	SELECT relative_path, file_hash, modified
-	FROM duplicatePreviouslyDeletedFiles;
+	INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+		partial_hash)
+	SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+	FROM fileClassifications
+	WHERE classification = 'duplicatePreviouslyDeleted';
+	DELETE FROM fileClassifications WHERE classification = 'duplicatePreviouslyDeleted';
 END; $$;
 
 CREATE OR REPLACE PROCEDURE removeAllDuplicatesDeleted()
@@ -181,6 +539,10 @@ LANGUAGE plpgsql
 AS $$
 BEGIN
 	DELETE FROM currentFiles
-	USING duplicatePreviouslyDeletedFiles dpdf
-	WHERE currentFiles.file_id = dpdf.file_id;
-END; $$;
\ No newline at end of file
+	USING fileClassifications dpdf
+	WHERE dpdf.classification = 'duplicatePreviouslyDeleted'
+	AND currentFiles.file_id = dpdf.file_id;
+	DELETE FROM fileClassifications
+	WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+	AND file_id NOT IN (SELECT file_id FROM currentFiles);
+END; $$;
@@ -0,0 +1,35 @@
+-- SQLite translation of applyScannedFiles.sql. staleDirectories is passed
+-- as a JSON array. rtrim strips every character other than sep from the
+-- end of a path, leaving its directory prefix.
+
+DELETE FROM currentFiles AS curr
+WHERE curr.root_id = :root_id
+AND rtrim(curr.relative_path, replace(curr.relative_path, :sep, ''))
+	IN (SELECT value FROM json_each(:staleDirectories))
+AND NOT EXISTS (
+	SELECT 1 FROM scannedFiles s WHERE s.relative_path = curr.relative_path);
+
+UPDATE currentFiles AS curr
+SET modified = s.modified, file_size = s.file_size, file_hash = NULL, partial_hash = NULL
+FROM scannedFiles s
+WHERE curr.root_id = :root_id
+AND s.relative_path = curr.relative_path
+AND (curr.modified IS NOT s.modified OR curr.file_size IS NOT s.file_size);
+
+-- Device and inode numbers, which can change while the mtime and size don't
+UPDATE currentFiles AS curr
+SET device = s.device, inode = s.inode
+FROM scannedFiles s
+WHERE curr.root_id = :root_id
+AND s.relative_path = curr.relative_path
+AND (curr.device IS NOT s.device OR curr.inode IS NOT s.inode);
+
+INSERT INTO currentFiles (root_id, relative_path, modified, file_size, device, inode)
+SELECT :root_id, s.relative_path, s.modified, s.file_size, s.device, s.inode
+FROM scannedFiles s
+WHERE NOT EXISTS (
+	SELECT 1 FROM currentFiles curr
+	WHERE curr.root_id = :root_id AND curr.relative_path = s.relative_path);
+
+DELETE FROM currentDirectories
+WHERE root_id = :root_id AND relative_path IN (SELECT value FROM json_each(:staleDirectories));
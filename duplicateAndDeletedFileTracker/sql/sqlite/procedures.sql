@@ -0,0 +1,258 @@
+-- SQLite translation of the procedures in resetViewsAndProcs.sql; see there
+-- for what each one does. SQLite has no stored procedures, so the SQLite
+-- backend runs the statements under each PROCEDURE header itself when the
+-- procedure is CALLed, binding its arguments to the named parameters.
+-- Arrays of ids are passed as JSON arrays.
+
+-- PROCEDURE updateArchiveFileSizes(root)
+UPDATE archiveFiles AS arch
+SET file_size = curr.file_size
+FROM currentFiles curr
+WHERE arch.root_id = :root
+AND curr.root_id = :root
+AND arch.relative_path = curr.relative_path
+AND arch.modified = curr.modified
+AND arch.file_size IS NULL;
+
+-- PROCEDURE updateArchiveDeferredHashes()
+UPDATE archiveFiles AS arch
+SET file_hash = curr.file_hash
+FROM currentFiles curr
+WHERE arch.root_id = curr.root_id
+AND arch.relative_path = curr.relative_path
+AND arch.modified = curr.modified
+AND arch.file_hash IS NULL
+AND curr.file_hash IS NOT NULL;
+
+UPDATE archiveFiles AS arch
+SET file_size = curr.file_size, partial_hash = curr.partial_hash
+FROM currentFiles curr
+WHERE arch.file_size IS NULL
+AND curr.file_hash = arch.file_hash
+AND curr.file_size IS NOT NULL;
+
+UPDATE archiveDeletedFiles AS archDel
+SET file_size = curr.file_size, partial_hash = curr.partial_hash
+FROM currentFiles curr
+WHERE archDel.file_size IS NULL
+AND curr.file_hash = archDel.file_hash
+AND curr.file_size IS NOT NULL;
+
+UPDATE archiveDeletedFiles AS archDel
+SET file_size = arch.file_size, partial_hash = arch.partial_hash
+FROM archiveFiles arch
+WHERE archDel.file_size IS NULL
+AND arch.file_hash = archDel.file_hash
+AND arch.file_size IS NOT NULL;
+
+-- PROCEDURE updateArchiveMovedFiles()
+DELETE FROM fileClassifications WHERE classification = 'moved';
+INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+	file_hash, modified, file_size, partial_hash, matched_root_id, matched_path)
+SELECT 'moved', file_id, root_id, relative_path, file_hash, modified, file_size,
+	partial_hash, original_root_id, original_path
+FROM movedFiles;
+
+UPDATE archiveFiles AS arch
+SET root_id = mv.root_id, relative_path = mv.relative_path, modified = mv.modified,
+	file_hash = mv.file_hash, file_size = mv.file_size, partial_hash = mv.partial_hash
+FROM fileClassifications mv
+WHERE mv.classification = 'moved'
+AND arch.root_id = mv.matched_root_id
+AND arch.relative_path = mv.matched_path;
+
+-- PROCEDURE updateArchiveModifiedFiles()
+DELETE FROM fileClassifications WHERE classification = 'modified';
+INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+	file_hash, modified, file_size, partial_hash)
+SELECT 'modified', file_id, root_id, relative_path, file_hash, modified, file_size,
+	partial_hash
+FROM modifiedFiles;
+
+UPDATE archiveFiles AS arch
+SET modified = mod.modified, file_hash = mod.file_hash,
+	file_size = mod.file_size, partial_hash = mod.partial_hash
+FROM fileClassifications mod
+WHERE mod.classification = 'modified'
+AND arch.root_id = mod.root_id
+AND arch.relative_path = mod.relative_path;
+
+-- PROCEDURE updateArchiveNewUnseenFiles()
+DELETE FROM fileClassifications WHERE classification = 'newUnseen';
+INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+	file_hash, modified, file_size, partial_hash)
+SELECT 'newUnseen', file_id, root_id, relative_path, file_hash, modified, file_size,
+	partial_hash
+FROM newUnseenFiles;
+
+INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+	partial_hash)
+SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+FROM fileClassifications
+WHERE classification = 'newUnseen';
+
+-- PROCEDURE updateArchiveDeletedFiles()
+DELETE FROM fileClassifications WHERE classification = 'deleted';
+INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+	file_hash, modified, file_size, partial_hash)
+SELECT 'deleted', arch.file_id, arch.root_id, arch.relative_path, arch.file_hash,
+	arch.modified, arch.file_size, arch.partial_hash
+FROM archiveFiles arch
+LEFT JOIN currentFiles curr
+	ON arch.root_id = curr.root_id
+	AND arch.relative_path = curr.relative_path
+WHERE curr.relative_path IS NULL
+AND NOT EXISTS (
+	SELECT 1 FROM fileClassifications mv
+	WHERE mv.classification = 'moved'
+	AND mv.matched_root_id = arch.root_id
+	AND mv.matched_path = arch.relative_path);
+
+INSERT INTO archiveDeletedFiles (root_id, relative_path, file_hash, modified,
+	deleteDetected, file_size, partial_hash)
+SELECT root_id, relative_path, file_hash, modified, datetime('now', 'localtime'), file_size,
+	partial_hash
+FROM fileClassifications
+WHERE classification = 'deleted';
+DELETE FROM archiveFiles
+WHERE file_id IN (
+	SELECT file_id FROM fileClassifications WHERE classification = 'deleted');
+
+-- PROCEDURE classifyDuplicates()
+DELETE FROM fileClassifications
+WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted');
+INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+	file_hash, modified, file_size, partial_hash, matched_root_id, matched_path)
+SELECT 'duplicate', hm.file_id, hm.root_id, hm.relative_path, hm.file_hash,
+	hm.modified, hm.file_size, hm.partial_hash, hm.original_root_id, hm.original_path
+FROM hashMatchesArchiveFiles hm
+INNER JOIN currentFiles curr
+	ON hm.original_root_id = curr.root_id
+	AND hm.original_path = curr.relative_path
+WHERE curr.file_hash = hm.file_hash OR curr.file_hash IS NULL;
+INSERT INTO fileClassifications (classification, file_id, root_id, relative_path,
+	file_hash, modified, file_size, partial_hash, matched_root_id, matched_path)
+SELECT 'duplicatePreviouslyDeleted', file_id, root_id, relative_path, file_hash,
+	modified, file_size, partial_hash, previously_deleted_root_id, previously_deleted_path
+FROM duplicatePreviouslyDeletedFiles;
+
+-- PROCEDURE reconcileArchive()
+DELETE FROM fileClassifications;
+CALL updateArchiveMovedFiles();
+CALL updateArchiveModifiedFiles();
+CALL updateArchiveNewUnseenFiles();
+CALL updateArchiveDeletedFiles();
+CALL classifyDuplicates();
+ANALYZE fileClassifications;
+
+-- PROCEDURE keepDuplicate(input_id)
+INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+	partial_hash)
+SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+FROM fileClassifications
+WHERE classification = 'duplicate' AND file_id = :input_id;
+DELETE FROM fileClassifications
+WHERE classification = 'duplicate' AND file_id = :input_id;
+
+-- PROCEDURE keepDuplicates(input_ids)
+INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+	partial_hash)
+SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+FROM fileClassifications
+WHERE classification = 'duplicate'
+AND file_id IN (SELECT value FROM json_each(:input_ids));
+DELETE FROM fileClassifications
+WHERE classification = 'duplicate'
+AND file_id IN (SELECT value FROM json_each(:input_ids));
+
+-- PROCEDURE replaceDuplicates(input_ids)
+DELETE FROM fileClassifications
+WHERE file_id IN (
+	SELECT curr.file_id FROM currentFiles curr
+	INNER JOIN fileClassifications dup
+		ON curr.root_id = dup.matched_root_id AND curr.relative_path = dup.matched_path
+	WHERE dup.classification = 'duplicate'
+	AND dup.file_id IN (SELECT value FROM json_each(:input_ids)))
+AND file_id NOT IN (SELECT value FROM json_each(:input_ids));
+DELETE FROM currentFiles
+WHERE (root_id, relative_path) IN (
+	SELECT matched_root_id, matched_path FROM fileClassifications
+	WHERE classification = 'duplicate'
+	AND file_id IN (SELECT value FROM json_each(:input_ids)));
+UPDATE archiveFiles AS arch
+SET root_id = dup.root_id, relative_path = dup.relative_path, modified = dup.modified
+FROM fileClassifications dup
+WHERE dup.classification = 'duplicate'
+AND dup.file_id IN (SELECT value FROM json_each(:input_ids))
+AND arch.root_id = dup.matched_root_id
+AND arch.relative_path = dup.matched_path;
+DELETE FROM fileClassifications
+WHERE classification = 'duplicate'
+AND file_id IN (SELECT value FROM json_each(:input_ids));
+
+-- PROCEDURE keepAllDuplicates()
+INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+	partial_hash)
+SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+FROM fileClassifications
+WHERE classification = 'duplicate';
+DELETE FROM fileClassifications WHERE classification = 'duplicate';
+
+-- PROCEDURE removeDuplicate(input_id)
+DELETE FROM currentFiles
+WHERE file_id = :input_id;
+DELETE FROM fileClassifications
+WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+AND file_id = :input_id;
+
+-- PROCEDURE removeDuplicates(input_ids)
+DELETE FROM currentFiles
+WHERE file_id IN (SELECT value FROM json_each(:input_ids));
+DELETE FROM fileClassifications
+WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+AND file_id IN (SELECT value FROM json_each(:input_ids));
+
+-- PROCEDURE removeAllDuplicates()
+DELETE FROM currentFiles
+WHERE file_id IN (
+	SELECT file_id FROM fileClassifications WHERE classification = 'duplicate');
+DELETE FROM fileClassifications
+WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+AND file_id NOT IN (SELECT file_id FROM currentFiles);
+
+-- PROCEDURE keepDuplicateDeleted(input_id)
+INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+	partial_hash)
+SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+FROM fileClassifications
+WHERE classification = 'duplicatePreviouslyDeleted' AND file_id = :input_id;
+DELETE FROM fileClassifications
+WHERE classification = 'duplicatePreviouslyDeleted' AND file_id = :input_id;
+
+-- PROCEDURE keepDuplicatesDeleted(input_ids)
+INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+	partial_hash)
+SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+FROM fileClassifications
+WHERE classification = 'duplicatePreviouslyDeleted'
+AND file_id IN (SELECT value FROM json_each(:input_ids));
+DELETE FROM fileClassifications
+WHERE classification = 'duplicatePreviouslyDeleted'
+AND file_id IN (SELECT value FROM json_each(:input_ids));
+
+-- PROCEDURE keepAllDuplicatesDeleted()
+INSERT INTO archiveFiles (root_id, relative_path, file_hash, modified, file_size,
+	partial_hash)
+SELECT root_id, relative_path, file_hash, modified, file_size, partial_hash
+FROM fileClassifications
+WHERE classification = 'duplicatePreviouslyDeleted';
+DELETE FROM fileClassifications WHERE classification = 'duplicatePreviouslyDeleted';
+
+-- PROCEDURE removeAllDuplicatesDeleted()
+DELETE FROM currentFiles
+WHERE file_id IN (
+	SELECT file_id FROM fileClassifications
+	WHERE classification = 'duplicatePreviouslyDeleted');
+DELETE FROM fileClassifications
+WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')
+AND file_id NOT IN (SELECT file_id FROM currentFiles);
@@ -0,0 +1,9 @@
+-- SQLite translation of resetAllTables.sql. The tables are recreated by
+-- upgradeSchema.sql, which the SQLite backend runs straight after this.
+DROP TABLE IF EXISTS currentFiles;
+DROP TABLE IF EXISTS archiveFiles;
+DROP TABLE IF EXISTS archiveDeletedFiles;
+DROP TABLE IF EXISTS currentDirectories;
+DROP TABLE IF EXISTS fileClassifications;
+DROP TABLE IF EXISTS archiveRoots;
+DROP TABLE IF EXISTS schemaVersion;
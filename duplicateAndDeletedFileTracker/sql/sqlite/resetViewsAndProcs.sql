@@ -0,0 +1,175 @@
+-- SQLite translation of the views in resetViewsAndProcs.sql; see there for
+-- what each one holds. The procedures are in procedures.sql.
+DROP VIEW IF EXISTS newPathFiles;
+DROP VIEW IF EXISTS newPathFilesWithoutHash;
+DROP VIEW IF EXISTS fullHashCandidateFiles;
+DROP VIEW IF EXISTS deferredArchiveFilesOnDisk;
+DROP VIEW IF EXISTS newUnseenFiles;
+DROP VIEW IF EXISTS hashMatchesArchiveFiles;
+DROP VIEW IF EXISTS partialMatchesArchiveFiles;
+DROP VIEW IF EXISTS movedFiles;
+DROP VIEW IF EXISTS duplicateFiles;
+DROP VIEW IF EXISTS modifiedFiles;
+DROP VIEW IF EXISTS modifiedMetaFiles;
+DROP VIEW IF EXISTS modifiedContentsFiles;
+DROP VIEW IF EXISTS deletedFiles;
+DROP VIEW IF EXISTS duplicatePreviouslyDeletedFiles;
+DROP VIEW IF EXISTS duplicatesInArchive;
+
+CREATE VIEW newPathFiles AS
+SELECT curr.*
+FROM currentFiles curr
+LEFT JOIN archiveFiles arch USING (root_id, relative_path)
+WHERE arch.relative_path IS NULL;
+
+CREATE VIEW newPathFilesWithoutHash AS
+SELECT *
+FROM newPathFiles
+WHERE file_hash IS NULL;
+
+CREATE VIEW fullHashCandidateFiles AS
+SELECT new.*
+FROM newPathFilesWithoutHash new
+WHERE new.partial_hash IS NULL
+	OR EXISTS (
+		SELECT 1 FROM archiveFiles arch
+		WHERE arch.file_size = new.file_size
+		AND (arch.partial_hash = new.partial_hash OR arch.partial_hash IS NULL))
+	OR EXISTS (
+		SELECT 1 FROM archiveDeletedFiles archDel
+		WHERE archDel.file_size = new.file_size
+		AND (archDel.partial_hash = new.partial_hash OR archDel.partial_hash IS NULL))
+	OR EXISTS (
+		SELECT 1 FROM newPathFiles other
+		WHERE other.file_size = new.file_size
+		AND other.partial_hash = new.partial_hash
+		AND other.file_id <> new.file_id)
+	OR EXISTS (
+		SELECT 1 FROM archiveFiles arch
+		WHERE arch.file_size IS NULL)
+	OR EXISTS (
+		SELECT 1 FROM archiveDeletedFiles archDel
+		WHERE archDel.file_size IS NULL);
+
+CREATE VIEW deferredArchiveFilesOnDisk AS
+SELECT curr.*
+FROM currentFiles curr
+INNER JOIN archiveFiles arch
+	ON curr.root_id = arch.root_id
+	AND curr.relative_path = arch.relative_path
+	AND curr.modified = arch.modified
+WHERE arch.file_hash IS NULL
+	AND curr.file_hash IS NULL
+	AND EXISTS (
+		SELECT 1 FROM newPathFiles new
+		WHERE new.file_hash IS NOT NULL
+		AND new.file_size = arch.file_size
+		AND new.partial_hash = arch.partial_hash);
+
+CREATE VIEW newUnseenFiles AS
+SELECT new.*
+FROM newPathFiles new
+LEFT JOIN archiveFiles arch USING (file_hash)
+LEFT JOIN archiveDeletedFiles archDel USING (file_hash)
+WHERE arch.file_hash IS NULL
+	AND archDel.file_hash IS NULL
+	AND (new.file_hash IS NOT NULL OR new.partial_hash IS NOT NULL)
+	AND NOT EXISTS (
+		SELECT 1 FROM archiveFiles arch
+		WHERE arch.file_hash IS NULL
+		AND arch.file_size = new.file_size
+		AND arch.partial_hash = new.partial_hash)
+	AND NOT EXISTS (
+		SELECT 1 FROM archiveDeletedFiles archDel
+		WHERE archDel.file_hash IS NULL
+		AND archDel.file_size = new.file_size
+		AND archDel.partial_hash = new.partial_hash);
+
+CREATE VIEW hashMatchesArchiveFiles AS
+SELECT new.*, arch.root_id as original_root_id, arch.relative_path as original_path
+FROM newPathFiles new
+INNER JOIN archiveFiles arch USING (file_hash);
+
+CREATE VIEW partialMatchesArchiveFiles AS
+SELECT new.*, arch.root_id as original_root_id, arch.relative_path as original_path
+FROM newPathFiles new
+INNER JOIN archiveFiles arch
+	ON arch.file_size = new.file_size
+	AND arch.partial_hash = new.partial_hash
+WHERE arch.file_hash IS NULL;
+
+CREATE VIEW movedFiles as
+SELECT hm.file_id, hm.root_id, hm.relative_path, hm.file_hash, hm.modified,
+	hm.original_root_id, hm.original_path, hm.file_size, hm.partial_hash
+FROM hashMatchesArchiveFiles hm
+LEFT JOIN currentFiles curr
+	ON hm.original_root_id = curr.root_id
+	AND hm.original_path = curr.relative_path
+WHERE curr.relative_path IS NULL
+OR curr.file_hash <> hm.file_hash
+UNION ALL
+SELECT pm.file_id, pm.root_id, pm.relative_path, pm.file_hash, pm.modified,
+	pm.original_root_id, pm.original_path, pm.file_size, pm.partial_hash
+FROM partialMatchesArchiveFiles pm
+LEFT JOIN currentFiles curr
+	ON pm.original_root_id = curr.root_id
+	AND pm.original_path = curr.relative_path
+WHERE curr.relative_path IS NULL;
+
+CREATE VIEW duplicateFiles as
+SELECT hashMatch.*
+FROM hashMatchesArchiveFiles hashMatch
+LEFT JOIN movedFiles moved
+	ON hashMatch.original_root_id = moved.original_root_id
+	AND hashMatch.original_path = moved.original_path
+WHERE moved.original_path IS NULL;
+
+CREATE VIEW modifiedFiles AS
+SELECT curr.*, arch.file_id as arch_id, arch.file_hash as arch_hash, arch.modified as arch_modified
+FROM currentFiles curr
+INNER JOIN archiveFiles arch
+	ON curr.root_id = arch.root_id
+	AND curr.relative_path = arch.relative_path
+WHERE
+	curr.modified <> arch.modified;
+
+CREATE VIEW modifiedMetaFiles AS
+SELECT * FROM modifiedFiles
+WHERE file_hash = arch_hash;
+
+CREATE VIEW modifiedContentsFiles AS
+SELECT * FROM modifiedFiles
+WHERE file_hash <> arch_hash;
+
+CREATE VIEW deletedFiles AS
+SELECT arch.*
+FROM archiveFiles arch
+LEFT JOIN currentFiles curr
+	ON arch.root_id = curr.root_id
+	AND arch.relative_path = curr.relative_path
+LEFT JOIN movedFiles mv
+	ON arch.root_id = mv.original_root_id
+	AND arch.relative_path = mv.original_path
+WHERE curr.relative_path IS NULL
+AND mv.original_path IS NULL;
+
+CREATE VIEW duplicatePreviouslyDeletedFiles AS
+SELECT curr.*, archDel.root_id as previously_deleted_root_id,
+	archDel.relative_path as previously_deleted_path
+FROM currentFiles curr
+INNER JOIN archiveDeletedFiles archDel
+	ON archDel.file_hash = curr.file_hash
+UNION ALL
+SELECT new.*, archDel.root_id as previously_deleted_root_id,
+	archDel.relative_path as previously_deleted_path
+FROM newPathFiles new
+INNER JOIN archiveDeletedFiles archDel
+	ON archDel.file_size = new.file_size
+	AND archDel.partial_hash = new.partial_hash
+WHERE archDel.file_hash IS NULL;
+
+CREATE VIEW duplicatesInArchive AS
+SELECT arch1.*, arch2.root_id as duplicate_root_id, arch2.relative_path as duplicate_path
+FROM archiveFiles arch1
+INNER JOIN archiveFiles arch2 USING (file_hash)
+WHERE arch1.file_id <> arch2.file_id;
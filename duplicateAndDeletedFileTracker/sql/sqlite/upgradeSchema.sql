@@ -0,0 +1,81 @@
+-- SQLite translation of the schema built by resetAllTables.sql and
+-- upgradeSchema.sql. Tables are created whole with the columns they had when
+-- the SQLite backend was added; columns added since are added by ALTER TABLE
+-- ... ADD COLUMN IF NOT EXISTS, which the SQLite backend emulates. Safe to
+-- run against an existing database any number of times.
+
+CREATE TABLE IF NOT EXISTS archiveFiles (
+	file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+	relative_path VARCHAR NOT NULL,
+	file_hash BLOB,
+	modified TIMESTAMP(0),
+	file_size BIGINT,
+	partial_hash BLOB
+);
+
+CREATE TABLE IF NOT EXISTS currentFiles (
+	file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+	relative_path VARCHAR NOT NULL,
+	file_hash BLOB,
+	modified TIMESTAMP(0),
+	file_size BIGINT,
+	partial_hash BLOB,
+	device BIGINT,
+	inode BIGINT
+);
+
+CREATE TABLE IF NOT EXISTS archiveDeletedFiles (
+	file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+	relative_path VARCHAR NOT NULL,
+	file_hash BLOB,
+	modified TIMESTAMP(0),
+	deleteDetected TIMESTAMP(0),
+	file_size BIGINT,
+	partial_hash BLOB
+);
+
+CREATE TABLE IF NOT EXISTS archiveRoots (
+	root_id INTEGER PRIMARY KEY AUTOINCREMENT,
+	name VARCHAR NOT NULL UNIQUE
+);
+INSERT INTO archiveRoots (name) SELECT 'default' WHERE NOT EXISTS (SELECT 1 FROM archiveRoots);
+ALTER TABLE archiveFiles ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE currentFiles ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE archiveDeletedFiles ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+
+DROP INDEX IF EXISTS archiveFiles_relative_path;
+DROP INDEX IF EXISTS currentFiles_relative_path;
+CREATE INDEX IF NOT EXISTS archiveFiles_root_path ON archiveFiles (root_id, relative_path);
+CREATE INDEX IF NOT EXISTS archiveFiles_file_hash ON archiveFiles (file_hash);
+CREATE INDEX IF NOT EXISTS currentFiles_root_path ON currentFiles (root_id, relative_path);
+CREATE INDEX IF NOT EXISTS currentFiles_file_hash ON currentFiles (file_hash);
+CREATE INDEX IF NOT EXISTS archiveDeletedFiles_file_hash ON archiveDeletedFiles (file_hash);
+CREATE INDEX IF NOT EXISTS archiveFiles_file_size ON archiveFiles (file_size);
+CREATE INDEX IF NOT EXISTS currentFiles_file_size ON currentFiles (file_size);
+CREATE INDEX IF NOT EXISTS archiveDeletedFiles_file_size ON archiveDeletedFiles (file_size);
+
+-- SQLite can't change a table's primary key, so currentDirectories is
+-- recreated instead. It only lets incremental scans skip unchanged
+-- directories, so the next one after an upgrade is a full scan.
+DROP TABLE IF EXISTS currentDirectories;
+CREATE TABLE currentDirectories (
+	root_id INTEGER NOT NULL DEFAULT 1,
+	relative_path VARCHAR NOT NULL,
+	modified_ns BIGINT NOT NULL,
+	PRIMARY KEY (root_id, relative_path)
+);
+
+CREATE TABLE IF NOT EXISTS fileClassifications (
+	classification VARCHAR NOT NULL,
+	file_id BIGINT NOT NULL,
+	relative_path VARCHAR NOT NULL,
+	file_hash BLOB,
+	modified TIMESTAMP(0),
+	file_size BIGINT,
+	partial_hash BLOB,
+	matched_path VARCHAR
+);
+ALTER TABLE fileClassifications ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE fileClassifications ADD COLUMN IF NOT EXISTS matched_root_id INTEGER;
+CREATE INDEX IF NOT EXISTS fileClassifications_classification
+	ON fileClassifications (classification, file_id);
@@ -0,0 +1,111 @@
+-- Non-destructive changes to the tables created by resetAllTables.sql.
+-- Safe to run against an existing database any number of times.
+
+-- Several archives can be tracked in one database, each under a root_id
+-- within which relative paths are unique. Rows from before roots existed
+-- belong to the first root, named 'default'.
+CREATE TABLE IF NOT EXISTS archiveRoots (
+	root_id SERIAL NOT NULL PRIMARY KEY,
+	name VARCHAR NOT NULL UNIQUE
+);
+INSERT INTO archiveRoots (name) SELECT 'default' WHERE NOT EXISTS (SELECT 1 FROM archiveRoots);
+ALTER TABLE archiveFiles ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE currentFiles ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE archiveDeletedFiles ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+
+-- Indexes covering the path and file_hash joins made by the views in
+-- resetViewsAndProcs.sql. Paths are joined within a root, so the indexes on
+-- relative_path alone from before roots existed are replaced.
+DROP INDEX IF EXISTS archiveFiles_relative_path;
+DROP INDEX IF EXISTS currentFiles_relative_path;
+CREATE INDEX IF NOT EXISTS archiveFiles_root_path ON archiveFiles (root_id, relative_path);
+CREATE INDEX IF NOT EXISTS archiveFiles_file_hash ON archiveFiles (file_hash);
+CREATE INDEX IF NOT EXISTS currentFiles_root_path ON currentFiles (root_id, relative_path);
+CREATE INDEX IF NOT EXISTS currentFiles_file_hash ON currentFiles (file_hash);
+CREATE INDEX IF NOT EXISTS archiveDeletedFiles_file_hash ON archiveDeletedFiles (file_hash);
+
+-- File sizes and partial hashes, used to skip fully hashing new files which
+-- cannot share contents with any archived or deleted file
+ALTER TABLE archiveFiles ADD COLUMN IF NOT EXISTS file_size BIGINT;
+ALTER TABLE archiveFiles ADD COLUMN IF NOT EXISTS partial_hash BYTEA;
+ALTER TABLE currentFiles ADD COLUMN IF NOT EXISTS file_size BIGINT;
+ALTER TABLE currentFiles ADD COLUMN IF NOT EXISTS partial_hash BYTEA;
+ALTER TABLE archiveDeletedFiles ADD COLUMN IF NOT EXISTS file_size BIGINT;
+ALTER TABLE archiveDeletedFiles ADD COLUMN IF NOT EXISTS partial_hash BYTEA;
+
+-- Device and inode numbers of current files, so hard linked paths are read
+-- only once. NULL where the filesystem doesn't provide them
+ALTER TABLE currentFiles ADD COLUMN IF NOT EXISTS device BIGINT;
+ALTER TABLE currentFiles ADD COLUMN IF NOT EXISTS inode BIGINT;
+
+CREATE INDEX IF NOT EXISTS archiveFiles_file_size ON archiveFiles (file_size);
+CREATE INDEX IF NOT EXISTS currentFiles_file_size ON currentFiles (file_size);
+CREATE INDEX IF NOT EXISTS archiveDeletedFiles_file_size ON archiveDeletedFiles (file_size);
+
+-- Directory mtimes as of the last scan, letting an incremental scan skip
+-- directories whose listing hasn't changed
+CREATE TABLE IF NOT EXISTS currentDirectories (
+	root_id INTEGER NOT NULL DEFAULT 1,
+	relative_path VARCHAR NOT NULL,
+	modified_ns BIGINT NOT NULL
+);
+ALTER TABLE currentDirectories ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE currentDirectories DROP CONSTRAINT IF EXISTS currentDirectories_pkey;
+CREATE UNIQUE INDEX IF NOT EXISTS currentDirectories_root_path
+	ON currentDirectories (root_id, relative_path);
+
+-- What each run found, written once by the updateArchive* procedures and
+-- read by them and the duplicate prompts. file_id refers to currentFiles,
+-- or to archiveFiles for deleted files. matched_root_id and matched_path are
+-- the archived path a moved or duplicate file matched, or the deleted path a
+-- previously deleted duplicate matched, which may be on another root.
+-- Rebuilt every run, so not worth WAL logging.
+CREATE UNLOGGED TABLE IF NOT EXISTS fileClassifications (
+	classification VARCHAR NOT NULL,
+	file_id BIGINT NOT NULL,
+	relative_path VARCHAR NOT NULL,
+	file_hash BYTEA,
+	modified TIMESTAMP(0),
+	file_size BIGINT,
+	partial_hash BYTEA,
+	matched_path VARCHAR
+);
+ALTER TABLE fileClassifications ADD COLUMN IF NOT EXISTS root_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE fileClassifications ADD COLUMN IF NOT EXISTS matched_root_id INTEGER;
+CREATE INDEX IF NOT EXISTS fileClassifications_classification
+	ON fileClassifications (classification, file_id);
+
+-- Digests used to be stored as CHAR(64) hex, twice the size of the raw
+-- SHA-256 digest in both the tables and their file_hash indexes. The views
+-- built on the columns are dropped for resetViewsAndProcs.sql to recreate.
+DO $$
+DECLARE
+	hashColumn RECORD;
+BEGIN
+	FOR hashColumn IN
+		SELECT table_name, column_name FROM information_schema.columns
+		WHERE table_schema = current_schema()
+		AND table_name IN ('archivefiles', 'currentfiles', 'archivedeletedfiles', 'fileclassifications')
+		AND column_name IN ('file_hash', 'partial_hash')
+		AND data_type = 'character'
+	LOOP
+		DROP VIEW IF EXISTS
+			newPathFiles,
+			newPathFilesWithoutHash,
+			fullHashCandidateFiles,
+			deferredArchiveFilesOnDisk,
+			newUnseenFiles,
+			hashMatchesArchiveFiles,
+			movedFiles,
+			duplicateFiles,
+			modifiedFiles,
+			modifiedMetaFiles,
+			modifiedContentsFiles,
+			deletedFiles,
+			duplicatePreviouslyDeletedFiles,
+			duplicatesInArchive
+		CASCADE;
+		EXECUTE format('ALTER TABLE %I ALTER COLUMN %I TYPE BYTEA USING decode(%I, ''hex'')',
+			hashColumn.table_name, hashColumn.column_name, hashColumn.column_name);
+	END LOOP;
+END $$;
@@ -0,0 +1,246 @@
+"""Embedded SQLite backend, for running on a single machine without a
+Postgres server.
+
+SqliteCursor accepts the queries written for Postgres: the schema, view and
+incremental scan scripts in queries are swapped for their translations in
+sql/sqlite, CALL runs a procedure from sql/sqlite/procedures.sql statement
+by statement, ALTER TABLE ... ADD COLUMN IF NOT EXISTS skips columns the
+table already has, and the remaining Postgres syntax used by the package is
+rewritten as each statement is first seen. Everything runs in process, so
+there are no round trips or connection setup to pay for.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import re
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+from importlib.resources import files
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from . import queries, sql
+from .main import (
+    STREAM_CHUNK_SIZE, BatchCursorInterface, StreamCursorInterface, roundedToSecond)
+
+@lru_cache(maxsize=None)
+def _readSqlite(name: str) -> str:
+    return files(sql).joinpath('sqlite').joinpath(name).read_text()
+
+@lru_cache(maxsize=None)
+def scripts() -> Dict[str, str]:
+    """The Postgres scripts in queries and the SQLite scripts run in their
+    place, read when a cursor first executes a query."""
+    upgradeSchema = _readSqlite('upgradeSchema.sql')
+    return {
+        queries.resetAllTables: _readSqlite('resetAllTables.sql') + upgradeSchema,
+        queries.upgradeSchema: upgradeSchema,
+        queries.resetViewAndProcs: _readSqlite('resetViewsAndProcs.sql'),
+        queries.applyScannedFiles: _readSqlite('applyScannedFiles.sql'),
+    }
+
+@lru_cache(maxsize=None)
+def procedures() -> Dict[str, Tuple[List[str], List[str]]]:
+    return parseProcedures(_readSqlite('procedures.sql'))
+
+_PROCEDURE_HEADER = re.compile(r'^-- PROCEDURE (\w+)\(([\w, ]*)\)$', re.MULTILINE)
+_CALL = re.compile(r'^\s*CALL\s+(\w+)\s*\(([^)]*)\)\s*;?\s*$', re.IGNORECASE)
+_TRUNCATE = re.compile(r'\bTRUNCATE\s+(\w+)', re.IGNORECASE)
+_PLACEHOLDER = r'(%s|%\(\w+\)s)'
+_ARRAY_CAST = r'(?:::\w+\[\])?'
+_ANY = re.compile(r'=\s*ANY\(\s*' + _PLACEHOLDER + _ARRAY_CAST + r'\s*\)', re.IGNORECASE)
+_UNNEST = re.compile(
+    r'unnest\(\s*' + _PLACEHOLDER + _ARRAY_CAST + r'\s*\)\s+AS\s+(\w+)\((\w+)\)', re.IGNORECASE)
+_NAMED = re.compile(r'%\((\w+)\)s')
+_ADD_COLUMN = re.compile(
+    r'^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(IF\s+NOT\s+EXISTS\s+)(\w+)', re.IGNORECASE)
+
+def parseProcedures(text: str) -> Dict[str, Tuple[List[str], List[str]]]:
+    """Parameter names and statements of each procedure in text, by
+    lowercased name, as Postgres folds unquoted names."""
+    procedures = {}
+    headers = list(_PROCEDURE_HEADER.finditer(text))
+    for header, following in zip(headers, headers[1:] + [None]):
+        body = text[header.end():following.start() if following else len(text)]
+        parameters = [name.strip() for name in header.group(2).split(',') if name.strip()]
+        procedures[header.group(1).lower()] = (parameters, splitStatements(body))
+    return procedures
+
+def splitStatements(script: str) -> List[str]:
+    """Splits script into its statements, keeping semicolons within strings
+    and comments."""
+    statements = []
+    statement = ''
+    for piece in script.split(';'):
+        statement += piece + ';'
+        if sqlite3.complete_statement(statement):
+            if _hasCode(statement): statements.append(statement.strip())
+            statement = ''
+    if _hasCode(statement[:-1]): statements.append(statement[:-1].strip())
+    return statements
+
+def _hasCode(statement: str) -> bool:
+    return any(line.strip() and not line.strip().startswith('--')
+               for line in statement.replace(';', '').splitlines())
+
+@lru_cache(maxsize=None)
+def translate(statement: str) -> str:
+    """Rewrites the Postgres syntax used by the package's queries for SQLite:
+    TRUNCATE, = ANY(array), unnest(array) AS alias(column), and psycopg2's
+    %s and %(name)s placeholders. Arrays are bound as JSON arrays."""
+    statement = _TRUNCATE.sub(r'DELETE FROM \1', statement)
+    statement = _ANY.sub(r'IN (SELECT value FROM json_each(\1))', statement)
+    statement = _UNNEST.sub(r'(SELECT value AS \3 FROM json_each(\1)) AS \2', statement)
+    statement = _NAMED.sub(r':\1', statement)
+    return statement.replace('%s', '?').replace('%%', '%')
+
+def toSqlite(value):
+    """Binds values as the Postgres backend stores them: timestamps to the
+    second, as TIMESTAMP(0) rounds them, and arrays as JSON."""
+    if isinstance(value, datetime):
+        return roundedToSecond(value).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (list, tuple)):
+        return json.dumps(list(value))
+    return value
+
+def _bind(param):
+    if param is None: return ()
+    if isinstance(param, dict):
+        return {name: toSqlite(value) for name, value in param.items()}
+    return tuple(toSqlite(value) for value in param)
+
+def _parseTimestamp(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+def _parseTimestamps(row: Tuple, columns: List[int]) -> Tuple:
+    row = list(row)
+    for column in columns:
+        if row[column] is not None: row[column] = datetime.fromisoformat(row[column])
+    return tuple(row)
+
+class _BoolAnd:
+    """Postgres' bool_and aggregate: whether every non-null value is true."""
+    def __init__(self): self.result = None
+
+    def step(self, value):
+        if value is None: return
+        self.result = bool(value) if self.result is None else self.result and bool(value)
+
+    def finalize(self): return self.result
+
+class _BoolOr:
+    """Postgres' bool_or aggregate: whether any non-null value is true."""
+    def __init__(self): self.result = None
+
+    def step(self, value):
+        if value is None: return
+        self.result = bool(value) if self.result is None else self.result or bool(value)
+
+    def finalize(self): return self.result
+
+def _encode(value, encoding):
+    if value is None: return None
+    if encoding != 'hex': raise ValueError(f"Unsupported encoding {encoding!r}")
+    return bytes(value).hex()
+
+def _decode(value, encoding):
+    if value is None: return None
+    if encoding != 'hex': raise ValueError(f"Unsupported encoding {encoding!r}")
+    return bytes.fromhex(value)
+
+def connectSqlite(path) -> sqlite3.Connection:
+    """Opens the database at path in WAL mode, with the Postgres functions
+    the package's queries use, in a transaction committed or rolled back by
+    openConnection."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    sqlite3.register_converter('TIMESTAMP', _parseTimestamp)
+    connection = sqlite3.connect(
+        str(path), detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    connection.create_function('encode', 2, _encode, deterministic=True)
+    connection.create_function('decode', 2, _decode, deterministic=True)
+    connection.create_function(
+        'starts_with', 2, lambda string, prefix: string.startswith(prefix), deterministic=True)
+    connection.create_aggregate('bool_and', 1, _BoolAnd)
+    connection.create_aggregate('bool_or', 1, _BoolOr)
+    connection.execute("BEGIN")
+    return connection
+
+_streamNames = itertools.count()
+
+class SqliteCursor(BatchCursorInterface, StreamCursorInterface):
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+
+    def execute(self, query: str, param: Tuple = None):
+        for statement in self.statements(scripts().get(query, query)):
+            call = _CALL.match(statement)
+            addColumn = _ADD_COLUMN.match(statement)
+            if call:
+                self.call(call.group(1), param if call.group(2).strip() else None)
+            elif addColumn:
+                self.addColumn(statement, addColumn)
+            else:
+                self.cursor.execute(translate(statement), _bind(param))
+
+    def addColumn(self, statement: str, match: re.Match):
+        """ALTER TABLE ... ADD COLUMN IF NOT EXISTS, which SQLite lacks."""
+        table, column = match.group(1), match.group(3)
+        columns = self.cursor.execute(f"PRAGMA table_info({table})").fetchall()
+        if any(name.lower() == column.lower() for _, name, *_ in columns): return
+        self.cursor.execute(statement[:match.start(2)] + statement[match.end(2):])
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def statements(query: str) -> List[str]:
+        return splitStatements(query)
+
+    def call(self, procedure: str, param: Tuple = None):
+        if procedure.lower() not in procedures():
+            raise sqlite3.OperationalError(f"procedure {procedure} does not exist")
+        names, statements = procedures()[procedure.lower()]
+        arguments = dict(zip(names, _bind(param)))
+        for statement in statements:
+            call = _CALL.match(statement)
+            if call:
+                self.call(call.group(1))
+            else:
+                self.cursor.execute(statement, arguments)
+
+    def executeMany(self, query: str, rows: Iterable[Sequence]):
+        self.cursor.executemany(translate(query), (_bind(row) for row in rows))
+
+    def iterChunks(
+        self, query: str, param: Tuple = None, chunkSize: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[List[Tuple]]:
+        """Yields the rows of query in lists of up to chunkSize. SQLite leaves
+        a query's results undefined if the tables it reads change before it
+        completes, so the rows are first copied into a temporary table, held
+        far more compactly than as Python objects, and read back from there.
+        The copy declares columns taken from a TIMESTAMP column as NUM, the
+        only type of NUMERIC affinity in the schema, so those are parsed here."""
+        table = f"stream{next(_streamNames)}"
+        self.cursor.execute(f"CREATE TEMP TABLE {table} AS {translate(query)}", _bind(param))
+        timestamps = [column for column, _, declared, *_ in self.cursor.execute(
+            f"PRAGMA temp.table_info({table})").fetchall() if declared == 'NUM']
+        reader = self.cursor.connection.cursor()
+        try:
+            reader.execute(f"SELECT * FROM {table} ORDER BY rowid")
+            while True:
+                rows = reader.fetchmany(chunkSize)
+                if not rows: return
+                yield [_parseTimestamps(row, timestamps) for row in rows] if timestamps else rows
+        finally:
+            reader.close()
+            self.cursor.execute(f"DROP TABLE {table}")
+
+    def fetchall(self) -> List[Tuple]:
+        return self.cursor.fetchall()
+
+    def getResult(self, query: str, param: Tuple = None) -> List[Tuple]:
+        self.execute(query, param)
+        return self.fetchall()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# (relative_path, st_mtime, st_size, st_dev, st_ino), with st_dev and st_ino
+# None where the filesystem has no stable inode numbers
+FileEntry = Tuple[str, float, int, Optional[int], Optional[int]]
+
+def _scanDirectory(path: str, prefix: str) -> Tuple[List[FileEntry], List[Tuple[str, str]]]:
+    """Lists the files directly within path, using the stat data held by
+    each DirEntry, along with the (path, prefix) of each subdirectory. Like
+    os.walk, symlinked directories are not descended into and unreadable
+    directories are skipped."""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append((entry.path, prefix + entry.name + os.sep))
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((prefix + entry.name, stat.st_mtime, stat.st_size)
+                             + ((stat.st_dev, stat.st_ino) if stat.st_ino else (None, None)))
+    except OSError:
+        pass
+    files.sort()
+    subdirs.sort()
+    return files, subdirs
+
+def scanTree(rootDir: Path, workers: int = None) -> Iterator[FileEntry]:
+    """Yields a FileEntry for every file under rootDir, with relative paths
+    joined by os.sep as Path.relative_to would give them.
+
+    Subdirectories are scanned concurrently on a thread pool of workers
+    threads (ThreadPoolExecutor's default if None), as soon as their parent
+    has been listed. The order is nonetheless deterministic: each directory's
+    files in name order, then each of its subdirectories in turn."""
+    executor = ThreadPoolExecutor(workers)
+    try:
+        pending = [executor.submit(_scanDirectory, str(rootDir), '')]
+        while pending:
+            files, subdirs = pending.pop().result()
+            yield from files
+            pending.extend(
+                executor.submit(_scanDirectory, path, prefix)
+                for path, prefix in reversed(subdirs))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+# Directory relative path, with a trailing os.sep or '' for rootDir, to st_mtime_ns
+DirectoryMtimes = Dict[str, int]
+
+@dataclass
+class TreeChanges:
+    """What scanChanges found: the files directly within every directory
+    whose listing changed, those directories, the known directories which
+    no longer exist, and the mtime of every directory now under rootDir."""
+    files: List[FileEntry] = field(default_factory=list)
+    rescanned: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    directories: DirectoryMtimes = field(default_factory=dict)
+
+    def merge(self, other: TreeChanges) -> TreeChanges:
+        """Adds what other found, in directories this didn't look at."""
+        self.files.extend(other.files)
+        self.rescanned.extend(other.rescanned)
+        self.removed.extend(other.removed)
+        self.directories.update(other.directories)
+        return self
+
+def _checkDirectory(
+    path: str, prefix: str, knownMtime: Optional[int]
+) -> Tuple[Optional[int], Optional[List[FileEntry]], Optional[List[Tuple[str, str]]]]:
+    """(mtime, files, subdirs) of the directory at path, with files and
+    subdirs None if its mtime is knownMtime, and mtime None if it's gone."""
+    try:
+        # Taken before listing, so entries changed while listing are seen next time
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, None, None
+    if mtime == knownMtime:
+        return mtime, None, None
+    files, subdirs = _scanDirectory(path, prefix)
+    return mtime, files, subdirs
+
+def scanChanges(rootDir: Path, known: DirectoryMtimes, workers: int = None) -> TreeChanges:
+    """Rescans only the directories under rootDir whose mtime differs from
+    the one known for them, as given by the directories of the previous
+    scan.
+
+    A directory's mtime changes whenever an entry is added to, removed from
+    or renamed within it, so the listing of a directory with an unchanged
+    mtime is taken to be unchanged and only its subdirectories are checked.
+    A file rewritten in place doesn't change its directory's mtime, and so
+    isn't seen here; updateCurrentFiles stats the files it already knows of
+    to find those."""
+    children: Dict[str, List[str]] = {}
+    for prefix in known:
+        if prefix:
+            parent = prefix[:prefix.rstrip(os.sep).rfind(os.sep) + 1]
+            children.setdefault(parent, []).append(prefix)
+
+    def removeSubtree(prefix: str):
+        changes.removed.append(prefix)
+        for child in children.get(prefix, ()):
+            removeSubtree(child)
+
+    changes = TreeChanges()
+    executor = ThreadPoolExecutor(workers)
+    try:
+        pending = [('', executor.submit(_checkDirectory, str(rootDir), '', known.get('')))]
+        while pending:
+            prefix, future = pending.pop()
+            mtime, files, subdirs = future.result()
+            if mtime is None:
+                if prefix in known: removeSubtree(prefix)
+                continue
+            changes.directories[prefix] = mtime
+            if files is None:
+                subdirs = [(os.path.join(rootDir, child), child) for child in children.get(prefix, ())]
+            else:
+                changes.rescanned.append(prefix)
+                changes.files.extend(files)
+                present = {child for _, child in subdirs}
+                for child in children.get(prefix, ()):
+                    if child not in present: removeSubtree(child)
+            pending.extend(
+                (child, executor.submit(_checkDirectory, path, child, known.get(child)))
+                for path, child in subdirs)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return changes
+
+def rescanDirectories(rootDir: Path, prefixes: List[str], workers: int = None) -> TreeChanges:
+    """Lists just the directories under rootDir given by prefixes, as
+    scanChanges would had each of their mtimes changed, without descending
+    into their subdirectories. Those which no longer exist are removed."""
+    changes = TreeChanges()
+    with ThreadPoolExecutor(workers) as executor:
+        results = executor.map(
+            lambda prefix: _checkDirectory(os.path.join(rootDir, prefix), prefix, None), prefixes)
+        for prefix, (mtime, files, _) in zip(prefixes, results):
+            if mtime is None:
+                changes.removed.append(prefix)
+                continue
+            changes.directories[prefix] = mtime
+            changes.rescanned.append(prefix)
+            changes.files.extend(files)
+    return changes
@@ -0,0 +1,236 @@
+"""Keeps currentFiles current by watching the archive with inotify.
+
+TreeWatcher turns inotify events into the set of directories whose listing
+may have changed. WatchDaemon waits for the events to settle, then rescans
+just those directories and hashes the files which changed, in transactions
+of bounded size.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Set
+
+from . import inotify
+from .hashCache import HashCache
+from .hashOptions import HashOptions
+from .main import (DEFAULT_ROOT_ID, applyTreeChanges, openConnection, printHashErrors,
+                   updateArchive, updateCurrentFiles, updateModifiedFilesHash,
+                   updateNewFilesHash)
+from .walk import TreeChanges, rescanDirectories
+
+WATCH_MASK = (
+    inotify.IN_CLOSE_WRITE | inotify.IN_ATTRIB | inotify.IN_CREATE | inotify.IN_DELETE
+    | inotify.IN_MOVED_FROM | inotify.IN_MOVED_TO | inotify.IN_ONLYDIR | inotify.IN_DONT_FOLLOW)
+
+class TreeWatcher:
+    """Watches every directory under rootDir. Each event marks the directory
+    it happened in as dirty; directories deleted or moved out from under a
+    watched one are marked removed along with everything watched below them.
+    If the kernel's event queue overflows, overflowed is set, as events have
+    been lost and the tree must be checked as a whole."""
+
+    def __init__(self, rootDir: Path):
+        self.rootDir = Path(rootDir)
+        self.inotify = inotify.Inotify()
+        self.prefixes: Dict[int, str] = {}
+        self.watches: Dict[str, int] = {}
+        self.dirty: Set[str] = set()
+        self.removed: Set[str] = set()
+        self.overflowed = False
+
+    def watch(self, prefix: str) -> bool:
+        """Watches the directory at prefix, returning False if it can't be."""
+        if prefix in self.watches: return True
+        try:
+            wd = self.inotify.addWatch(os.path.join(self.rootDir, prefix), WATCH_MASK)
+        except OSError as e:
+            # ENOSPC once fs.inotify.max_user_watches is reached
+            print(f"Can't watch {prefix or self.rootDir}: {e.strerror}")
+            return False
+        self.prefixes[wd] = prefix
+        self.watches[prefix] = wd
+        return True
+
+    def watchTree(self, prefix: str = '', markDirty: bool = False):
+        """Watches the directory at prefix and every directory below it.
+        Watches are added before each directory is listed, so nothing created
+        in them afterwards is missed; markDirty marks them all for a rescan
+        to pick up what was created before."""
+        pending = [prefix]
+        while pending:
+            prefix = pending.pop()
+            if not self.watch(prefix): continue
+            if markDirty: self.dirty.add(prefix)
+            try:
+                with os.scandir(os.path.join(self.rootDir, prefix)) as entries:
+                    pending.extend(
+                        prefix + entry.name + os.sep for entry in entries
+                        if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                pass
+
+    def watchDirectories(self, prefixes):
+        for prefix in prefixes:
+            self.watch(prefix)
+
+    def unwatchTree(self, prefix: str):
+        for watched in [watched for watched in self.watches if watched.startswith(prefix)]:
+            self.removed.add(watched)
+            self.dirty.discard(watched)
+            wd = self.watches.pop(watched)
+            del self.prefixes[wd]
+            self.inotify.removeWatch(wd)
+
+    def readEvents(self, timeout: float = None) -> int:
+        """Handles the events which arrive within timeout seconds, returning
+        how many there were."""
+        count = 0
+        for event in self.inotify.read(timeout):
+            count += 1
+            if event.mask & inotify.IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if event.mask & inotify.IN_IGNORED:
+                prefix = self.prefixes.pop(event.wd, None)
+                if prefix is not None: del self.watches[prefix]
+                continue
+            prefix = self.prefixes.get(event.wd)
+            if prefix is None: continue
+            self.dirty.add(prefix)
+            if event.mask & inotify.IN_ISDIR:
+                child = prefix + event.name + os.sep
+                if event.mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+                    self.unwatchTree(child)
+                    self.removed.add(child)
+                elif event.mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                    self.removed.discard(child)
+                    self.watchTree(child, markDirty=True)
+        return count
+
+    def takeChanges(self) -> TreeChanges:
+        """Rescans the dirty directories, returning what they now hold along
+        with the removed directories, and starts collecting afresh."""
+        dirty, removed = sorted(self.dirty), sorted(self.removed - self.dirty)
+        self.dirty, self.removed = set(), set()
+        changes = rescanDirectories(self.rootDir, dirty)
+        changes.removed.extend(removed)
+        return changes
+
+    def close(self):
+        self.inotify.close()
+
+class WatchDaemon:
+    """Watches rootDir, the directory of root root_id, applying changes to
+    currentFiles once no event has
+    arrived for debounceSeconds, or maxDelaySeconds after the first change
+    waiting to be applied. Each transaction covers at most
+    maxDirectoriesPerTransaction directories. The archive tables are only
+    updated when requestUpdateArchive is called."""
+
+    def __init__(
+        self,
+        connect: dict,
+        rootDir: Path,
+        hashOptions: HashOptions = None,
+        hashCache: HashCache = None,
+        debounceSeconds: float = 2.0,
+        maxDelaySeconds: float = 30.0,
+        maxDirectoriesPerTransaction: int = 500,
+        root_id: int = DEFAULT_ROOT_ID
+    ):
+        self.connect = connect
+        self.rootDir = Path(rootDir)
+        self.root_id = root_id
+        self.hashOptions = hashOptions
+        self.hashCache = hashCache
+        self.debounceSeconds = debounceSeconds
+        self.maxDelaySeconds = maxDelaySeconds
+        self.maxDirectoriesPerTransaction = maxDirectoriesPerTransaction
+        self.updateArchiveRequested = threading.Event()
+        self.stopRequested = threading.Event()
+        self.watcher = None
+
+    def requestUpdateArchive(self):
+        self.updateArchiveRequested.set()
+
+    def stop(self):
+        self.stopRequested.set()
+
+    def run(self):
+        self.watcher = TreeWatcher(self.rootDir)
+        try:
+            self.watcher.watchTree()
+            # Catch up on whatever changed while not watching
+            self.rescanAll()
+            firstEvent = lastEvent = None
+            while not self.stopRequested.is_set():
+                if self.watcher.readEvents(timeout=self.debounceSeconds / 4):
+                    lastEvent = time.monotonic()
+                    firstEvent = firstEvent or lastEvent
+                if self.watcher.overflowed:
+                    self.rescanAll()
+                    firstEvent = lastEvent = None
+                elif firstEvent is not None and (
+                        time.monotonic() - lastEvent >= self.debounceSeconds
+                        or time.monotonic() - firstEvent >= self.maxDelaySeconds):
+                    self.applyChanges()
+                    firstEvent = lastEvent = None
+                if self.updateArchiveRequested.is_set():
+                    self.updateArchiveRequested.clear()
+                    self.applyChanges()
+                    with openConnection(self.connect) as cursor:
+                        updateArchive(cursor)
+        finally:
+            self.watcher.close()
+
+    def rescanAll(self):
+        """Recovers from lost events with an incremental scan of the whole
+        tree, which only lists directories whose mtime has changed or which
+        hold a file rewritten in place (see updateCurrentFiles)."""
+        print("Rescanning", self.rootDir)
+        self.watcher.overflowed = False
+        self.watcher.dirty.clear()
+        self.watcher.removed.clear()
+        with openConnection(self.connect) as cursor:
+            changes = updateCurrentFiles(cursor, self.rootDir, self.root_id)
+            self.updateHashes(cursor)
+        self.watcher.watchDirectories(changes.directories)
+
+    def applyChanges(self):
+        changes = self.watcher.takeChanges()
+        for batch in self.batches(changes):
+            with openConnection(self.connect) as cursor:
+                applyTreeChanges(cursor, batch, self.root_id)
+                self.updateHashes(cursor)
+
+    def batches(self, changes: TreeChanges) -> List[TreeChanges]:
+        """Splits changes into batches of at most maxDirectoriesPerTransaction
+        directories, each holding the files found in its directories."""
+        stale = [(prefix, True) for prefix in changes.rescanned] \
+            + [(prefix, False) for prefix in changes.removed]
+        filesByDirectory: Dict[str, list] = {}
+        for file in changes.files:
+            filesByDirectory.setdefault(file[0][:file[0].rfind(os.sep) + 1], []).append(file)
+        batches = []
+        for start in range(0, len(stale), self.maxDirectoriesPerTransaction):
+            batch = TreeChanges()
+            for prefix, rescanned in stale[start:start + self.maxDirectoriesPerTransaction]:
+                if rescanned:
+                    batch.rescanned.append(prefix)
+                    batch.directories[prefix] = changes.directories[prefix]
+                    batch.files.extend(filesByDirectory.get(prefix, ()))
+                else:
+                    batch.removed.append(prefix)
+            batches.append(batch)
+        return batches
+
+    def updateHashes(self, cursor):
+        result = updateNewFilesHash(
+            cursor, self.rootDir, self.hashOptions, self.hashCache, self.root_id)
+        result.merge(updateModifiedFilesHash(
+            cursor, self.rootDir, self.hashOptions, self.hashCache, self.root_id))
+        printHashErrors(result)
+        if self.hashCache is not None: self.hashCache.commit()
@@ -1,5 +1,3 @@
 module marek/duplicateAndDeletedFileTracker
 
-go 1.18
-
-require golang.org/x/sync v0.0.0-20220722155255-886fb9371eb4
+go 1.19
@@ -1,10 +1,11 @@
 from duplicateAndDeletedFileTracker import queries
 from duplicateAndDeletedFileTracker.config import config
 from duplicateAndDeletedFileTracker.main import openConnection
+from duplicateAndDeletedFileTracker.schema import migrate
 
 while(True):
     print("WARNING This will delete ALL archive data in database:")
-    print(config.connect["dbname"])
+    print(config.connect.get("sqlite") or config.connect["dbname"])
     print("Continue [N / Y]?")
     x = input(">>>")
     if x == "N":
@@ -14,4 +15,4 @@ while(True):
 
 with openConnection(config.connect) as cursor:
     cursor.execute(queries.resetAllTables)
-    cursor.execute(queries.resetViewAndProcs)
\ No newline at end of file
+    migrate(cursor)
\ No newline at end of file
@@ -0,0 +1,26 @@
+import argparse
+
+from duplicateAndDeletedFileTracker import config
+from duplicateAndDeletedFileTracker.duplicatePolicies import parsePolicy, resolveDuplicates
+from duplicateAndDeletedFileTracker.main import openConnection
+from duplicateAndDeletedFileTracker.roots import configuredRoots, registerRoots
+
+# Resolves the duplicates found by the last updateDatabase.py run without
+# prompting, by applying config.duplicatePolicies (or --policy) in order.
+# Duplicates no policy decides on are left for updateDatabase.py to prompt about.
+
+parser = argparse.ArgumentParser(description="Resolve duplicates by policy")
+parser.add_argument('--policy', action='append', dest='policies',
+                    help="policy to apply, in order, instead of config.duplicatePolicies")
+parser.add_argument('--dry-run', action='store_true',
+                    help="report the decisions without deleting or archiving anything")
+args = parser.parse_args()
+
+policies = [parsePolicy(spec) for spec in args.policies or getattr(config, 'duplicatePolicies', [])]
+if not policies:
+    parser.error("no policies given, set config.duplicatePolicies or pass --policy")
+
+with openConnection(config.connect) as cursor:
+    roots = registerRoots(cursor, configuredRoots(config))
+    report = resolveDuplicates(cursor, roots, policies, dryRun=args.dry_run)
+report.print(args.dry_run)
@@ -1,5 +1,15 @@
 import unittest
 from tests.archiveDatabaseTest import archiveDatabaseTestCase
+from tests.duplicateReviewTest import duplicateReviewTestCase
+from tests.explainViewsTest import explainViewsTestCase
+from tests.hashCacheTest import hashCacheTestCase
+from tests.ioScheduleTest import ioScheduleTestCase
+from tests.metricsTest import metricsTestCase
+from tests.rootsTest import rootsTestCase
+from tests.schemaTest import schemaTestCase
+from tests.sqliteBackendTest import sqliteBackendTestCase
+from tests.walkTest import walkTestCase
+from tests.watchTest import watchTestCase
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,13 +1,23 @@
 import datetime
+import os
 import shutil
+import tempfile
 import unittest
 from pathlib import Path
 
-from duplicateAndDeletedFileTracker import config, queries
+from duplicateAndDeletedFileTracker import config, metrics, queries
+from duplicateAndDeletedFileTracker.duplicatePolicies import (
+    KeepAll, KeepOldest, RemovePreviouslyDeleted, parsePolicy, resolveDuplicates)
+from duplicateAndDeletedFileTracker.hashCache import HashCache
 from duplicateAndDeletedFileTracker.main import (
     CursorInterface, ExtendedCursorInterface, getDuplicateManagementCallbacks,
-    loadCurrentFiles, openConnection, prettyPrint, 
-    updateModifiedFilesHash, updateNewFilesHash)
+    goUpdateFilesHash, hashFile, iterChunks, loadCurrentFiles, updateFilesHash, openConnection,
+    prettyPrint, rewrittenDirectories, streamUpdateFilesHash, updateCurrentFiles,
+    updateModifiedFilesHash, updateNewFilesHash, updateNewFilesPartialHash)
+from duplicateAndDeletedFileTracker.pipeline import pipelinedLoadCurrentFiles
+from duplicateAndDeletedFileTracker.pyHash import PyHasherSession
+from duplicateAndDeletedFileTracker.schema import migrate
+from duplicateAndDeletedFileTracker.walk import TreeChanges
 
 from tests import test_queries
 from tests.expected_tables import expected_tables
@@ -17,8 +27,8 @@ from tests.test_config import config
 class archiveDatabaseTestCase(unittest.TestCase):
     def setup_db_for_test(self, cursor: CursorInterface):
         cursor.execute(queries.resetAllTables)
+        migrate(cursor)
         cursor.execute(queries.resetCurrentFiles)
-        cursor.execute(queries.resetViewAndProcs)
         cursor.execute(test_queries.setupTest_archiveFiles)
         shutil.rmtree(config.rootPath)
         shutil.copytree(config.fileStructurePath,
@@ -29,6 +39,7 @@ class archiveDatabaseTestCase(unittest.TestCase):
         loadCurrentFiles(cursor, config.rootPath)
         updateNewFilesHash(cursor, config.rootPath)
         updateModifiedFilesHash(cursor, config.rootPath)
+        cursor.execute("CALL classifyDuplicates();")
 
     def setup_with_updateArchive(self, cursor: CursorInterface):
         self.setup_with_hash_reading(cursor)
@@ -93,6 +104,23 @@ class archiveDatabaseTestCase(unittest.TestCase):
             ]:
                 self.assertIn(element, result)
 
+    def test_loadCurrentFiles_perRowFallbackMatchesCopy(self):
+        class PlainCursor(CursorInterface):
+            def __init__(self, cursor): self.cursor = cursor
+            def execute(self, query, param=None): return self.cursor.execute(query, param)
+            def fetchall(self): return self.cursor.fetchall()
+
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            query = "SELECT relative_path, modified FROM currentFiles ORDER BY relative_path"
+
+            loadCurrentFiles(cursor, config.rootPath)
+            copied = cursor.getResult(query)
+            loadCurrentFiles(PlainCursor(cursor), config.rootPath)
+            inserted = cursor.getResult(query)
+
+            self.assertEqual(copied, inserted)
+
     def test_update_newPathFiles_and_modifiedFiles_hashes(self):
         with openConnection(config.connect) as cursor:
             self.setup_db_for_test(cursor)
@@ -102,7 +130,7 @@ class archiveDatabaseTestCase(unittest.TestCase):
             updateModifiedFilesHash(cursor, config.rootPath)
 
             result = cursor.getResult(
-                "SELECT relative_path, file_hash FROM currentFiles")
+                "SELECT relative_path, encode(file_hash, 'hex') FROM currentFiles")
             for element in [
                 ('alpha\\new_isDup.txt',
                  '740ad0f2a20c5d4167f7a299aaa044ffddd1ea82a290cfbdcf0eefb27da342d5'),
@@ -111,6 +139,269 @@ class archiveDatabaseTestCase(unittest.TestCase):
             ]:
                 self.assertIn(element, result)
 
+    def test_newFilesWithUnmatchedSizeAreNotFullyHashed(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            cursor.execute("UPDATE archiveFiles SET file_size = -1")
+            cursor.execute("UPDATE archiveDeletedFiles SET file_size = -1")
+            loadCurrentFiles(cursor, config.rootPath)
+
+            updateNewFilesHash(cursor, config.rootPath)
+
+            result = cursor.getResult(
+                "SELECT relative_path, file_hash IS NULL, partial_hash IS NULL "
+                "FROM currentFiles")
+            self.assertIn(('alpha\\bravo\\new.txt', True, False), result)
+            # New files duplicating each other are still told apart by full hash
+            self.assertIn(('foxtrot\\newDupPair_1.txt', False, False), result)
+            self.assertPathInTable(cursor, 'alpha\\bravo\\new.txt', 'newUnseenFiles')
+
+    def test_unsizedDeletedFilesMatchAnyExtension(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            cursor.execute("UPDATE archiveFiles SET file_size = -1")
+            cursor.execute(
+                "UPDATE archiveDeletedFiles SET file_size = NULL, "
+                "relative_path = relative_path || '.jpg'")
+            loadCurrentFiles(cursor, config.rootPath)
+
+            updateNewFilesHash(cursor, config.rootPath)
+
+            self.assertIn((False,), cursor.getResult(
+                "SELECT file_hash IS NULL FROM currentFiles "
+                "WHERE relative_path = 'alpha\\bravo\\new.txt'"))
+
+    def test_deferredHashNotTakenFromAnotherFile(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            loadCurrentFiles(cursor, config.rootPath)
+            updateNewFilesPartialHash(cursor, config.rootPath)
+            cursor.execute(
+                "INSERT INTO archiveDeletedFiles (relative_path, modified, deleteDetected, "
+                "file_size, partial_hash) "
+                "SELECT 'gone.txt', modified, modified, file_size, partial_hash "
+                "FROM currentFiles WHERE relative_path = 'alpha\\bravo\\new.txt'")
+
+            updateNewFilesHash(cursor, config.rootPath)
+
+            self.assertEqual(cursor.getResult(
+                "SELECT file_hash IS NULL FROM currentFiles "
+                "WHERE relative_path = 'alpha\\bravo\\new.txt'"), [(False,)])
+            self.assertEqual(cursor.getResult(
+                "SELECT file_hash IS NULL FROM archiveDeletedFiles "
+                "WHERE relative_path = 'gone.txt'"), [(True,)])
+
+    def reconcile(self, cursor: CursorInterface):
+        loadCurrentFiles(cursor, config.rootPath)
+        updateNewFilesHash(cursor, config.rootPath)
+        updateModifiedFilesHash(cursor, config.rootPath)
+        cursor.execute("CALL reconcileArchive();")
+
+    def test_partiallyHashedArchivedFileMatchedWhenMoved(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            cursor.execute("UPDATE archiveFiles SET file_size = -1")
+            cursor.execute("UPDATE archiveDeletedFiles SET file_size = -1")
+            self.reconcile(cursor)
+            self.assertEqual(cursor.getResult(
+                "SELECT file_hash IS NULL FROM archiveFiles "
+                "WHERE relative_path = 'alpha\\bravo\\new.txt'"), [(True,)])
+
+            os.rename(os.path.join(config.rootPath, 'alpha', 'bravo', 'new.txt'),
+                      os.path.join(config.rootPath, 'alpha', 'newMoved.txt'))
+            self.reconcile(cursor)
+
+            self.assertEqual(cursor.getResult(
+                "SELECT classification, matched_path FROM fileClassifications "
+                "WHERE relative_path = 'alpha\\newMoved.txt'"),
+                [('moved', 'alpha\\bravo\\new.txt')])
+            self.assertPathInTable(cursor, 'alpha\\newMoved.txt', 'archiveFiles')
+            self.assertPathNotInTable(cursor, 'alpha\\bravo\\new.txt', 'archiveDeletedFiles')
+
+    def test_partiallyHashedDeletedFileMatchedWhenCopiedBack(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            cursor.execute("UPDATE archiveFiles SET file_size = -1")
+            cursor.execute("UPDATE archiveDeletedFiles SET file_size = -1")
+            self.reconcile(cursor)
+            new = Path(config.rootPath, 'alpha', 'bravo', 'new.txt')
+            contents = new.read_bytes()
+            new.unlink()
+            self.reconcile(cursor)
+            self.assertEqual(cursor.getResult(
+                "SELECT file_hash IS NULL FROM archiveDeletedFiles "
+                "WHERE relative_path = 'alpha\\bravo\\new.txt'"), [(True,)])
+
+            new.write_bytes(contents)
+            self.reconcile(cursor)
+
+            self.assertEqual(cursor.getResult(
+                "SELECT classification, matched_path FROM fileClassifications "
+                "WHERE relative_path = 'alpha\\bravo\\new.txt'"),
+                [('duplicatePreviouslyDeleted', 'alpha\\bravo\\new.txt')])
+
+    def test_hashErrorsAreCollected(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            loadCurrentFiles(cursor, config.rootPath)
+            cursor.execute(
+                "INSERT INTO currentFiles (relative_path) VALUES ('missing.txt')")
+            files_id_path = cursor.getResult(
+                "SELECT file_id, relative_path FROM currentFiles "
+                "WHERE relative_path IN ('missing.txt', 'present.txt')")
+
+            result = goUpdateFilesHash(
+                cursor, config.rootPath, files_id_path, "currentFiles")
+
+            self.assertEqual(result.updated, 1)
+            self.assertEqual([path for _, path, _ in result.errors], ['missing.txt'])
+            self.assertIn(
+                ('present.txt', '43f9b89c0b9d22d8110ead813ea3949f20592a8bfc3c777d2d49e64da3b0cc9b'),
+                cursor.getResult("SELECT relative_path, encode(file_hash, 'hex') FROM currentFiles"))
+
+    def test_pythonHashEngineMatchesGo(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            loadCurrentFiles(cursor, config.rootPath)
+            files_id_path = cursor.getResult("SELECT file_id, relative_path FROM currentFiles")
+            query = "SELECT relative_path, file_hash FROM currentFiles ORDER BY file_id"
+
+            goUpdateFilesHash(cursor, config.rootPath, files_id_path, "currentFiles")
+            goHashes = cursor.getResult(query)
+            cursor.execute("UPDATE currentFiles SET file_hash = NULL")
+            updateFilesHash(cursor, config.rootPath, files_id_path, "currentFiles")
+
+            self.assertEqual(cursor.getResult(query), goHashes)
+
+    def test_hashCacheAvoidsRereading(self):
+        query = "SELECT relative_path, file_hash, partial_hash FROM currentFiles ORDER BY relative_path"
+        with openConnection(config.connect) as cursor, tempfile.TemporaryDirectory() as cacheDir:
+            self.setup_db_for_test(cursor)
+            with HashCache(Path(cacheDir, 'hashCache.sqlite3')) as hashCache:
+                loadCurrentFiles(cursor, config.rootPath)
+                updateNewFilesHash(cursor, config.rootPath, hashCache=hashCache)
+                updateModifiedFilesHash(cursor, config.rootPath, hashCache=hashCache)
+            hashes = cursor.getResult(query)
+
+            recorder = metrics.enable()
+            try:
+                with HashCache(Path(cacheDir, 'hashCache.sqlite3')) as hashCache:
+                    loadCurrentFiles(cursor, config.rootPath)
+                    updateNewFilesHash(cursor, config.rootPath, hashCache=hashCache)
+                    updateModifiedFilesHash(cursor, config.rootPath, hashCache=hashCache)
+            finally:
+                metrics.recorder = metrics.MetricsRecorder(enabled=False)
+
+            self.assertEqual(cursor.getResult(query), hashes)
+            self.assertNotIn('filesHashed', recorder.totals)
+            self.assertNotIn('filesPartialHashed', recorder.totals)
+
+    def test_streamUpdateFilesHashInChunks(self):
+        query = "SELECT file_id, relative_path FROM currentFiles ORDER BY file_id"
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            loadCurrentFiles(cursor, config.rootPath)
+            files_id_path = cursor.getResult(query)
+            self.assertEqual(
+                [row for chunk in iterChunks(cursor, query, chunkSize=3) for row in chunk],
+                files_id_path)
+
+            with PyHasherSession(workers=2) as session:
+                result = streamUpdateFilesHash(
+                    cursor, config.rootPath, iterChunks(cursor, query, chunkSize=3),
+                    "currentFiles", session)
+
+            self.assertEqual(result.updated, len(files_id_path))
+            for relative_path, file_hash in cursor.getResult(
+                    "SELECT relative_path, file_hash FROM currentFiles"):
+                self.assertEqual(bytes(file_hash), hashFile(Path(config.rootPath, relative_path)))
+
+    def test_hardLinkedFilesAreReadOnce(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            original = Path(config.rootPath, 'present.txt')
+            os.link(original, Path(config.rootPath, 'presentLink.txt'))
+            loadCurrentFiles(cursor, config.rootPath)
+            files_id_path = cursor.getResult(
+                "SELECT file_id, relative_path FROM currentFiles "
+                "WHERE relative_path IN ('present.txt', 'presentLink.txt')")
+
+            recorder = metrics.enable()
+            try:
+                result = goUpdateFilesHash(cursor, config.rootPath, files_id_path, "currentFiles")
+            finally:
+                metrics.recorder = metrics.MetricsRecorder(enabled=False)
+
+            self.assertEqual(result.updated, 2)
+            self.assertEqual(result.bytesSaved, original.stat().st_size)
+            self.assertEqual(recorder.totals['filesHashed'], 1)
+            self.assertEqual(len(cursor.getResult(
+                "SELECT DISTINCT file_hash FROM currentFiles "
+                "WHERE relative_path IN ('present.txt', 'presentLink.txt')")), 1)
+
+    def test_incrementalUpdateMatchesFullScan(self):
+        def viewContents(cursor):
+            updateNewFilesHash(cursor, config.rootPath)
+            updateModifiedFilesHash(cursor, config.rootPath)
+            contents = {
+                view: sorted(cursor.getResult(f"SELECT relative_path FROM {view}"))
+                for view in ('newPathFiles', 'modifiedFiles', 'deletedFiles',
+                             'movedFiles', 'newUnseenFiles', 'duplicateFiles')
+            }
+            contents['currentFiles'] = cursor.getResult(
+                "SELECT relative_path, modified, file_size, encode(file_hash, 'hex') "
+                "FROM currentFiles ORDER BY relative_path")
+            return contents
+
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            for path, _, _ in os.walk(config.rootPath):
+                os.utime(path, ns=(0, 0))
+            updateCurrentFiles(cursor, config.rootPath)
+            viewContents(cursor)
+
+            Path(config.rootPath, 'alpha', 'bravo', 'added.txt').write_text('added')
+            Path(config.rootPath, 'foxtrot', 'present_hasDup.txt').unlink()
+            # Rewritten in place, leaving its directory's mtime as it was
+            rewritten = Path(config.rootPath, 'present.txt')
+            rewritten.write_text('rewritten in place')
+            os.utime(rewritten, (1e9, 1e9))
+            updateCurrentFiles(cursor, config.rootPath)
+            incremental = viewContents(cursor)
+            self.assertIn(('present.txt',), incremental['modifiedFiles'])
+
+            loadCurrentFiles(cursor, config.rootPath)
+            self.assertEqual(incremental, viewContents(cursor))
+
+    def test_fractionalMtimesAreNotRewrites(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            for i, path in enumerate(Path(config.rootPath).rglob('*')):
+                if path.is_file():
+                    os.utime(path, (1e9 + 0.3 + 0.4 * (i % 2), 1e9 + 0.3 + 0.4 * (i % 2)))
+            loadCurrentFiles(cursor, config.rootPath)
+
+            self.assertEqual(
+                rewrittenDirectories(cursor, config.rootPath, TreeChanges()), [])
+
+    def test_pipelinedLoadMatchesPhased(self):
+        query = """SELECT relative_path, encode(partial_hash, 'hex'), encode(file_hash, 'hex')
+            FROM currentFiles ORDER BY relative_path"""
+
+        with openConnection(config.connect) as cursor:
+            self.setup_db_for_test(cursor)
+            loadCurrentFiles(cursor, config.rootPath)
+            updateNewFilesHash(cursor, config.rootPath)
+            updateModifiedFilesHash(cursor, config.rootPath)
+            phased = cursor.getResult(query)
+
+            result = pipelinedLoadCurrentFiles(
+                cursor, config.rootPath, chunkSize=2, maxInFlight=3)
+            self.assertGreater(result.updated, 0)
+            updateNewFilesHash(cursor, config.rootPath)
+            updateModifiedFilesHash(cursor, config.rootPath)
+            self.assertEqual(phased, cursor.getResult(query))
+
     def test_selectViews(self):
         with openConnection(config.connect) as cursor:
             self.setup_with_hash_reading(cursor)
@@ -157,7 +448,7 @@ class archiveDatabaseTestCase(unittest.TestCase):
             self.assertEmptyTable(cursor, "modifiedFiles")
 
             result = cursor.getResult(
-                "SELECT relative_path, file_hash, modified FROM archiveFiles")
+                "SELECT relative_path, encode(file_hash, 'hex'), modified FROM archiveFiles")
             self.assertIn(
                 ('alpha\\bravo\\modified.txt',
                     'e8ce5dcaf408935ff76747226d2e8bee4319a2f593c1d7a838115e56183d1f37',
@@ -192,6 +483,43 @@ class archiveDatabaseTestCase(unittest.TestCase):
             self.assertPathInTable(
                 cursor, "alpha\\deletedFile.txt", "archiveDeletedFiles")
 
+    def test_reconcileArchive(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_with_hash_reading(cursor)
+
+            cursor.execute("CALL reconcileArchive();")
+
+            result = cursor.getResult(
+                "SELECT classification, relative_path FROM fileClassifications")
+            for element in [
+                ('moved', 'foxtrot\\movedFile.txt'),
+                ('modified', 'alpha\\bravo\\modified.txt'),
+                ('newUnseen', 'alpha\\bravo\\new.txt'),
+                ('newUnseen', 'alpha\\bravo\\moved-newOrginalLoc.txt'),
+                ('deleted', 'alpha\\deletedFile.txt'),
+                ('duplicate', 'alpha\\new_isDup.txt'),
+                ('duplicatePreviouslyDeleted', 'foxtrot\\dupPreviouslyDeleted.txt'),
+            ]:
+                self.assertIn(element, result)
+            for view in ('movedFiles', 'modifiedFiles', 'newUnseenFiles', 'deletedFiles'):
+                self.assertEmptyTable(cursor, view)
+
+    def test_classificationsMatchViews(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_with_hash_reading(cursor)
+            duplicates = cursor.getResult(
+                "SELECT file_id, original_path FROM duplicateFiles ORDER BY file_id")
+            deleted = cursor.getResult("SELECT file_id FROM deletedFiles ORDER BY file_id")
+
+            self.assertEqual(cursor.getResult(
+                "SELECT file_id, matched_path FROM fileClassifications "
+                "WHERE classification = 'duplicate' ORDER BY file_id"), duplicates)
+            cursor.execute("CALL updateArchiveMovedFiles();")
+            cursor.execute("CALL updateArchiveDeletedFiles();")
+            self.assertEqual(cursor.getResult(
+                "SELECT file_id FROM fileClassifications "
+                "WHERE classification = 'deleted' ORDER BY file_id"), deleted)
+
     def test_keepAllDuplicates(self):
         with openConnection(config.connect) as cursor:
             self.setup_with_hash_reading(cursor)
@@ -254,6 +582,76 @@ class archiveDatabaseTestCase(unittest.TestCase):
             self.assertFalse(
                 Path(config.rootPath, "alpha\\new_isDup.txt").exists())
 
+    def test_keepAndRemoveDuplicatesInBatches(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_with_hash_reading(cursor)
+            def classifiedIds(classification):
+                return [file_id for (file_id,) in cursor.getResult(
+                    "SELECT DISTINCT file_id FROM fileClassifications "
+                    "WHERE classification = %s", (classification,))]
+
+            getDuplicateManagementCallbacks(
+                cursor, "duplicateFiles", config.rootPath
+            )["k[]"](classifiedIds('duplicate'))
+            getDuplicateManagementCallbacks(
+                cursor, "duplicatePreviouslyDeletedFiles", config.rootPath
+            )["r[]"](classifiedIds('duplicatePreviouslyDeleted'))
+
+            self.assertEqual(classifiedIds('duplicate'), [])
+            self.assertEqual(classifiedIds('duplicatePreviouslyDeleted'), [])
+            self.assertPathInTable(cursor, "alpha\\new_isDup.txt", "archiveFiles")
+            self.assertPathNotInTable(
+                cursor, "foxtrot\\dupPreviouslyDeleted.txt", "currentFiles")
+            self.assertFalse(
+                Path(config.rootPath, "foxtrot\\dupPreviouslyDeleted.txt").exists())
+
+    def test_resolveDuplicatesByPolicy(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_with_hash_reading(cursor)
+            policies = [RemovePreviouslyDeleted(), KeepAll()]
+
+            report = resolveDuplicates(cursor, config.rootPath, policies, dryRun=True)
+            self.assertIn((
+                "foxtrot\\dupPreviouslyDeleted.txt", 'remove'
+            ), [(path, decision) for _, _, decision, path, _ in report.decisions])
+            self.assertTrue(
+                Path(config.rootPath, "foxtrot\\dupPreviouslyDeleted.txt").exists())
+            self.assertPathNotInTable(cursor, "alpha\\new_isDup.txt", "archiveFiles")
+
+            report = resolveDuplicates(cursor, config.rootPath, policies)
+            self.assertEqual(report.errors, [])
+            self.assertEqual(cursor.getResult(
+                "SELECT file_id FROM fileClassifications "
+                "WHERE classification IN ('duplicate', 'duplicatePreviouslyDeleted')"), [])
+            self.assertPathInTable(cursor, "alpha\\new_isDup.txt", "archiveFiles")
+            self.assertPathNotInTable(
+                cursor, "foxtrot\\dupPreviouslyDeleted.txt", "currentFiles")
+            self.assertFalse(
+                Path(config.rootPath, "foxtrot\\dupPreviouslyDeleted.txt").exists())
+
+    def test_keepOldestOnlyReplacesWhenAsked(self):
+        with openConnection(config.connect) as cursor:
+            self.setup_with_hash_reading(cursor)
+            cursor.execute(
+                "UPDATE fileClassifications SET modified = %s WHERE classification = 'duplicate'",
+                (datetime.datetime(2000, 1, 1),))
+            cursor.execute(
+                "INSERT INTO fileClassifications (classification, file_id, root_id, "
+                "relative_path, file_hash, modified, file_size, partial_hash, "
+                "matched_root_id, matched_path) "
+                "SELECT classification, file_id + 1000, root_id, relative_path || '.copy', "
+                "file_hash, modified, file_size, partial_hash, matched_root_id, matched_path "
+                "FROM fileClassifications WHERE classification = 'duplicate'")
+            def decisions(policy):
+                report = resolveDuplicates(cursor, config.rootPath, [policy], dryRun=True)
+                return [(path, decision) for _, _, decision, path, _ in report.decisions]
+
+            self.assertEqual(decisions(KeepOldest()), [])
+            self.assertEqual(parsePolicy('keepOldest'), KeepOldest())
+            replacing = decisions(parsePolicy('keepOldest:replace'))
+            self.assertIn(("alpha\\new_isDup.txt", 'replace'), replacing)
+            self.assertNotIn(("alpha\\new_isDup.txt.copy", 'replace'), replacing)
+
     def test_removeAllDuplicatesPreviouslyDelected(self):
         with openConnection(config.connect) as cursor:
             self.setup_with_hash_reading(cursor)
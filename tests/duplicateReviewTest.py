@@ -0,0 +1,50 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from duplicateAndDeletedFileTracker.duplicateReview import KEEP, REMOVE, DuplicateReview
+
+
+class duplicateReviewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.kept, self.removed = [], []
+        rows = [
+            (1, 'a.txt', 'orig_a.txt', 'hashA'),
+            (1, 'a.txt', 'other_a.txt', 'hashA'),
+            (2, 'a2.txt', 'orig_a.txt', 'hashA'),
+            (3, 'b.txt', 'orig_b.txt', 'hashB'),
+            (4, 'c.txt', 'orig_c.txt', 'hashC'),
+        ]
+        self.review = DuplicateReview(
+            rows, self.kept.append, self.removed.append, pageSize=2, flushSize=2)
+
+    def test_snapshotIsGroupedByHash(self):
+        self.assertEqual(self.review.groups, [('hashA', [1, 2]), ('hashB', [3]), ('hashC', [4])])
+        self.assertEqual(self.review.files[1].matched_paths, ['orig_a.txt', 'other_a.txt'])
+        self.assertEqual(self.review.pageCount, 2)
+        self.assertEqual(self.review.undecided, 4)
+
+    def test_decisionsAreFlushedInBatches(self):
+        self.assertTrue(self.review.decide(1, KEEP))
+        self.assertFalse(self.review.decide(1, REMOVE))
+        self.assertFalse(self.review.decide(99, KEEP))
+        self.assertTrue(self.review.decide(3, REMOVE))
+        self.assertEqual((self.kept, self.removed), ([], []))
+
+        self.assertTrue(self.review.decide(2, KEEP))
+        self.assertEqual(self.kept, [[1, 2]])
+
+        self.review.flush()
+        self.assertEqual(self.removed, [[3]])
+        self.assertEqual(self.review.undecided, 1)
+
+    def test_pagesShowDecisions(self):
+        self.review.decide(4, REMOVE)
+        self.review.turnPage(5)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.review.printPage()
+
+        self.assertIn('page 2 of 2', output.getvalue())
+        self.assertIn('c.txt [remove]', output.getvalue())
+        self.assertNotIn('a.txt', output.getvalue())
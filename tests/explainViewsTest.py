@@ -0,0 +1,60 @@
+import unittest
+
+from duplicateAndDeletedFileTracker import queries
+from duplicateAndDeletedFileTracker.main import (ExtendedCursorInterface,
+                                                 openConnection)
+from duplicateAndDeletedFileTracker.schema import migrate
+
+from tests import test_queries
+from tests.test_config import config
+
+
+@unittest.skipIf('sqlite' in config.connect, "query plans are specific to Postgres")
+class explainViewsTestCase(unittest.TestCase):
+    """Checks the reconciliation views are planned with index or hash joins,
+    rather than nested loops over sequential scans, on a large archive."""
+
+    rows = 100000
+    views = (
+        'newPathFiles',
+        'newUnseenFiles',
+        'hashMatchesArchiveFiles',
+        'movedFiles',
+        'duplicateFiles',
+        'modifiedFiles',
+        'deletedFiles',
+        'duplicatePreviouslyDeletedFiles',
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        with openConnection(config.connect) as cursor:
+            cursor.execute(queries.resetAllTables)
+            migrate(cursor)
+            cursor.execute(test_queries.populateLargeTables, {'rows': cls.rows})
+
+    def getPlan(self, cursor: ExtendedCursorInterface, view: str) -> dict:
+        result = cursor.getResult(f"EXPLAIN (FORMAT JSON) SELECT * FROM {view}")
+        return result[0][0][0]['Plan']
+
+    def findNestedLoopSeqScans(self, plan: dict) -> list:
+        found = []
+        children = plan.get('Plans', [])
+        if plan['Node Type'] == 'Nested Loop':
+            inner = [child for child in children
+                     if child.get('Parent Relationship') == 'Inner']
+            for child in inner:
+                while child['Node Type'] == 'Materialize':
+                    child = child['Plans'][0]
+                if child['Node Type'] == 'Seq Scan':
+                    found.append(child['Relation Name'])
+        for child in children:
+            found.extend(self.findNestedLoopSeqScans(child))
+        return found
+
+    def test_noNestedLoopSequentialScans(self):
+        with openConnection(config.connect) as cursor:
+            for view in self.views:
+                with self.subTest(view=view):
+                    plan = self.getPlan(cursor, view)
+                    self.assertEqual(self.findNestedLoopSeqScans(plan), [])
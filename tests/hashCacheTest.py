@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.hashCache import CachedHashes, HashCache, statKey
+
+PARTIAL = b'\xab' * 32
+FULL = b'\xcd' * 32
+
+
+class hashCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cachePath = Path(self.directory.name, 'cache', 'hashCache.sqlite3')
+        self.file = Path(self.directory.name, 'file.txt')
+        self.file.write_text('contents')
+
+    def test_hashesSurviveMoveAndReopen(self):
+        with HashCache(self.cachePath) as cache:
+            cache.recordPartial(statKey(self.file), PARTIAL)
+            cache.recordFull(statKey(self.file), FULL)
+        moved = self.file.rename(Path(self.directory.name, 'moved.txt'))
+
+        with HashCache(self.cachePath) as cache:
+            self.assertEqual(cache.lookup([statKey(moved)]), [CachedHashes(PARTIAL, FULL)])
+
+    def test_lookupManyAtOnce(self):
+        other = Path(self.directory.name, 'other.txt')
+        other.write_text('other contents')
+        with HashCache(self.cachePath) as cache:
+            cache.recordPartial(statKey(self.file), PARTIAL)
+            keys = [statKey(other), statKey(self.file), None, statKey(self.file)]
+
+            self.assertEqual(cache.lookup(keys), [None, CachedHashes(PARTIAL, None), None,
+                                                  CachedHashes(PARTIAL, None)])
+            self.assertEqual(cache.lookup([]), [])
+
+    def test_modifiedFileMisses(self):
+        with HashCache(self.cachePath) as cache:
+            cache.recordPartial(statKey(self.file), PARTIAL)
+            stat = self.file.stat()
+            os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+            self.assertEqual(cache.lookup([statKey(self.file), None]), [None, None])
+
+    def test_fullHashNeedsPartialHash(self):
+        with HashCache(self.cachePath) as cache:
+            cache.recordFull(statKey(self.file), FULL)
+
+            self.assertEqual(cache.lookup([statKey(self.file)]), [None])
+
+    def test_unusedEntriesAreEvicted(self):
+        with HashCache(self.cachePath, maxAgeRuns=2) as cache:
+            cache.recordPartial(statKey(self.file), PARTIAL)
+        with HashCache(self.cachePath, maxAgeRuns=2):
+            pass
+        with HashCache(self.cachePath, maxAgeRuns=2):
+            pass
+
+        with HashCache(self.cachePath) as cache:
+            self.assertEqual(cache.lookup([statKey(self.file)]), [None])
+
+    def test_leastRecentlyUsedEvictedBeyondMaxEntries(self):
+        other = Path(self.directory.name, 'other.txt')
+        other.write_text('other contents')
+        with HashCache(self.cachePath) as cache:
+            cache.recordPartial(statKey(self.file), PARTIAL)
+        with HashCache(self.cachePath, maxEntries=1) as cache:
+            cache.recordPartial(statKey(other), PARTIAL)
+
+        with HashCache(self.cachePath) as cache:
+            self.assertEqual(
+                cache.lookup([statKey(self.file), statKey(other)]),
+                [None, CachedHashes(PARTIAL, None)])
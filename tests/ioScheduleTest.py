@@ -0,0 +1,105 @@
+import errno
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.goInterface import HASH_ERRNO, hashErrorMessage
+from duplicateAndDeletedFileTracker.hashEngine import (
+    goEngineAvailable, hashFiles, openHasherSession, sharedThrottle)
+from duplicateAndDeletedFileTracker.hashOptions import HashOptions
+from duplicateAndDeletedFileTracker.ioSchedule import Throttle, diskOrder
+from duplicateAndDeletedFileTracker.main import (
+    hashFile, loadCurrentFiles, openConnection, updatePartialHashes)
+from duplicateAndDeletedFileTracker.schema import migrate
+
+
+class ioScheduleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.paths = []
+        for i in range(20):
+            path = Path(self.directory.name, f"file{i:02d}")
+            path.write_bytes(f"{i}".encode() * 1000)
+            self.paths.append(str(path))
+        self.paths.append(str(Path(self.directory.name, "missing")))
+
+    def test_diskOrder(self):
+        self.assertEqual(diskOrder(self.paths, 'none'), list(range(len(self.paths))))
+        order = diskOrder(self.paths, 'inode')
+        self.assertEqual(sorted(order), list(range(len(self.paths))))
+        inodes = [os.stat(self.paths[i]).st_ino for i in order[:-1]]
+        self.assertEqual(inodes, sorted(inodes))
+        # Files which can't be stat'd are read last
+        self.assertEqual(order[-1], len(self.paths) - 1)
+        self.assertEqual(diskOrder(self.paths, 'extent')[-1], len(self.paths) - 1)
+        with self.assertRaises(ValueError):
+            diskOrder(self.paths, 'random')
+
+    def test_scheduledHashesKeepTheirIndices(self):
+        expected = [hashFile(path) for path in self.paths[:-1]]
+        engines = ['python'] + (['go'] if goEngineAvailable() else [])
+        for engine in engines:
+            for order in ('inode', 'extent'):
+                hashes = hashFiles(self.paths, HashOptions(
+                    workers=2, engine=engine, order=order, bytesPerSecond=10 ** 9, iops=10 ** 6))
+                self.assertEqual(hashes[:-1], expected, (engine, order))
+                self.assertTrue(hashes[-1].startswith("Error"))
+
+    def test_hashErrorsKeepTheirReason(self):
+        self.assertEqual(hashErrorMessage(HASH_ERRNO + errno.EACCES),
+                         f"Error: [Errno {errno.EACCES}] {os.strerror(errno.EACCES)}")
+        self.assertNotEqual(hashErrorMessage(HASH_ERRNO + errno.EIO),
+                            hashErrorMessage(HASH_ERRNO + errno.EACCES))
+        engines = ['python'] + (['go'] if goEngineAvailable() else [])
+        for engine in engines:
+            hashes = hashFiles([self.directory.name, self.paths[-1]], HashOptions(engine=engine))
+            self.assertIn(os.strerror(errno.EISDIR), hashes[0], engine)
+            self.assertIn(os.strerror(errno.ENOENT), hashes[1], engine)
+
+    def test_throttleWaitsForWhatIsOverTheLimit(self):
+        throttle = Throttle(bytesPerSecond=100000)
+        start = time.monotonic()
+        throttle.take(50000)
+        self.assertGreater(time.monotonic() - start, 0.4)
+        self.assertIsNone(Throttle.limiting(0, 0))
+
+    def test_oneThrottleSharedByEverySession(self):
+        expected = [hashFile(path) for path in self.paths[:-1]]
+        engines = ['python'] + (['go'] if goEngineAvailable() else [])
+        for engine in engines:
+            options = HashOptions(workers=2, engine=engine, bytesPerSecond=10 ** 9)
+            throttle = sharedThrottle(options)
+            self.assertIsNotNone(throttle, engine)
+            self.assertIs(sharedThrottle(options), throttle, engine)
+            throttle.take(1000)
+            for _ in range(2):
+                with openHasherSession(options) as session:
+                    session.submit(self.paths[:-1])
+                    session.closeInput()
+                    hashes = dict(session.results())
+                self.assertEqual([hashes[i] for i in range(len(expected))], expected, engine)
+        self.assertIsNone(sharedThrottle(HashOptions()))
+
+    def test_partialHashesReadInOrderAndThrottled(self):
+        taken = []
+        class RecordingThrottle(Throttle):
+            def take(self, n): taken.append(n)
+        rootDir = Path(self.directory.name, 'tree')
+        rootDir.mkdir()
+        sizes = {}
+        for i in range(10):
+            path = Path(rootDir, f"file{i}")
+            path.write_bytes(b"x" * (100 + i))
+            sizes[os.stat(path).st_ino] = 100 + i
+        with openConnection({'sqlite': Path(self.directory.name, 'archive.sqlite3')}) as cursor:
+            migrate(cursor)
+            loadCurrentFiles(cursor, rootDir)
+            cursor.execute("SELECT file_id, relative_path FROM currentFiles "
+                           "ORDER BY relative_path DESC")
+            result = updatePartialHashes(cursor, rootDir, cursor.fetchall(), "currentFiles",
+                                         order='inode', throttle=RecordingThrottle(1))
+        self.assertEqual(result.updated, 10)
+        self.assertEqual(taken, [sizes[inode] for inode in sorted(sizes)])
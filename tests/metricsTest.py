@@ -0,0 +1,69 @@
+import json
+import pstats
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.metrics import MetricsRecorder
+
+
+class metricsTestCase(unittest.TestCase):
+    def test_countersAreAttributedToInnermostPhase(self):
+        recorder = MetricsRecorder()
+        with recorder.phase('update'):
+            recorder.count('roundTrips')
+            with recorder.phase('dbWrite'):
+                recorder.count('roundTrips', 2)
+                recorder.count('rowsWritten', 10)
+        for _ in recorder.timedIterator('hash', range(3)):
+            recorder.count('bytesHashed', 100)
+
+        report = recorder.report()
+        self.assertEqual(report['totals'], {'roundTrips': 3, 'rowsWritten': 10, 'bytesHashed': 300})
+        self.assertEqual(report['phases']['update']['counters'], {'roundTrips': 1})
+        self.assertEqual(report['phases']['dbWrite']['counters'], {'roundTrips': 2, 'rowsWritten': 10})
+        self.assertEqual(report['phases']['hash']['calls'], 1)
+
+    def test_writeReports(self):
+        recorder = MetricsRecorder()
+        with recorder.phase('walk'):
+            recorder.count('filesWalked', 5)
+        with tempfile.TemporaryDirectory() as directory:
+            jsonPath, promPath = Path(directory, 'run.json'), Path(directory, 'run.prom')
+            recorder.writeJson(jsonPath)
+            recorder.writePrometheus(promPath)
+
+            self.assertEqual(json.loads(jsonPath.read_text())['totals'], {'filesWalked': 5})
+            prom = promPath.read_text()
+            self.assertIn('dadft_phase_seconds{phase="walk"}', prom)
+            self.assertIn('dadft_files_walked 5', prom)
+
+    def test_phasesAreTrackedPerThread(self):
+        recorder = MetricsRecorder()
+        entered = threading.Barrier(2)
+        def run(name):
+            with recorder.phase(name):
+                entered.wait()
+                recorder.count('files')
+        threads = [threading.Thread(target=run, args=(name,)) for name in ('walk', 'dbWrite')]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        report = recorder.report()
+        self.assertEqual(report['phases']['walk']['counters'], {'files': 1})
+        self.assertEqual(report['phases']['dbWrite']['counters'], {'files': 1})
+
+    def test_profileTimedIteratorPhase(self):
+        def produce():
+            for i in range(3):
+                yield sum(range(1000 * i))
+        with tempfile.TemporaryDirectory() as directory:
+            profilePath = Path(directory, 'hash.prof')
+            recorder = MetricsRecorder(profilePhase='hash', profilePath=profilePath)
+            for _ in range(2):
+                list(recorder.timedIterator('hash', produce()))
+
+            functions = {function for _, _, function in pstats.Stats(str(profilePath)).stats}
+            self.assertIn('produce', functions)
+            self.assertIsNone(recorder._profile)
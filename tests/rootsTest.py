@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.main import openConnection, updateArchive
+from duplicateAndDeletedFileTracker.roots import registerRoots, updateRoots
+from duplicateAndDeletedFileTracker.schema import migrate
+
+
+class rootsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.connect = {'sqlite': Path(self.directory.name, 'archive.sqlite3')}
+        self.photos = Path(self.directory.name, 'photos')
+        self.backup = Path(self.directory.name, 'backup')
+        for rootDir, files in (
+            (self.photos, {'same.txt': 'photos', 'beach.jpg': 'beach'}),
+            (self.backup, {'same.txt': 'backup', 'copy of beach.jpg': 'beach'}),
+        ):
+            rootDir.mkdir()
+            for name, contents in files.items():
+                Path(rootDir, name).write_text(contents)
+
+    def update(self, roots):
+        with openConnection(self.connect) as cursor:
+            migrate(cursor)
+            roots = registerRoots(cursor, roots)
+        updateRoots(self.connect, roots)
+        with openConnection(self.connect) as cursor:
+            updateArchive(cursor)
+            return cursor.getResult(
+                "SELECT classification, root_id, relative_path, matched_root_id, matched_path "
+                "FROM fileClassifications ORDER BY classification, root_id, relative_path")
+
+    def test_pathsComparedWithinRootAndHashesAcross(self):
+        self.update({'default': self.photos})
+        classified = self.update({'default': self.photos, 'backup': self.backup})
+        self.assertEqual(classified, [
+            ('duplicate', 2, 'copy of beach.jpg', 1, 'beach.jpg'),
+            ('newUnseen', 2, 'same.txt', None, None),
+        ])
@@ -0,0 +1,32 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker import queries
+from duplicateAndDeletedFileTracker.main import openConnection
+from duplicateAndDeletedFileTracker.schema import SCHEMA_VERSION, migrate, schemaVersion
+
+
+class schemaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.connect = {'sqlite': Path(self.directory.name, 'archive.sqlite3')}
+
+    def test_migrateAppliesOnlyPendingVersions(self):
+        with openConnection(self.connect) as cursor:
+            self.assertEqual(migrate(cursor), list(range(1, SCHEMA_VERSION + 1)))
+            cursor.execute("DELETE FROM schemaVersion WHERE version = %s", (SCHEMA_VERSION,))
+
+        with openConnection(self.connect) as cursor:
+            self.assertEqual(migrate(cursor), [SCHEMA_VERSION])
+            self.assertEqual(migrate(cursor), [])
+            self.assertEqual(schemaVersion(cursor), SCHEMA_VERSION)
+            self.assertEqual(cursor.getResult("SELECT count(*) FROM movedFiles"), [(0,)])
+
+    def test_resetAllTablesStartsOver(self):
+        with openConnection(self.connect) as cursor:
+            migrate(cursor)
+            cursor.execute(queries.resetAllTables)
+            self.assertEqual(schemaVersion(cursor), 0)
+            self.assertEqual(migrate(cursor), list(range(1, SCHEMA_VERSION + 1)))
@@ -0,0 +1,20 @@
+-- Synthetic archive of %(rows)s files where one in ten files has been moved
+-- and a further tenth of the archive has previously been deleted.
+INSERT INTO archiveFiles (relative_path, file_hash, modified)
+SELECT 'archive/' || i, sha256(i::text::bytea), '2022-07-12 07:20:00'
+FROM generate_series(1, %(rows)s) AS i;
+
+INSERT INTO currentFiles (relative_path, file_hash, modified)
+SELECT
+    CASE WHEN mod(i, 10) = 0 THEN 'moved/' || i ELSE 'archive/' || i END,
+    sha256(i::text::bytea),
+    '2022-07-12 07:20:00'
+FROM generate_series(1, %(rows)s) AS i;
+
+INSERT INTO archiveDeletedFiles (relative_path, file_hash, modified, deleteDetected)
+SELECT 'deleted/' || i, sha256((-i)::text::bytea), '2022-07-01 07:20:00', '2022-07-12 07:20:00'
+FROM generate_series(1, %(rows)s / 10) AS i;
+
+ANALYZE archiveFiles;
+ANALYZE currentFiles;
+ANALYZE archiveDeletedFiles;
@@ -0,0 +1,29 @@
+import unittest
+
+from duplicateAndDeletedFileTracker.sqliteBackend import parseProcedures, splitStatements, translate
+
+
+class sqliteBackendTestCase(unittest.TestCase):
+    def test_translatesPostgresSyntax(self):
+        self.assertEqual(
+            translate("TRUNCATE currentFiles"), "DELETE FROM currentFiles")
+        self.assertEqual(
+            translate("DELETE FROM archiveFiles WHERE file_id = ANY(%s::bigint[])"),
+            "DELETE FROM archiveFiles WHERE file_id IN (SELECT value FROM json_each(?))")
+        self.assertEqual(
+            translate("SELECT p.prefix FROM unnest(%(prefixes)s::varchar[]) AS p(prefix)"),
+            "SELECT p.prefix FROM (SELECT value AS prefix FROM json_each(:prefixes)) AS p")
+
+    def test_splitStatementsKeepsQuotedSemicolons(self):
+        self.assertEqual(
+            splitStatements("-- comment\nSELECT ';';\nSELECT 2"),
+            ["-- comment\nSELECT ';';", "SELECT 2;"])
+
+    def test_parseProcedures(self):
+        procedures = parseProcedures(
+            "-- PROCEDURE keepDuplicate(input_id)\nDELETE FROM a WHERE id = :input_id;\n"
+            "-- PROCEDURE classify()\nCALL keepDuplicate();\n")
+        self.assertEqual(procedures, {
+            'keepduplicate': (['input_id'], ["DELETE FROM a WHERE id = :input_id;"]),
+            'classify': ([], ["CALL keepDuplicate();"]),
+        })
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import tests
 from pathlib import Path
 from importlib.resources import files, as_file
@@ -11,6 +13,12 @@ class config:
         'password': 'test'
     }
 
+# TEST_DATABASE=sqlite runs the database tests against the embedded SQLite
+# backend instead of the Postgres server above
+if os.environ.get('TEST_DATABASE') == 'sqlite':
+    config.connect = {
+        'sqlite': Path(tempfile.gettempdir(), 'duplicateAndDeletedFileTrackerTest.sqlite3')}
+
 with as_file(files(tests).joinpath('temp_testFileStructure')) as path:
     config.rootPath = path
 
@@ -2,3 +2,4 @@ from importlib.resources import files
 from . import sql
 
 setupTest_archiveFiles = files(sql).joinpath('setupTest_archiveFiles.sql').read_text()
+populateLargeTables = files(sql).joinpath('populateLargeTables.sql').read_text()
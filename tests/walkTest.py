@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.main import ingest
+from duplicateAndDeletedFileTracker.walk import scanChanges, scanTree
+
+from tests.test_config import config
+
+
+class walkTestCase(unittest.TestCase):
+    def test_scanTreeMatchesOsWalk(self):
+        rootDir = config.fileStructurePath
+        walked = sorted(
+            (os.path.relpath(Path(path, name), rootDir), os.stat(Path(path, name)).st_mtime,
+             os.stat(Path(path, name)).st_size)
+            for path, _, files in os.walk(rootDir) for name in files
+        )
+        scanned = [file[:3] for file in scanTree(rootDir)]
+
+        self.assertEqual(sorted(scanned), walked)
+        self.assertEqual(sorted(
+            (str(file['relative_path']), file['file_path'].stat().st_mtime, file['size'])
+            for file in ingest(rootDir)
+        ), walked)
+
+    def test_scanTreeOrderIsDeterministic(self):
+        first = list(scanTree(config.fileStructurePath, workers=1))
+        for workers in (2, 8):
+            self.assertEqual(list(scanTree(config.fileStructurePath, workers)), first)
+
+    def copyWithOldDirectoryMtimes(self) -> Path:
+        # Backdate the directories so changes made by the test always give
+        # them a new mtime, however coarse the filesystem's timestamps
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        rootDir = Path(directory.name, 'root')
+        shutil.copytree(config.fileStructurePath, rootDir)
+        for path, _, _ in os.walk(rootDir):
+            os.utime(path, ns=(0, 0))
+        return rootDir
+
+    def test_scanChangesWithNothingKnownMatchesScanTree(self):
+        rootDir = self.copyWithOldDirectoryMtimes()
+
+        changes = scanChanges(rootDir, {})
+
+        self.assertEqual(sorted(changes.files), sorted(scanTree(rootDir)))
+        self.assertEqual(sorted(changes.rescanned), [
+            '', 'alpha' + os.sep, os.path.join('alpha', 'bravo', ''), 'foxtrot' + os.sep])
+        self.assertEqual(sorted(changes.directories), sorted(changes.rescanned))
+
+    def test_scanChangesOnlyRescansChangedDirectories(self):
+        rootDir = self.copyWithOldDirectoryMtimes()
+        known = scanChanges(rootDir, {}).directories
+
+        Path(rootDir, 'alpha', 'bravo', 'added.txt').write_text('added')
+        shutil.rmtree(Path(rootDir, 'foxtrot'))
+        changes = scanChanges(rootDir, known)
+
+        self.assertEqual(sorted(changes.rescanned), ['', os.path.join('alpha', 'bravo', '')])
+        self.assertEqual(changes.removed, ['foxtrot' + os.sep])
+        self.assertIn((os.path.join('alpha', 'bravo', 'added.txt'), ), [f[:1] for f in changes.files])
+        self.assertNotIn('foxtrot' + os.sep, changes.directories)
+        self.assertEqual(scanChanges(rootDir, changes.directories).rescanned, [])
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from duplicateAndDeletedFileTracker.inotify import inotifyAvailable
+from duplicateAndDeletedFileTracker.watch import TreeWatcher
+
+
+@unittest.skipUnless(inotifyAvailable(), "inotify is only available on Linux")
+class watchTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.rootDir = Path(directory.name)
+        Path(self.rootDir, 'alpha', 'bravo').mkdir(parents=True)
+        Path(self.rootDir, 'alpha', 'bravo', 'old.txt').write_text('old')
+        self.watcher = TreeWatcher(self.rootDir)
+        self.addCleanup(self.watcher.close)
+        self.watcher.watchTree()
+
+    def readAllEvents(self):
+        while self.watcher.readEvents(timeout=0.1): pass
+
+    def test_changedDirectoriesAreRescanned(self):
+        Path(self.rootDir, 'alpha', 'new.txt').write_text('new')
+        Path(self.rootDir, 'charlie').mkdir()
+        Path(self.rootDir, 'charlie', 'inNewDirectory.txt').write_text('new')
+        self.readAllEvents()
+
+        changes = self.watcher.takeChanges()
+
+        self.assertEqual(sorted(changes.rescanned), ['', 'alpha' + os.sep, 'charlie' + os.sep])
+        self.assertEqual(
+            sorted(file[0] for file in changes.files),
+            ['alpha' + os.sep + 'new.txt', 'charlie' + os.sep + 'inNewDirectory.txt'])
+        self.assertEqual(changes.removed, [])
+
+    def test_removedSubtreesAreReported(self):
+        outside = tempfile.TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+        shutil.move(str(Path(self.rootDir, 'alpha')), outside.name)
+        self.readAllEvents()
+
+        changes = self.watcher.takeChanges()
+
+        self.assertEqual(changes.rescanned, [''])
+        self.assertEqual(
+            sorted(changes.removed), ['alpha' + os.sep, os.path.join('alpha', 'bravo', '')])
+        self.assertEqual(list(self.watcher.watches), [''])
@@ -1,45 +1,79 @@
+from contextlib import nullcontext
 
-from duplicateAndDeletedFileTracker import config, queries
+from duplicateAndDeletedFileTracker import config, metrics, queries
+from duplicateAndDeletedFileTracker.hashCache import HashCache
+from duplicateAndDeletedFileTracker.hashOptions import HashOptions
 from duplicateAndDeletedFileTracker.main import (getDuplicateManagementCallbacks,
-                                  loadCurrentFiles, openConnection, prettyPrint,
+                                  openConnection, prettyPrint,
+                                  printHardLinkSavings, printHashErrors,
                                   promptUserDuplicates,
-                                  updateModifiedFilesHash, updateNewFilesHash)
+                                  selectClassified, updateArchive)
+from duplicateAndDeletedFileTracker.roots import (configuredRoots, qualifiedPath,
+                                                  registerRoots, updateRoots)
+from duplicateAndDeletedFileTracker.schema import migrate
+
+metricsJsonPath = getattr(config, 'metricsJsonPath', None)
+metricsPrometheusPath = getattr(config, 'metricsPrometheusPath', None)
+profilePhase = getattr(config, 'profilePhase', None)
+if metricsJsonPath or metricsPrometheusPath or profilePhase:
+    metrics.enable(profilePhase, getattr(config, 'profilePath', None))
+
+hashCachePath = getattr(config, 'hashCachePath', None)
 
 with openConnection(config.connect) as cursor:
-    cursor.execute(queries.resetCurrentFiles)
-    cursor.execute(queries.resetViewAndProcs)
+    with metrics.phase('prepareSchema'):
+        migrate(cursor)
+        roots = registerRoots(cursor, configuredRoots(config))
 
-    loadCurrentFiles(cursor, config.rootPath)
-    updateNewFilesHash(cursor, config.rootPath)
-    updateModifiedFilesHash(cursor, config.rootPath)
+with (HashCache(hashCachePath) if hashCachePath else nullcontext()) as hashCache:
+    # Each root is loaded and hashed on its own connection, see roots.updateRoots
+    with metrics.phase('updateRoots'):
+        hashResult = updateRoots(
+            config.connect, roots, HashOptions.fromConfig(config), hashCache,
+            incremental=getattr(config, 'incrementalScan', False),
+            pipelined=getattr(config, 'pipelinedUpdate', False))
+    printHashErrors(hashResult)
+    printHardLinkSavings(hashResult)
 
-    prettyPrint(cursor, "SELECT relative_path, original_path FROM movedFiles")
-    cursor.execute("CALL updateArchiveMovedFiles();")
+with openConnection(config.connect) as cursor:
+    cursor.execute(queries.analyzeCurrentFiles)
 
-    prettyPrint(cursor, "SELECT relative_path FROM modifiedFiles")
-    cursor.execute("CALL updateArchiveModifiedFiles();")
+    with metrics.phase('reconcile'):
+        updateArchive(cursor)
 
-    prettyPrint(cursor, "SELECT relative_path FROM newUnseenFiles")
-    cursor.execute("CALL updateArchiveNewUnseenFiles();")
+    # With several roots each path is shown prefixed with its root_id
+    if len(roots) > 1:
+        prettyPrint(cursor, "SELECT root_id, name FROM archiveRoots ORDER BY root_id")
+        relative_path = qualifiedPath("root_id", "relative_path")
+        matched_path = qualifiedPath("matched_root_id", "matched_path")
+    else:
+        relative_path, matched_path = "relative_path", "matched_path"
 
-    prettyPrint(cursor, "SELECT relative_path FROM deletedFiles")
-    cursor.execute("CALL updateArchiveDeletedFiles();")
+    prettyPrint(cursor, selectClassified('moved', f"{relative_path}, {matched_path} AS original_path"))
+    prettyPrint(cursor, selectClassified('modified', relative_path))
+    prettyPrint(cursor, selectClassified('newUnseen', relative_path))
+    prettyPrint(cursor, selectClassified('deleted', relative_path))
 
-    callbacksDup = getDuplicateManagementCallbacks(cursor, "duplicateFiles", config.rootPath)
+    callbacksDup = getDuplicateManagementCallbacks(cursor, "duplicateFiles", roots)
     callbacksPrevDup = getDuplicateManagementCallbacks(
-        cursor, "duplicatePreviouslyDeletedFiles", config.rootPath)
+        cursor, "duplicatePreviouslyDeletedFiles", roots)
     
     promptUserDuplicates(
         cursor, 
-        "SELECT file_id, relative_path, original_path FROM duplicateFiles", 
+        selectClassified(
+            'duplicate', f"file_id, {relative_path}, {matched_path}, encode(file_hash, 'hex')"),
         callbacksDup
     )
 
     promptUserDuplicates(
         cursor, 
-        "SELECT file_id, relative_path, previously_deleted_path " \
-        "FROM duplicatePreviouslyDeletedFiles", 
+        selectClassified(
+            'duplicatePreviouslyDeleted',
+            f"file_id, {relative_path}, {matched_path}, encode(file_hash, 'hex')"),
         callbacksPrevDup
     )
 
     # prettyPrint(cursor,"SELECT file_id, relative_path, duplicate_path FROM duplicatesInArchive")
+
+if metricsJsonPath: metrics.recorder.writeJson(metricsJsonPath)
+if metricsPrometheusPath: metrics.recorder.writePrometheus(metricsPrometheusPath)
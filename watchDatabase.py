@@ -0,0 +1,46 @@
+import argparse
+import signal
+from contextlib import nullcontext
+
+from duplicateAndDeletedFileTracker import config
+from duplicateAndDeletedFileTracker.hashCache import HashCache
+from duplicateAndDeletedFileTracker.hashOptions import HashOptions
+from duplicateAndDeletedFileTracker.main import openConnection
+from duplicateAndDeletedFileTracker.roots import configuredRoots, registerRoots
+from duplicateAndDeletedFileTracker.schema import migrate
+from duplicateAndDeletedFileTracker.watch import WatchDaemon
+
+# Keeps currentFiles up to date as files under config.rootPath change (Linux
+# only). Send SIGUSR1 to apply the changes so far to the archive tables;
+# duplicates are left for updateDatabase.py to prompt about. With several
+# config.roots, run one watcher per root, naming the root to watch.
+
+configured = configuredRoots(config)
+parser = argparse.ArgumentParser(description="Watch an archive root for changes")
+parser.add_argument('root', nargs='?', choices=list(configured),
+                    help="name of the root to watch, when config.roots has several")
+args = parser.parse_args()
+if args.root is None and len(configured) > 1:
+    parser.error("config.roots has several roots, name the one to watch")
+name = args.root or next(iter(configured))
+
+with openConnection(config.connect) as cursor:
+    migrate(cursor)
+    (root_id, rootDir), = registerRoots(cursor, {name: configured[name]}).items()
+
+hashCachePath = getattr(config, 'hashCachePath', None)
+
+with (HashCache(hashCachePath) if hashCachePath else nullcontext()) as hashCache:
+    daemon = WatchDaemon(
+        config.connect,
+        rootDir,
+        HashOptions.fromConfig(config),
+        hashCache,
+        debounceSeconds=getattr(config, 'watchDebounceSeconds', 2.0),
+        maxDelaySeconds=getattr(config, 'watchMaxDelaySeconds', 30.0),
+        root_id=root_id,
+    )
+    signal.signal(signal.SIGUSR1, lambda signum, frame: daemon.requestUpdateArchive())
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: daemon.stop())
+    daemon.run()